@@ -0,0 +1,109 @@
+"""
+Accuracy parity and latency of the inference backends against eager PyTorch.
+
+    cd backend
+    python -m benchmarks.bench_backends --model ./models/$MODEL_NAME --backends onnx,openvino,onnx-int8 \
+        --calib-dir /path/to/calibration/images
+
+Every backend sees exactly the same letterboxed inputs. Parity is measured
+on detections above CONF_SCORE: a torch detection counts as matched when
+the other backend has a box of the same class with IoU >= --iou.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_batching import SAMPLE_DIR, load_images, percentile  # noqa: E402
+from services.detections import CONF_SCORE  # noqa: E402
+from services.image_pipeline import MODEL_INPUT_SIZE  # noqa: E402
+from services.inference_backend import load_backend, resolve_model_path  # noqa: E402
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def confident(raw):
+    return [(int(c), p, box) for c, p, box in zip(raw['cls'], raw['conf'], raw['xyxy']) if p > CONF_SCORE]
+
+
+def compare(reference, candidate, iou_threshold):
+    matched = total = 0
+    conf_diffs = []
+    for ref_raw, cand_raw in zip(reference, candidate):
+        cand = confident(cand_raw)
+        for cls, conf, box in confident(ref_raw):
+            total += 1
+            best = max(
+                ((iou(box, other_box), other_conf) for other_cls, other_conf, other_box in cand if other_cls == cls),
+                default=(0.0, None),
+            )
+            if best[0] >= iou_threshold:
+                matched += 1
+                conf_diffs.append(abs(conf - best[1]))
+    top1 = sum(
+        1 for ref_raw, cand_raw in zip(reference, candidate)
+        if [d[0] for d in sorted(confident(ref_raw), key=lambda d: -d[1])[:1]]
+        == [d[0] for d in sorted(confident(cand_raw), key=lambda d: -d[1])[:1]]
+    )
+    return {
+        'recall': matched / total if total else 1.0,
+        'top1_agreement': top1 / len(reference) if reference else 1.0,
+        'mean_conf_diff': sum(conf_diffs) / len(conf_diffs) if conf_diffs else 0.0,
+    }
+
+
+def measure(backend, images, batch_size, repeat):
+    backend.predict_batch(images[:batch_size])  # warmup
+    timings = []
+    outputs = []
+    for r in range(repeat):
+        for i in range(0, len(images), batch_size):
+            chunk = images[i:i + batch_size]
+            start = time.perf_counter()
+            result = backend.predict_batch(chunk)
+            timings.append((time.perf_counter() - start) / len(chunk))
+            if r == 0:
+                outputs.extend(result)
+    return outputs, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', help='YOLO checkpoint path (default: ./models/$MODEL_NAME)')
+    parser.add_argument('--images', default=os.path.join(SAMPLE_DIR, 'sample-img*.jpg'))
+    parser.add_argument('--backends', default='onnx,openvino', help='comma list of onnx, openvino, onnx-int8, openvino-int8')
+    parser.add_argument('--calib-dir', help='calibration images for the -int8 variants')
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    model_path = args.model or f'./models/{os.getenv("MODEL_NAME")}'
+    images = load_images(args.images)
+
+    reference, ref_timings = measure(load_backend(model_path), images, args.batch_size, args.repeat)
+    print(f"{'backend':>14} {'p50_ms/img':>10} {'p95_ms/img':>10} {'speedup':>8} {'recall':>7} {'top1':>6} {'dconf':>7}")
+    ref_p50 = percentile(ref_timings, 50)
+    print(f"{'torch':>14} {ref_p50 * 1000:>10.1f} {percentile(ref_timings, 95) * 1000:>10.1f} "
+          f"{1.0:>8.2f} {1.0:>7.3f} {1.0:>6.3f} {0.0:>7.4f}")
+
+    for spec in args.backends.split(','):
+        name, _, variant = spec.partition('-')
+        path = resolve_model_path(model_path, backend=name, int8=variant == 'int8',
+                                  calib_dir=args.calib_dir, input_size=MODEL_INPUT_SIZE)
+        outputs, timings = measure(load_backend(path, backend=name), images, args.batch_size, args.repeat)
+        parity = compare(reference, outputs, args.iou)
+        p50 = percentile(timings, 50)
+        print(f"{spec:>14} {p50 * 1000:>10.1f} {percentile(timings, 95) * 1000:>10.1f} {ref_p50 / p50:>8.2f} "
+              f"{parity['recall']:>7.3f} {parity['top1_agreement']:>6.3f} {parity['mean_conf_diff']:>7.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Throughput vs. p95 latency of the micro-batching scheduler.
+
+    cd backend
+    python -m benchmarks.bench_batching --model ./models/$MODEL_NAME
+    python -m benchmarks.bench_batching --synthetic   # 모델 없이 비용 모델로 실행
+
+Each configuration is driven by `--clients` threads that submit images back to
+back for `--requests` requests in total.
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.batch_scheduler import BatchScheduler  # noqa: E402
+from services.image_pipeline import prepare_image  # noqa: E402
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend', 'public')
+
+
+def load_images(pattern):
+    # 모델 입력과 같은 letterbox 배열로 준비
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f'No images match {pattern}')
+    return [prepare_image(path).tensor for path in paths]
+
+
+def make_yolo_runner(model_path):
+    from services.inference_backend import load_backend
+
+    backend = load_backend(model_path)
+    return backend.predict_batch
+
+
+def make_synthetic_runner(fixed_ms, per_image_ms):
+    # 배치 한 번의 고정 비용 + 이미지당 비용을 흉내낸다
+    def run(images):
+        time.sleep((fixed_ms + per_image_ms * len(images)) / 1000.0)
+        return [0] * len(images)
+    return run
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_config(runner, images, batch_size, wait_ms, clients, total_requests):
+    scheduler = BatchScheduler(runner, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            scheduler.predict(images[i % len(images)])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    stats = scheduler.stats()
+    scheduler.stop()
+    return {
+        'batch_size': batch_size,
+        'wait_ms': wait_ms,
+        'throughput': total_requests / wall,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'avg_batch': stats['avg_batch'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', help='YOLO checkpoint path (default: ./models/$MODEL_NAME)')
+    parser.add_argument('--synthetic', action='store_true', help='use a sleep-based cost model instead of YOLO')
+    parser.add_argument('--fixed-ms', type=float, default=40.0, help='synthetic per-batch cost')
+    parser.add_argument('--per-image-ms', type=float, default=15.0, help='synthetic per-image cost')
+    parser.add_argument('--images', default=os.path.join(SAMPLE_DIR, 'sample-img*.jpg'))
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16')
+    parser.add_argument('--wait-ms', default='0,5,10,25')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if args.synthetic:
+        runner = make_synthetic_runner(args.fixed_ms, args.per_image_ms)
+    else:
+        runner = make_yolo_runner(args.model or f'./models/{os.getenv("MODEL_NAME")}')
+        runner(images[:1])  # warmup
+
+    print(f"{'batch':>5} {'wait_ms':>7} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'avg_batch':>9}")
+    for batch_size in [int(x) for x in args.batch_sizes.split(',')]:
+        for wait_ms in [float(x) for x in args.wait_ms.split(',')]:
+            row = run_config(runner, images, batch_size, wait_ms, args.clients, args.requests)
+            print(f"{row['batch_size']:>5} {row['wait_ms']:>7.1f} {row['throughput']:>8.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['avg_batch']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
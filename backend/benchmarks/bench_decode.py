@@ -0,0 +1,113 @@
+"""
+Decode time and peak RSS: full decode + resize vs. reduced-resolution decode.
+
+    cd backend
+    python -m benchmarks.bench_decode                      # 샘플 이미지를 폰 해상도로 키워서 측정
+    python -m benchmarks.bench_decode --phone-size 0       # 원본 샘플 그대로 측정
+
+`legacy` is the old ingest path (Image.open().convert('RGB') followed by a
+LANCZOS resize to 1024px), `draft` is services.image_pipeline.decode_image.
+Each path runs in its own subprocess so peak RSS is not shared between them.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_batching import SAMPLE_DIR, percentile  # noqa: E402
+from services.image_pipeline import MAX_IMAGE_SIZE, decode_image  # noqa: E402
+
+
+def legacy_decode(path, max_size=MAX_IMAGE_SIZE):
+    image = Image.open(path).convert('RGB')
+    if max(image.size) > max_size:
+        ratio = max_size / max(image.size)
+        new_size = tuple(int(dim * ratio) for dim in image.size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    return image
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux는 KB, macOS는 byte 단위
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_worker(mode, paths, repeat):
+    decode = legacy_decode if mode == 'legacy' else decode_image
+    baseline_rss = peak_rss_mb()
+    timings = []
+    sizes = set()
+    for _ in range(repeat):
+        for path in paths:
+            start = time.perf_counter()
+            image = decode(path)
+            timings.append(time.perf_counter() - start)
+            sizes.add(image.size)
+    print(json.dumps({
+        'mode': mode,
+        'images': len(paths),
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - baseline_rss,
+        'output_sizes': sorted(sizes),
+    }))
+
+
+def make_phone_copies(paths, phone_size, out_dir):
+    # 샘플 이미지는 작기 때문에 12MP급 폰 사진 크기로 키운 JPEG을 만든다
+    copies = []
+    for path in paths:
+        image = Image.open(path).convert('RGB')
+        ratio = phone_size / max(image.size)
+        image = image.resize(tuple(int(dim * ratio) for dim in image.size), Image.Resampling.BICUBIC)
+        target = os.path.join(out_dir, os.path.basename(path))
+        image.save(target, format='JPEG', quality=92)
+        copies.append(target)
+    return copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default=os.path.join(SAMPLE_DIR, 'sample-img*.jpg'))
+    parser.add_argument('--phone-size', type=int, default=4032, help='longest side of upscaled copies, 0 to disable')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--worker', choices=['legacy', 'draft'], help=argparse.SUPPRESS)
+    parser.add_argument('--paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.paths, args.repeat)
+        return
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        raise SystemExit(f'No images match {args.images}')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.phone_size:
+            paths = make_phone_copies(paths, args.phone_size, tmp_dir)
+
+        print(f"{'mode':>7} {'p50_ms':>8} {'p95_ms':>8} {'mean_ms':>8} {'peak_rss_mb':>11} {'rss_growth_mb':>13}")
+        for mode in ('legacy', 'draft'):
+            output = subprocess.check_output([
+                sys.executable, '-m', 'benchmarks.bench_decode',
+                '--worker', mode, '--repeat', str(args.repeat), '--paths', *paths,
+            ], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            row = json.loads(output)
+            print(f"{row['mode']:>7} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['mean_ms']:>8.1f} "
+                  f"{row['peak_rss_mb']:>11.1f} {row['rss_growth_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""
+Stage-by-stage benchmark of the /backend/predict detection pipeline.
+
+    cd backend
+    python -m benchmarks.bench_pipeline --output results/$(date +%Y%m%d-%H%M).json
+    python -m benchmarks.bench_pipeline --no-model --output results/decode-only.json
+    python -m benchmarks.bench_pipeline --compare results/before.json results/after.json
+
+`direct` times each stage of the function path separately:
+decode, resize (letterbox to the model input), inference, postprocess
+(box mapping + build_detections), encode (JPEG for the stored/returned image)
+and serialize (JSON body). `flask` posts every image through the Flask test
+client to /backend/predict and times the whole request; it imports main.py,
+so it needs the same environment as the server (MODEL_NAME etc.). The
+detection cache is disabled and the OpenAI assistant call is skipped unless
+--with-assistant is given, so repeated runs measure the same work.
+
+Results are written as JSON with the environment, the corpus (file hashes)
+and per-stage latency percentiles and throughput, so runs can be diffed
+with --compare.
+
+--transport picks how the image travels in the flask path: `base64` (JSON
+image_base64 both ways, the legacy anonymous client), `form` (multipart
+upload, temporary image URL in the response) or `raw` (image bytes as the
+request body, multipart/mixed response). Request and response sizes are
+recorded next to the latency.
+"""
+import argparse
+import base64
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_batching import SAMPLE_DIR  # noqa: E402
+from benchmarks.bench_decode import make_phone_copies  # noqa: E402
+from services.detections import build_detections, detection_failed_body  # noqa: E402
+from services.image_pipeline import MAX_IMAGE_SIZE, MODEL_INPUT_SIZE, PreparedImage, decode_image  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSPORTS = ('base64', 'form', 'raw')
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))] * 1000
+
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'mean_ms': total / len(ordered) * 1000,
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+        'max_ms': ordered[-1] * 1000,
+        'throughput_per_s': len(ordered) / total if total else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def package_versions(names):
+    from importlib import metadata
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def corpus_info(paths):
+    info = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        info.append({'file': os.path.basename(path), 'bytes': len(data), 'sha1': hashlib.sha1(data).hexdigest()})
+    return info
+
+
+def run_direct(corpus, backend, repeat, warmup, transport='base64'):
+    stages = {name: [] for name in ('decode', 'resize', 'inference', 'postprocess', 'encode', 'serialize', 'total')}
+
+    for iteration in range(warmup + repeat):
+        for data in corpus:
+            timings = {}
+            start = time.perf_counter()
+            image = decode_image(io.BytesIO(data), MAX_IMAGE_SIZE, resize=False)
+            timings['decode'] = time.perf_counter() - start
+
+            t = time.perf_counter()
+            prepared = PreparedImage(image, MODEL_INPUT_SIZE, MAX_IMAGE_SIZE)
+            timings['resize'] = time.perf_counter() - t
+
+            if backend is not None:
+                t = time.perf_counter()
+                raw = backend.predict_batch([prepared.tensor])[0]
+                timings['inference'] = time.perf_counter() - t
+            else:
+                raw = {'cls': [], 'conf': [], 'xyxy': []}
+
+            t = time.perf_counter()
+            detections = build_detections(prepared.map_boxes(raw))
+            timings['postprocess'] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            jpeg = prepared.to_jpeg()
+            timings['encode'] = time.perf_counter() - t
+
+            t = time.perf_counter()
+            if not detections:
+                body = detection_failed_body(raw)
+            elif transport == 'base64':
+                body = {'detections': detections, 'image_base64': base64.b64encode(jpeg).decode()}
+            else:
+                # 이미지는 임시 파일/바이너리 파트로 나가므로 JSON에는 감지 결과만
+                body = {'detections': detections}
+            json.dumps(body)
+            timings['serialize'] = time.perf_counter() - t
+            timings['total'] = time.perf_counter() - start
+
+            if iteration >= warmup:
+                for name, value in timings.items():
+                    stages[name].append(value)
+
+    return {name: summarize(values) for name, values in stages.items() if values}
+
+
+def predict_request(data, i, transport):
+    if transport == 'base64':
+        return {'json': {'image_base64': base64.b64encode(data).decode()}}
+    if transport == 'raw':
+        return {'data': data, 'content_type': 'image/jpeg', 'headers': {'Accept': 'multipart/mixed'}}
+    return {'data': {'image': (io.BytesIO(data), f'bench-{i}.jpg')}, 'content_type': 'multipart/form-data'}
+
+
+def request_size(data, transport):
+    if transport == 'base64':
+        return len(json.dumps({'image_base64': base64.b64encode(data).decode()}))
+    return len(data)
+
+
+def run_flask(corpus, repeat, warmup, with_assistant, transport='form'):
+    # 반복 실행이 같은 작업을 측정하도록 감지 캐시는 끈다
+    # (환경에 이미 값이 있어도 덮어쓴다)
+    os.environ['DETECTION_CACHE_SIZE'] = '0'
+    os.environ.pop('DETECTION_CACHE_DIR', None)
+    os.chdir(BACKEND_DIR)
+    import main
+
+    if not with_assistant:
+        main.assistant_talk_request = lambda *args, **kwargs: None
+    main.detector.wait()
+
+    client = main.app.test_client()
+    timings = []
+    statuses = {}
+    request_bytes = []
+    response_bytes = []
+    for iteration in range(warmup + repeat):
+        for i, data in enumerate(corpus):
+            start = time.perf_counter()
+            response = client.post('/backend/predict', **predict_request(data, i, transport))
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+            if iteration >= warmup:
+                timings.append(elapsed)
+                request_bytes.append(request_size(data, transport))
+                response_bytes.append(len(body))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return {
+        'request': summarize(timings),
+        'status_codes': {str(k): v for k, v in statuses.items()},
+        'transport': transport,
+        'detection_cache_size': main.detection_cache.max_entries,
+        'mean_request_bytes': sum(request_bytes) / len(request_bytes) if request_bytes else 0,
+        'mean_response_bytes': sum(response_bytes) / len(response_bytes) if response_bytes else 0,
+    }
+
+
+def compare(before_path, after_path):
+    with open(before_path, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)
+
+    print(f"{'path':>7} {'stage':>12} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10} {'p95 delta':>10}")
+    for path in ('direct', 'flask'):
+        for stage, new in after.get(path, {}).items():
+            old = before.get(path, {}).get(stage)
+            if not isinstance(new, dict) or 'p95_ms' not in new or not old:
+                continue
+            delta = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            print(f"{path:>7} {stage:>12} {old['p50_ms']:>11.2f} {new['p50_ms']:>10.2f} "
+                  f"{old['p95_ms']:>11.2f} {new['p95_ms']:>10.2f} {delta:>+9.1f}%")
+
+
+def print_table(results):
+    print(f"{'path':>7} {'stage':>12} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'per_s':>8}")
+    for path in ('direct', 'flask'):
+        for stage, row in results.get(path, {}).items():
+            if isinstance(row, dict) and 'p50_ms' in row:
+                print(f"{path:>7} {stage:>12} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                      f"{row['p99_ms']:>8.2f} {row['throughput_per_s']:>8.1f}")
+    flask = results.get('flask')
+    if flask:
+        print(f"  flask transport={flask['transport']} request={flask['mean_request_bytes']:.0f}B "
+              f"response={flask['mean_response_bytes']:.0f}B "
+              f"detection_cache_size={flask.get('detection_cache_size', '?')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default=os.path.join(SAMPLE_DIR, 'sample-img*.jpg'))
+    parser.add_argument('--phone-size', type=int, default=0, help='upscale the corpus to this longest side first')
+    parser.add_argument('--model', help='YOLO checkpoint path (default: ./models/$MODEL_NAME)')
+    parser.add_argument('--backend', default=os.getenv('INFERENCE_BACKEND', 'torch'))
+    parser.add_argument('--no-model', action='store_true', help='skip the inference stage')
+    parser.add_argument('--paths', default='direct,flask', help='comma list of direct, flask')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--transport', choices=TRANSPORTS, default='form',
+                        help='how the image is sent and returned (see module docstring)')
+    parser.add_argument('--with-assistant', action='store_true', help='keep the OpenAI assistant call in the flask path')
+    parser.add_argument('--output', help='write machine-readable results to this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='diff two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        raise SystemExit(f'No images match {args.images}')
+    paths_to_run = [p for p in args.paths.split(',') if p]
+    if args.no_model and 'flask' in paths_to_run:
+        paths_to_run.remove('flask')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.phone_size:
+            paths = make_phone_copies(paths, args.phone_size, tmp_dir)
+        corpus = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                corpus.append(f.read())
+        corpus_meta = corpus_info(paths)
+
+    model_path = args.model or f'./models/{os.getenv("MODEL_NAME")}'
+    results = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': package_versions(['pillow', 'numpy', 'torch', 'ultralytics', 'onnxruntime', 'openvino', 'flask']),
+        },
+        'config': {
+            'backend': None if args.no_model else args.backend,
+            'model': None if args.no_model else model_path,
+            'model_input_size': MODEL_INPUT_SIZE,
+            'max_image_size': MAX_IMAGE_SIZE,
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'phone_size': args.phone_size,
+            'transport': args.transport,
+        },
+        'corpus': corpus_meta,
+    }
+
+    if 'direct' in paths_to_run:
+        backend = None
+        if not args.no_model:
+            from services.inference_backend import load_backend, resolve_model_path
+            backend = load_backend(
+                resolve_model_path(model_path, backend=args.backend, input_size=MODEL_INPUT_SIZE),
+                backend=args.backend,
+            )
+        results['direct'] = run_direct(corpus, backend, args.repeat, args.warmup, args.transport)
+    if 'flask' in paths_to_run:
+        results['flask'] = run_flask(corpus, args.repeat, args.warmup, args.with_assistant, args.transport)
+
+    print_table(results)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
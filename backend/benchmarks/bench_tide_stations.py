@@ -0,0 +1,100 @@
+"""
+Correctness and speed check for the in-memory tide station index.
+
+    cd backend
+    python -m benchmarks.bench_tide_stations
+
+Builds a TideStationIndex over random stations around the Korean coast,
+compares every nearest-station answer (single and batch) with a
+brute-force haversine scan over the same class, then times single lookups
+and batch throughput. Exits non-zero on a mismatch.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.tide_stations import STATION_CLASSES, TideStationIndex, haversine_m, parse_capabilities  # noqa: E402
+
+OBJECTS = [
+    '조위, 수온, 기온, 기압, 풍향, 풍속',
+    '조위, 수온',
+    '조수간만',
+    '조수간만 없음',
+    '조위, 수온, 기온, 기압, 조수간만',
+]
+
+
+def random_stations(count, rng):
+    return [{
+        'obs_station_id': i + 1,
+        'obs_post_id': f'DT_{i:04d}',
+        'obs_post_name': f'관측소 {i}',
+        'obs_lat': rng.uniform(33.0, 38.7),
+        'obs_lon': rng.uniform(124.5, 131.0),
+        'capabilities': parse_capabilities(rng.choice(OBJECTS)),
+    } for i in range(count)]
+
+
+def brute_force(stations, lat, lon):
+    lats = np.array([station['obs_lat'] for station in stations])
+    lons = np.array([station['obs_lon'] for station in stations])
+    distances = haversine_m(lat, lon, lats, lons)
+    best = int(np.argmin(distances))
+    return stations[best], float(distances[best])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stations', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    stations = random_stations(args.stations, rng)
+    index = TideStationIndex(lambda required: [s for s in stations if s['capabilities'] & required == required])
+    lats = [rng.uniform(32.0, 39.5) for _ in range(args.points)]
+    lons = [rng.uniform(123.5, 132.0) for _ in range(args.points)]
+    failures = []
+
+    for name, required in STATION_CLASSES.items():
+        members = [station for station in stations if station['capabilities'] & required == required]
+        batch = index.nearest_many(name, lats, lons)
+        for lat, lon, many in zip(lats, lons, batch):
+            expected, expected_distance = brute_force(members, lat, lon)
+            single = index.nearest(name, lat, lon)
+            for label, (station, distance) in (('single', single), ('batch', many)):
+                # 같은 거리의 관측소가 둘이면 어느 쪽이든 정답
+                if abs(distance - expected_distance) > 1e-3:
+                    failures.append(f'{name} {label} ({lat:.4f}, {lon:.4f}): {station["obs_post_id"]} '
+                                    f'{distance:.1f}m, expected {expected["obs_post_id"]} {expected_distance:.1f}m')
+
+        started = time.perf_counter()
+        for lat, lon in zip(lats, lons):
+            index.nearest(name, lat, lon)
+        single_us = (time.perf_counter() - started) / len(lats) * 1e6
+        started = time.perf_counter()
+        index.nearest_many(name, lats, lons)
+        batch_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for lat, lon in zip(lats[:200], lons[:200]):
+            brute_force(members, lat, lon)
+        brute_us = (time.perf_counter() - started) / 200 * 1e6
+        print(f"{name:<10} stations={len(members):<5} single={single_us:7.1f}us "
+              f"batch={len(lats) / batch_s:10.0f} points/s  brute force={brute_us:7.1f}us")
+
+    for failure in failures[:20]:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print(f'OK: {args.points} points match the brute-force nearest station for every class')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Inference throughput vs. number of worker processes.
+
+    cd backend
+    python -m benchmarks.bench_workers --model ./models/$MODEL_NAME --workers 1,2,4
+
+Every configuration starts a fresh InferencePool, waits for all workers to
+load the model, then drives it with `--clients` concurrent submitters.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_batching import SAMPLE_DIR, load_images, percentile  # noqa: E402
+from services.inference_pool import InferencePool  # noqa: E402
+
+
+def wait_ready(pool, timeout=300):
+    deadline = time.monotonic() + timeout
+    while pool.stats()['ready_workers'] < pool.num_workers:
+        if time.monotonic() > deadline:
+            raise SystemExit('Workers did not become ready in time')
+        time.sleep(0.2)
+
+
+def run_config(model_path, images, workers, batch_size, wait_ms, clients, total_requests):
+    pool = InferencePool(model_path, num_workers=workers, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    wait_ready(pool)
+    for image in images[:workers]:
+        pool.predict(image)  # warmup
+
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            pool.predict(images[i % len(images)])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    pool.stop()
+
+    return {
+        'workers': workers,
+        'throughput': total_requests / wall,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', help='YOLO checkpoint path (default: ./models/$MODEL_NAME)')
+    parser.add_argument('--images', default=os.path.join(SAMPLE_DIR, 'sample-img*.jpg'))
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, 4, os.cpu_count() or 1})))
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--wait-ms', type=float, default=5.0)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    model_path = args.model or f'./models/{os.getenv("MODEL_NAME")}'
+    images = load_images(args.images)
+
+    print(f"cpu_count={os.cpu_count()}")
+    print(f"{'workers':>7} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for workers in [int(x) for x in args.workers.split(',')]:
+        row = run_config(model_path, images, workers, args.batch_size, args.wait_ms, args.clients, args.requests)
+        print(f"{row['workers']:>7} {row['throughput']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
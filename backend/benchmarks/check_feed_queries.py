@@ -0,0 +1,282 @@
+"""
+Query-count regression check for the community feed endpoints.
+
+    cd backend
+    python -m benchmarks.check_feed_queries
+
+Seeds a throwaway SQLite database with users, posts, likes and comments,
+calls GET /api/posts with several page sizes and GET /api/posts/top
+through the Flask test client, and counts the SQL statements each request
+executes. The feed must not issue per-post queries: the count has to be
+the same for every page size and stay within MAX_QUERIES. Exits non-zero
+on a regression so it can run in CI.
+
+It also follows next_cursor through the whole feed (and the comments of
+the busiest post) to check that keyset pages cover every row exactly once,
+newest first, with the same query count on deep pages.
+
+The stored likes_count/comments_count columns are filled by
+repair_post_counts() after seeding, compared with COUNT(*) on every page,
+and checked again after liking, unliking and commenting through the API.
+Between those writes /api/posts/top must be served from the in-memory
+board without queries and match a fresh ranking from the database.
+
+Query counts above are measured with the response cache cleared before
+every request. A last pass measures warm requests and checks that after
+each kind of write the cached responses equal freshly loaded ones.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 캐시가 채워진 요청의 최대 쿼리 수 (is_liked만 DB에서 읽음)
+MAX_WARM_QUERIES = {
+    '/api/posts': 1,
+    '/api/posts/<id>': 1,
+    '/api/posts/<id>/comments': 0,
+}
+
+# 요청 하나당 허용하는 최대 쿼리 수 (캐시 없이)
+MAX_QUERIES = {
+    '/api/posts': 2,  # 페이지 게시글+작성자(좋아요/댓글 수 포함), is_liked (total은 include_total=1일 때만, 캐시)
+    '/api/posts/top': 1,  # 보드를 다시 읽을 때만, 그 외에는 0
+}
+
+
+def seed(main, num_users, num_posts, seed_value=0):
+    rng = random.Random(seed_value)
+    session = main.Session()
+    try:
+        users = [
+            main.User(username=f'user{i}', password_hash='x', email=f'user{i}@example.com',
+                      avatar=f'/uploads/avatar{i}.jpg' if i % 2 else None)
+            for i in range(num_users)
+        ]
+        session.add_all(users)
+        session.flush()
+
+        start = datetime(2024, 1, 1)
+        posts = [
+            main.CommunicationBoard(
+                user_id=rng.choice(users).user_id,
+                title=f'post {i}',
+                content='content',
+                images=[f'/uploads/post{i}.jpg'] if i % 3 else [],
+                created_at=start + timedelta(minutes=i // 3),  # 같은 시각 게시글로 id 정렬도 확인
+            )
+            for i in range(num_posts)
+        ]
+        session.add_all(posts)
+        session.flush()
+
+        for post in posts:
+            for user in rng.sample(users, rng.randint(0, num_users)):
+                session.add(main.PostLike(post_id=post.post_id, user_id=user.user_id))
+            for _ in range(rng.randint(0, 4)):
+                session.add(main.PostComment(post_id=post.post_id, user_id=rng.choice(users).user_id, content='hi'))
+        session.commit()
+        # 카운터 컬럼은 0으로 들어가 있으므로 복구 작업으로 채운다
+        main.repair_post_counts(session)
+        return users[0].user_id
+    finally:
+        session.close()
+
+
+def expected_counts(main, post_id, user_id):
+    session = main.Session()
+    try:
+        return (
+            session.query(main.PostLike).filter_by(post_id=post_id).count(),
+            session.query(main.PostComment).filter_by(post_id=post_id).count(),
+            session.query(main.PostLike).filter_by(post_id=post_id, user_id=user_id).first() is not None,
+        )
+    finally:
+        session.close()
+
+
+def check_values(main, posts, user_id, with_is_liked=True):
+    """Compare the aggregated fields with straightforward per-post queries"""
+    wrong = []
+    for post in posts:
+        expected = expected_counts(main, post['post_id'], user_id)
+        got = (post['likes_count'], post['comments_count'], post.get('is_liked'))
+        if not with_is_liked:
+            expected, got = expected[:2], got[:2]
+        if got != expected:
+            wrong.append(f"post {post['post_id']}: got {got}, expected {expected}")
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=60)
+    parser.add_argument('--page-sizes', default='1,5,10,50')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='feed-queries-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'feed.db')}"
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import jwt
+    from sqlalchemy import event
+    import main as app_main
+
+    app_main.Base.metadata.create_all(app_main.engine)
+    user_id = seed(app_main, args.users, args.posts)
+    token = jwt.encode({'user_id': user_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       app_main.SECRET_KEY, algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    statements = []
+    event.listen(app_main.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+    client = app_main.app.test_client()
+
+    def count_queries(url, cold=True):
+        app_main.Session.remove()
+        if cold:
+            app_main.response_cache.clear()
+        statements.clear()
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise SystemExit(f'{url} returned {response.status_code}: {response.get_data(as_text=True)}')
+        return len(statements), response.get_json()
+
+    failures = []
+    counts = {}
+    for per_page in [int(size) for size in args.page_sizes.split(',')]:
+        counts[per_page], body = count_queries(f'/api/posts?per_page={per_page}')
+        print(f"/api/posts?per_page={per_page:<3} posts={len(body['posts']):<3} queries={counts[per_page]}")
+        failures += check_values(app_main, body['posts'], user_id)
+    if len(set(counts.values())) != 1:
+        failures.append(f'/api/posts query count depends on page size: {counts}')
+    if max(counts.values()) > MAX_QUERIES['/api/posts']:
+        failures.append(f"/api/posts runs {max(counts.values())} queries (max {MAX_QUERIES['/api/posts']})")
+
+    # 커서를 따라 끝까지 읽어 누락/중복 없이 최신순인지, 깊은 페이지도 쿼리 수가 같은지 확인
+    seen, deep_counts, cursor = [], set(), None
+    while True:
+        url = '/api/posts?per_page=7' + (f'&cursor={cursor}' if cursor else '')
+        page_count, body = count_queries(url)
+        deep_counts.add(page_count)
+        seen += [(post['created_at'], post['post_id']) for post in body['posts']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    print(f'/api/posts cursor walk    posts={len(seen):<3} queries per page={sorted(deep_counts)}')
+    if len(seen) != args.posts or len(set(seen)) != len(seen) or seen != sorted(seen, reverse=True):
+        failures.append('cursor pagination over /api/posts skipped, repeated or misordered posts')
+    if len(deep_counts) != 1:
+        failures.append(f'/api/posts query count changes with depth: {sorted(deep_counts)}')
+
+    busiest = max(seen, key=lambda key: expected_counts(app_main, key[1], user_id)[1])[1]
+    comments, cursor = [], None
+    while True:
+        url = f'/api/posts/{busiest}/comments?limit=1' + (f'&cursor={cursor}' if cursor else '')
+        _, body = count_queries(url)
+        comments += [comment['comment_id'] for comment in body['comments']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    if sorted(comments) != sorted(set(comments)) or len(comments) != expected_counts(app_main, busiest, user_id)[1]:
+        failures.append(f'cursor pagination over comments of post {busiest} is incomplete: {comments}')
+
+    top_count, body = count_queries('/api/posts/top')
+    print(f'/api/posts/top          posts={len(body):<3} queries={top_count}')
+    failures += check_values(app_main, body, user_id, with_is_liked=False)
+    top_likes = [post['likes_count'] for post in body]
+    if top_likes != sorted(top_likes, reverse=True):
+        failures.append(f'/api/posts/top is not ordered by likes: {top_likes}')
+    if top_count > MAX_QUERIES['/api/posts/top']:
+        failures.append(f"/api/posts/top runs {top_count} queries (max {MAX_QUERIES['/api/posts/top']})")
+
+    # 인기 게시글 보드: 캐시된 응답은 쿼리 없이, 쓰기 후에도 DB 순위와 같아야 한다
+    rng = random.Random(1)
+    board_counts, mismatches, reloads = set(), 0, 0
+    for _ in range(40):
+        post_id = rng.choice(seen)[1]
+        client.post(f'/api/posts/{post_id}/like', headers=headers)
+        board_count, body = count_queries('/api/posts/top')
+        board_counts.add(board_count)
+        reloads += board_count > 0
+        expected = [post['post_id'] for post in app_main.load_top_posts(5)]
+        mismatches += [post['post_id'] for post in body] != expected
+    print(f'/api/posts/top after likes  queries={sorted(board_counts)} reloads={reloads} mismatches={mismatches}')
+    if mismatches:
+        failures.append(f'/api/posts/top differed from the database ranking {mismatches} times')
+    # 보드가 얕으면(TOP_POSTS_DEPTH) 글이 빠질 때 다시 읽지만 대부분은 메모리에서 응답해야 한다
+    if max(board_counts) > MAX_QUERIES['/api/posts/top'] or reloads > 10:
+        failures.append(f'/api/posts/top reloaded on {reloads} of 40 hits (queries {sorted(board_counts)})')
+
+    # API로 좋아요/취소/댓글 후에도 저장된 카운터가 실제 행 수와 같은지 확인
+    post_ids = [key[1] for key in seen[:5]]
+    for post_id in post_ids:
+        for url, payload in ((f'/api/posts/{post_id}/like', None), (f'/api/posts/{post_id}/comments', {'content': 'hey'}),
+                             (f'/api/posts/{post_id}/like', None), (f'/api/posts/{post_id}/like', None)):
+            response = client.post(url, headers=headers, json=payload)
+            if response.status_code not in (200, 201):
+                raise SystemExit(f'POST {url} returned {response.status_code}: {response.get_data(as_text=True)}')
+        _, body = count_queries(f'/api/posts/{post_id}')
+        failures += check_values(app_main, [body], user_id)
+    session = app_main.Session()
+    try:
+        drifted = app_main.repair_post_counts(session)
+    finally:
+        session.close()
+    print(f'counters after writes   posts={len(post_ids):<3} drifted={drifted}')
+    if drifted:
+        failures.append(f'{drifted} posts had stored counters that differ from their likes/comments')
+
+    # 응답 캐시: 채워진 뒤의 쿼리 수, 쓰기 후 캐시된 응답이 새로 읽은 응답과 같은지
+    # 수정 권한이 있도록 토큰 사용자가 새 글을 써서 피드 첫 페이지 맨 위에 둔다
+    response = client.post('/api/posts', headers=headers, data={'title': 'mine', 'content': 'mine'})
+    post_id = response.get_json()['post']['post_id']
+    urls = {
+        '/api/posts': '/api/posts?per_page=10',
+        '/api/posts/<id>': f'/api/posts/{post_id}',
+        '/api/posts/<id>/comments': f'/api/posts/{post_id}/comments?limit=3',
+    }
+    writes = [
+        ('like', lambda: client.post(f'/api/posts/{post_id}/like', headers=headers)),
+        ('comment', lambda: client.post(f'/api/posts/{post_id}/comments', headers=headers, json={'content': 'cached?'})),
+        ('edit', lambda: client.put(f'/api/posts/{post_id}', headers=headers, data={'title': 'edited'})),
+        ('new post', lambda: client.post('/api/posts', headers=headers, data={'title': 'new', 'content': 'new'})),
+        ('profile', lambda: client.put('/profile', headers=headers, json={'username': 'renamed'})),
+    ]
+    app_main.response_cache.clear()
+    for name, url in urls.items():
+        count_queries(url, cold=False)
+        warm_count, _ = count_queries(url, cold=False)
+        print(f'{name:<25} warm queries={warm_count}')
+        if warm_count > MAX_WARM_QUERIES[name]:
+            failures.append(f'{name} runs {warm_count} queries with a warm cache (max {MAX_WARM_QUERIES[name]})')
+    for write_name, write in writes:
+        for url in urls.values():
+            count_queries(url, cold=False)  # 캐시 채우기
+        response = write()
+        if response.status_code not in (200, 201):
+            raise SystemExit(f'{write_name} returned {response.status_code}: {response.get_data(as_text=True)}')
+        cached = {name: count_queries(url, cold=False)[1] for name, url in urls.items()}
+        for name, url in urls.items():
+            _, fresh = count_queries(url)
+            if cached[name] != fresh:
+                failures.append(f'{name} served a stale cached response after {write_name}')
+    for namespace, counts in app_main.response_cache.stats()['namespaces'].items():
+        print(f"response cache {namespace:<10} hits={counts['hits']:<4} misses={counts['misses']:<4} "
+              f"hit_rate={counts['hit_rate']}")
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: feed query count is independent of page size and depth')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Payload and correctness check for the viewport fishing spot API.
+
+    cd backend
+    python -m benchmarks.check_fishing_spots
+
+Seeds a throwaway SQLite database with random fishing places spread over
+Korea, then asks GET /api/fishing_spots for a few map views from the
+whole country down to a single harbour. For every view it checks that
+clusters account for every spot in the (cell-snapped) bbox exactly once,
+that individual spots are exactly the ones inside the bbox, and prints the
+response size next to the full POST /api/map_fishing_spot payload.
+
+The unfiltered list is served from a precompressed snapshot: the check
+decodes every encoding, expects 304 for a matching If-None-Match, no SQL
+between fingerprint checks, and a new version after a spot is added.
+Exits non-zero on a mismatch.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (이름, bbox west,south,east,north, 카카오맵 레벨)
+VIEWS = [
+    ('country', (124.5, 33.0, 131.0, 38.7), 13),
+    ('province', (126.0, 34.4, 127.6, 35.6), 10),
+    ('city', (126.85, 35.05, 127.05, 35.25), 7),
+    ('harbour', (126.95, 35.12, 126.99, 35.16), 4),
+]
+TYPES = ['바다', '저수지', '평지', '기타']
+
+
+def seed(main, count, seed_value=0):
+    rng = random.Random(seed_value)
+    session = main.Session()
+    try:
+        session.add_all([
+            main.FishingPlace(
+                fishing_place_id=i + 1,
+                name=f'낚시터 {i}',
+                type=rng.choice(TYPES),
+                address_road=f'도로명 주소 {i}',
+                address_land=f'지번 주소 {i}',
+                latitude=rng.uniform(33.2, 38.5),
+                longitude=rng.uniform(125.0, 130.0),
+                phone_number='010-0000-0000',
+                main_fish_species='우럭+광어+감성돔+노래미',
+                usage_fee='무료' if i % 2 else '1인 20,000원, 어린이 10,000원, 주차 별도',
+                safety_facilities='구명조끼+구명튜브+안전난간+CCTV+비상벨' * 3,
+                convenience_facilities='화장실+주차장+매점+샤워실+식당+숙박' * 3,
+            )
+            for i in range(count)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def spots_in(main, bbox, types=None):
+    west, south, east, north = bbox
+    session = main.Session()
+    try:
+        query = session.query(main.FishingPlace.fishing_place_id).filter(
+            main.FishingPlace.latitude.between(south, north),
+            main.FishingPlace.longitude.between(west, east),
+        )
+        if types:
+            query = query.filter(main.FishingPlace.type.in_(types))
+        return {spot_id for (spot_id,) in query}
+    finally:
+        session.close()
+
+
+def decode(response):
+    encoding = response.headers.get('Content-Encoding', 'identity')
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(response.data)
+    return gzip.decompress(response.data) if encoding == 'gzip' else response.data
+
+
+def check_snapshot(main, client, event):
+    failures = []
+    expected = sorted(spots_in(main, (-180, -90, 180, 90)))
+    statements = []
+    listen = lambda conn, cursor, statement, *rest: statements.append(statement)
+    event.listen(main.engine, 'before_cursor_execute', listen)
+    bodies = {}
+    for accept in ('br', 'gzip', 'identity'):
+        response = client.get('/api/fishing_spots', headers={'Accept-Encoding': accept})
+        bodies[accept] = decode(response)
+        etag = response.headers['ETag']
+        print(f"snapshot {accept:<9} status={response.status_code} bytes={len(response.data):<8} etag={etag}")
+        again = client.get('/api/fishing_spots', headers={'Accept-Encoding': accept, 'If-None-Match': etag})
+        if again.status_code != 304 or again.data:
+            failures.append(f'matching If-None-Match for {accept} returned {again.status_code}')
+    if len(set(bodies.values())) != 1:
+        failures.append('snapshot encodings decode to different bodies')
+    if sorted(spot['fishing_place_id'] for spot in json.loads(bodies['identity'])['spots']) != expected:
+        failures.append('snapshot list differs from the database')
+    if statements:
+        failures.append(f'snapshot requests ran {len(statements)} queries between fingerprint checks')
+    event.remove(main.engine, 'before_cursor_execute', listen)
+
+    # 다른 프로세스에서 시드가 추가된 경우: 다음 지문 확인 때 새 버전
+    old_etag = client.get('/api/fishing_spots').headers['ETag']
+    session = main.Session()
+    try:
+        session.add(main.FishingPlace(fishing_place_id=len(expected) + 1, name='새 낚시터', type='바다',
+                                      latitude=35.0, longitude=129.0))
+        session.commit()
+    finally:
+        session.close()
+    main.fishing_snapshots.check_interval = 0
+    response = client.get('/api/fishing_spots', headers={'If-None-Match': old_etag})
+    if response.status_code != 200 or response.headers['ETag'] == old_etag:
+        failures.append('snapshot was not rebuilt after a new spot was seeded')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spots', type=int, default=3000)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='fishing-spots-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'spots.db')}"
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import event
+    import main as app_main
+    from services.spot_clusters import snap_bbox
+
+    app_main.Base.metadata.create_all(app_main.engine)
+    seed(app_main, args.spots)
+    app_main.fishing_snapshots.rebuild()
+    client = app_main.app.test_client()
+    failures = []
+
+    full = client.post('/api/map_fishing_spot')
+    print(f"{'POST /api/map_fishing_spot':<28} items={len(full.get_json()['location']):<5} bytes={len(full.data)}")
+    listing = client.get('/api/fishing_spots')
+    print(f"{'GET /api/fishing_spots':<28} items={len(listing.get_json()['spots']):<5} bytes={len(listing.data)}")
+    failures += check_snapshot(app_main, client, event)
+
+    for types in (None, ['바다']):
+        for name, bbox, level in VIEWS:
+            query = f"/api/fishing_spots?bbox={','.join(map(str, bbox))}&level={level}"
+            query += ''.join(f'&type={t}' for t in types or [])
+            response = client.get(query)
+            body = response.get_json()
+            if response.status_code != 200:
+                failures.append(f'{query} returned {response.status_code}: {body}')
+                continue
+            if body['clustered']:
+                expected = spots_in(app_main, snap_bbox(bbox, body['cell']), types)
+                counted = sum(cluster['count'] for cluster in body['clusters'])
+                items = len(body['clusters'])
+                if counted != len(expected):
+                    failures.append(f'{name}: clusters count {counted} spots, expected {len(expected)}')
+                for cluster in body['clusters']:
+                    west, south, east, north = cluster['bounds']
+                    if not (south <= cluster['latitude'] <= north and west <= cluster['longitude'] <= east):
+                        failures.append(f'{name}: cluster centre outside its bounds: {cluster}')
+            else:
+                expected = spots_in(app_main, bbox, types)
+                got = [spot['fishing_place_id'] for spot in body['spots']]
+                items = len(got)
+                if sorted(got) != sorted(expected):
+                    failures.append(f'{name}: spots differ from the bbox contents')
+                if any('safety_facilities' in spot for spot in body['spots']):
+                    failures.append(f'{name}: spot list carries detail fields')
+            label = f"{name}{' (바다)' if types else ''}"
+            print(f"{label:<16} level={level:<3} {'clusters' if body['clustered'] else 'spots':<8} "
+                  f"items={items:<5} spots={len(expected):<5} bytes={len(response.data)}")
+
+    detail = client.get('/api/fishing_spots/1').get_json()
+    if not detail.get('safety_facilities'):
+        failures.append('detail endpoint is missing the facility fields')
+    if client.get('/api/fishing_spots?bbox=1,2,3').status_code != 400:
+        failures.append('malformed bbox was not rejected')
+    if client.get(f'/api/fishing_spots/{args.spots + 100}').status_code != 404:
+        failures.append('unknown spot did not return 404')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: viewport responses match the bbox contents')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Check the shared outbound HTTP client against a local stand-in server.
+
+    cd backend
+    python -m benchmarks.check_http_client
+
+Starts a keep-alive HTTP/1.1 server on 127.0.0.1 and checks that
+sequential calls reuse pooled connections (and how long the same calls
+take with a new connection each), that 503s are retried up to the limit,
+that the circuit opens after repeated failures, refuses calls without
+touching the server, and closes again after a successful probe once the
+cooldown has passed. Exits non-zero on a mismatch.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    connections = set()
+    hits = Counter()
+    flaky_failures = 2  # /flaky는 처음 두 번 503
+    down = True
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+            self.hits[self.path] += 1
+            hits = self.hits[self.path]
+        status = 200
+        if self.path == '/flaky' and hits <= self.flaky_failures:
+            status = 503
+        if self.path == '/down' and self.down:
+            status = 503
+        payload = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    sys.path.insert(0, BACKEND_DIR)
+    from services.http_client import CircuitOpenError, HttpClient
+
+    client = HttpClient(retries=2, backoff=0.01, failure_threshold=3, cooldown=0.5)
+    failures = []
+
+    started = time.perf_counter()
+    for _ in range(200):
+        client.get(f'{base}/ok', upstream='stand-in')
+    pooled = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(200):
+        requests.get(f'{base}/ok', headers={'Connection': 'close'})
+    fresh = time.perf_counter() - started
+    print(f"200 calls: pooled {pooled * 1000:.0f}ms, new connection each {fresh * 1000:.0f}ms")
+    StandIn.connections.clear()
+    for _ in range(50):
+        client.get(f'{base}/ok', upstream='stand-in')
+    print(f"50 pooled calls used {len(StandIn.connections)} connection(s)")
+    if len(StandIn.connections) > 1:
+        failures.append(f'pooled calls opened {len(StandIn.connections)} connections')
+
+    response = client.get(f'{base}/flaky', upstream='flaky')
+    if response.status_code != 200 or StandIn.hits['/flaky'] != 3 or client.stats('flaky')['retries'] != 2:
+        failures.append(f"flaky upstream: status {response.status_code} after {StandIn.hits['/flaky']} calls")
+
+    for _ in range(3):
+        if client.get(f'{base}/down', upstream='down').status_code != 503:
+            failures.append('failing upstream did not return its error status')
+    calls = StandIn.hits['/down']
+    try:
+        client.get(f'{base}/down', upstream='down')
+        failures.append('circuit did not open')
+    except CircuitOpenError:
+        pass
+    if StandIn.hits['/down'] != calls:
+        failures.append('open circuit still reached the server')
+    print(f"down upstream: {calls} server calls for 3 failed client calls, then {client.stats('down')}")
+
+    StandIn.down = False
+    time.sleep(0.6)
+    if client.get(f'{base}/down', upstream='down').status_code != 200 or client.stats('down')['circuit'] != 'closed':
+        failures.append('circuit did not close after a successful probe')
+
+    server.shutdown()
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: pooled connections, bounded retries and circuit breaking work')
+
+
+if __name__ == '__main__':
+    main()
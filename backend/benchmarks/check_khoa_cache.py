@@ -0,0 +1,149 @@
+"""
+Check the KHOA response cache against a local stand-in server.
+
+    cd backend
+    python -m benchmarks.check_khoa_cache
+
+Starts a small HTTP server on 127.0.0.1 that answers tideObsRecent and
+tideObsPreTab like KHOA (after an artificial delay) and counts the calls,
+points KHOA_API_BASE_URL at it and calls get_sea_weather_by_seapostid()
+from many threads at once. Checks that concurrent misses make one upstream
+call per (DATA_TYPE, obs_post_id, date), that repeats are served from the
+cache, that an expired entry is served stale while one refresh runs, that
+many refreshes at once stay on the cache's bounded refresh pool instead of
+a thread each, and that errors are not cached. Exits non-zero on a mismatch.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StandIn(BaseHTTPRequestHandler):
+    calls = Counter()
+    failing = set()
+    delay = 0.2
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        data_type = url.path.strip('/').split('/')[0]
+        obs_code = parse_qs(url.query)['ObsCode'][0]
+        with self.lock:
+            self.calls[(data_type, obs_code)] += 1
+            version = self.calls[(data_type, obs_code)]
+        time.sleep(self.delay)
+        if obs_code in self.failing:
+            body = {'result': {'error': 'No search data'}}
+        else:
+            body = {'result': {'meta': {'obs_post_id': obs_code}, 'data': {'version': version, 'type': data_type}}}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['KHOA_API_BASE_URL'] = f'http://127.0.0.1:{server.server_port}'
+    sys.path.insert(0, BACKEND_DIR)
+    from services import weather_service
+
+    stations = {'obsrecent': 'DT_0001', 'obspretab': 'DT_0002'}
+    failures = []
+
+    def burst(obs_data):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            results = list(executor.map(lambda _: weather_service.get_sea_weather_by_seapostid(obs_data),
+                                        range(args.clients)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = burst(stations)
+    print(f"cold burst   clients={args.clients} upstream calls={sum(StandIn.calls.values())} {elapsed * 1000:.0f}ms")
+    if StandIn.calls != Counter({('tideObsRecent', 'DT_0001'): 1, ('tideObsPreTab', 'DT_0002'): 1}):
+        failures.append(f'concurrent misses made {dict(StandIn.calls)} upstream calls')
+    if any(result != results[0] for result in results) or 'error' in results[0]['obsrecent']:
+        failures.append(f'clients got different or failed results: {results[0]}')
+
+    results, elapsed = burst(stations)
+    print(f"warm burst   clients={args.clients} upstream calls={sum(StandIn.calls.values())} {elapsed * 1000:.0f}ms")
+    if sum(StandIn.calls.values()) != 2:
+        failures.append('cached entries were fetched again')
+
+    # 최근 관측값 만료: 이전 값을 바로 주고 한 번만 갱신
+    weather_service.KHOA_CACHE_TTLS['tideObsRecent'] = (0.3, 60)
+    weather_service.khoa_cache.invalidate()
+    weather_service.get_sea_weather_by_seapostid(stations)
+    time.sleep(0.4)
+    before = StandIn.calls[('tideObsRecent', 'DT_0001')]
+    results, elapsed = burst(stations)
+    print(f"stale burst  clients={args.clients} {elapsed * 1000:.0f}ms version={results[0]['obsrecent']['version']}")
+    if elapsed > StandIn.delay or results[0]['obsrecent']['version'] != before:
+        failures.append('expired entry was not served stale')
+    time.sleep(StandIn.delay * 2)
+    if StandIn.calls[('tideObsRecent', 'DT_0001')] != before + 1:
+        failures.append(f"stale entry refreshed {StandIn.calls[('tideObsRecent', 'DT_0001')] - before} times")
+    if weather_service.get_sea_weather_by_seapostid(stations)['obsrecent']['version'] != before + 1:
+        failures.append('refreshed value was not stored')
+
+    # 여러 키가 한꺼번에 만료돼도 갱신은 캐시의 고정된 스레드에서만 실행
+    many = [{'obsrecent': f'DT_1{i:03d}', 'obspretab': 'DT_0002'} for i in range(20)]
+    for obs_data in many:
+        weather_service.get_sea_weather_by_seapostid(obs_data)
+    time.sleep(0.4)
+    threads_before = threading.active_count()
+    for obs_data in many:
+        weather_service.get_sea_weather_by_seapostid(obs_data)
+    refresh_threads = [t.name for t in threading.enumerate() if t.name.startswith('cache-refresh')]
+    workers = weather_service.khoa_cache.executor._max_workers
+    grown = threading.active_count() - threads_before
+    print(f"stale keys={len(many)} refresh threads={len(refresh_threads)} (pool {workers}) new threads={grown}")
+    if len(refresh_threads) > workers or grown > workers:
+        failures.append(f'{len(many)} refreshes started {grown} threads')
+    time.sleep(StandIn.delay * (len(many) / workers + 2))
+    if any(StandIn.calls[('tideObsRecent', obs_data['obsrecent'])] != 2 for obs_data in many):
+        failures.append('queued refreshes did not all run')
+
+    # 오류는 캐시하지 않고, 갱신 실패 시 이전 값을 유지
+    StandIn.failing.add('DT_0003')
+    for _ in range(2):
+        result = weather_service.get_sea_weather_by_seapostid({'obsrecent': 'DT_0003', 'obspretab': 'DT_0002'})
+    if result['obsrecent'] != {'error': 'No search data'} or StandIn.calls[('tideObsRecent', 'DT_0003')] != 2:
+        failures.append(f"error responses were cached or not reported: {result['obsrecent']}")
+    StandIn.failing.add('DT_0001')
+    time.sleep(0.4)
+    weather_service.get_sea_weather_by_seapostid(stations)
+    time.sleep(StandIn.delay * 2)
+    if 'error' in weather_service.get_sea_weather_by_seapostid(stations)['obsrecent']:
+        failures.append('failed refresh replaced the stale value')
+
+    print(f"stats: {weather_service.khoa_cache.stats()}")
+    server.shutdown()
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: one upstream call per key, stale entries refreshed in the background')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Multi-worker check for the prediction job queue.
+
+    cd backend
+    python -m benchmarks.check_prediction_jobs
+
+Two processes stand in for two gunicorn workers sharing one spool
+directory: the child accepts a job (the POST) and runs it, while the
+parent polls it through its own PredictionJobQueue (the GET), the way a
+poll lands on whichever worker the load balancer picks. Checks that the
+parent sees queued -> running -> done with the child's result, that
+invalid or unknown ids are not found, and that finished job files are
+swept after result_ttl. Exits non-zero on a failure.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.prediction_jobs import PredictionJobQueue  # noqa: E402
+
+
+def slow_handler(file_object, label=None):
+    time.sleep(0.5)
+    return {'detections': [{'label': label, 'bytes': len(file_object.read())}]}, 200
+
+
+def accepting_worker(spool_dir, job_ids, done):
+    jobs = PredictionJobQueue(slow_handler, spool_dir, num_workers=1)
+    job_ids.put(jobs.submit(b'fake image bytes', owner_id=7, label='감성돔'))
+    done.wait(10)
+
+
+def main():
+    spool_dir = tempfile.mkdtemp(prefix='prediction-jobs-')
+    context = multiprocessing.get_context('spawn')
+    job_ids, done = context.Queue(), context.Event()
+    child = context.Process(target=accepting_worker, args=(spool_dir, job_ids, done))
+    child.start()
+    failures = []
+    try:
+        job_id = job_ids.get(timeout=30)
+        polling = PredictionJobQueue(slow_handler, spool_dir, num_workers=0, result_ttl=1, sweep_interval=0)
+        seen = []
+        deadline = time.monotonic() + 10
+        job = None
+        while time.monotonic() < deadline:
+            job = polling.get(job_id)
+            if job is None:
+                failures.append('job accepted by another worker was not found')
+                break
+            if not seen or seen[-1] != job['status']:
+                seen.append(job['status'])
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.02)
+        print(f'statuses seen by the polling worker: {seen}')
+        if seen[-1:] != ['done'] or 'running' not in seen:
+            failures.append(f'unexpected status sequence {seen}')
+        if job and job['status'] == 'done':
+            if job['owner_id'] != 7 or job['status_code'] != 200:
+                failures.append(f'owner/status code not shared: {job}')
+            if job['result'] != {'detections': [{'label': '감성돔', 'bytes': 16}]}:
+                failures.append(f"result not shared: {job['result']}")
+
+        for bad_id in ('../../etc/passwd', 'f' * 32):
+            if polling.get(bad_id) is not None:
+                failures.append(f'{bad_id!r} was found')
+
+        time.sleep(1.1)
+        polling._maybe_sweep()
+        if polling.get(job_id) is not None or os.listdir(spool_dir):
+            failures.append(f'finished job was not swept: {os.listdir(spool_dir)}')
+        print(f"polling worker stats: {polling.stats()}")
+    finally:
+        done.set()
+        child.join(10)
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: a job accepted by one worker is polled to completion from another')
+
+
+if __name__ == '__main__':
+    main()
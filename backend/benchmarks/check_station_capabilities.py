@@ -0,0 +1,132 @@
+"""
+Migration and query check for the tide station capability bits.
+
+    cd backend
+    python -m benchmarks.check_station_capabilities
+
+Creates a throwaway SQLite database with the old TidalObservations table
+(no capabilities column) and stations whose obs_object strings cover every
+combination of 조위/수온/기온/기압/조수간만/없음, then runs update_schema()
+the way `flask init-db` does. It checks that the column was added and
+backfilled, that each station class selects exactly the stations the old
+LIKE filters did, and that the class query is planned on the index.
+Finally it empties and re-seeds the table behind the in-memory KD-tree
+index, the way a separate `flask init-db` would, and checks the index
+never keeps an empty class and picks up a changed table on its next check.
+Exits non-zero on a mismatch.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ITEMS = ['조위', '수온', '기온', '기압', '조수간만', '없음']
+
+# 이전 코드의 LIKE 조건
+LIKE_FILTERS = {
+    'obsrecent': lambda obs: all(item in obs for item in ('조위', '수온', '기온', '기압')),
+    'obspretab': lambda obs: '조수간만' in obs and '없음' not in obs,
+}
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='station-capabilities-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'stations.db')}"
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import inspect, text
+    import main as app_main
+    from services.tide_stations import STATION_CLASSES, masks_with
+
+    objects = [', '.join(combo) for size in range(len(ITEMS) + 1) for combo in itertools.combinations(ITEMS, size)]
+    with app_main.engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE "TidalObservations" (obs_station_id INTEGER PRIMARY KEY, obs_post_id VARCHAR(20) UNIQUE, '
+            'obs_post_name VARCHAR(50) NOT NULL, obs_lat FLOAT NOT NULL, obs_lon FLOAT NOT NULL, '
+            'data_type VARCHAR(50) NOT NULL, obs_object VARCHAR(255) NOT NULL, created_at DATETIME NOT NULL)'))
+        for i, obs_object in enumerate(objects):
+            connection.execute(text(
+                'INSERT INTO "TidalObservations" VALUES (:id, :post, :name, :lat, :lon, \'obs\', :obs, CURRENT_TIMESTAMP)'),
+                {'id': i + 1, 'post': f'DT_{i:04d}', 'name': f'관측소 {i}',
+                 'lat': 33 + i * 0.05, 'lon': 125 + i * 0.05, 'obs': obs_object})
+
+    app_main.update_schema()
+    failures = []
+    columns = {column['name'] for column in inspect(app_main.engine).get_columns('TidalObservations')}
+    if 'capabilities' not in columns:
+        failures.append('capabilities column was not added')
+
+    for name, required in STATION_CLASSES.items():
+        expected = {f'DT_{i:04d}' for i, obs in enumerate(objects) if LIKE_FILTERS[name](obs)}
+        got = {station['obs_post_id'] for station in app_main.load_tide_stations(required)}
+        print(f'{name:<10} stations={len(got):<3} expected={len(expected)}')
+        if got != expected:
+            failures.append(f'{name}: {sorted(got ^ expected)} differ from the LIKE filter')
+
+    with app_main.engine.connect() as connection:
+        masks = ','.join(map(str, masks_with(STATION_CLASSES['obsrecent'])))
+        plan = ' '.join(str(row[-1]) for row in connection.execute(text(
+            f'EXPLAIN QUERY PLAN SELECT * FROM "TidalObservations" WHERE capabilities IN ({masks})')))
+    print(f'plan: {plan}')
+    if 'ix_tidal_capabilities' not in plan:
+        failures.append('class query does not use ix_tidal_capabilities')
+
+    session = app_main.Session()
+    try:
+        if app_main.backfill_station_capabilities(session):
+            failures.append('second backfill found stale rows')
+    finally:
+        session.close()
+
+    failures.extend(check_index_refresh(app_main, text))
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print(f'OK: {len(objects)} stations backfilled; classes match the LIKE filters')
+
+
+def check_index_refresh(app_main, text):
+    failures = []
+    stations = app_main.tide_stations
+
+    def nearest_post(lat, lon):
+        match = stations.nearest('obsrecent', lat, lon)
+        return match[0]['obs_post_id'] if match else None
+
+    stations.check_interval = 3600
+    with app_main.engine.begin() as connection:
+        connection.execute(text('CREATE TABLE seed AS SELECT * FROM "TidalObservations"'))
+        connection.execute(text('DELETE FROM "TidalObservations"'))
+    if nearest_post(35.0, 129.0) is not None:
+        failures.append('empty table returned a station')
+
+    # 첫 요청 뒤에 다른 프로세스가 시드한 경우: 빈 분류는 캐시하지 않으므로 바로 반영
+    with app_main.engine.begin() as connection:
+        connection.execute(text('INSERT INTO "TidalObservations" SELECT * FROM seed'))
+    if nearest_post(35.0, 129.0) is None:
+        failures.append('stations seeded after the first request were not picked up')
+
+    with app_main.engine.begin() as connection:
+        connection.execute(text(
+            'INSERT INTO "TidalObservations" (obs_station_id, obs_post_id, obs_post_name, obs_lat, obs_lon, '
+            'data_type, obs_object, capabilities, created_at) VALUES (9999, \'DT_NEW\', \'새 관측소\', 37.0, 131.0, '
+            '\'obs\', \'조위, 수온, 기온, 기압\', 15, CURRENT_TIMESTAMP)'))
+    if nearest_post(37.0, 131.0) == 'DT_NEW':
+        failures.append('index was rebuilt before the check interval passed')
+    builds = stations.stats()['builds']
+    stations.check_interval = 0
+    if nearest_post(37.0, 131.0) != 'DT_NEW':
+        failures.append('re-seeded station was not picked up after the check interval')
+    nearest_post(37.0, 131.0)
+    if stations.stats()['builds'] != builds + 1:
+        failures.append('index was rebuilt although the fingerprint did not change')
+    print(f'index refresh: {stations.stats()}')
+    return failures
+
+
+if __name__ == '__main__':
+    main()
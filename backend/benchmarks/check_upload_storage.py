@@ -0,0 +1,134 @@
+"""
+Safety check for content-addressed upload storage.
+
+    cd backend
+    python -m benchmarks.check_upload_storage
+
+Uses a throwaway SQLite database and upload folder. Checks that
+POST /catches refuses image URLs the caller has not uploaded, that
+deleting a catch never removes a legacy (pre-storage) file another row
+still uses, that a rolled back upload does not delete a file another open
+transaction has just deduplicated against, that a commit puts back a file
+deleted under it by another worker, and that detections are only returned
+for the caller's own catches. Exits non-zero on a failure.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='upload-storage-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'uploads.db')}"
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import jwt
+    import main as app_main
+
+    app_main.Base.metadata.create_all(app_main.engine)
+    storage = app_main.upload_storage
+    storage.root = os.path.join(tmp_dir, 'uploads')
+    os.makedirs(storage.root)
+    failures = []
+
+    def headers(user_id):
+        token = jwt.encode({'user_id': user_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                           app_main.SECRET_KEY, algorithm='HS256')
+        return {'Authorization': f'Bearer {token}'}
+
+    def exists(key):
+        return os.path.exists(storage.path(key))
+
+    session = app_main.Session()
+    victim = app_main.User(username='victim', password_hash='x', email='victim@example.com',
+                           avatar='/uploads/victim.jpg')
+    attacker = app_main.User(username='attacker', password_hash='x', email='attacker@example.com')
+    session.add_all([victim, attacker])
+    session.commit()
+    victim_id, attacker_id = victim.user_id, attacker.user_id
+    with open(storage.path('victim.jpg'), 'wb') as f:
+        f.write(b'legacy avatar')
+    victim_key = storage.put(session, b'victim photo')
+    session.add(app_main.Catch(user_id=victim_id, photo_url=victim_key, exif_data=[{'label': 'secret'}],
+                               catch_date=datetime.utcnow()))
+    session.commit()
+    session.close()
+    client = app_main.app.test_client()
+
+    # 남의 업로드를 가리키는 기록 생성은 거부
+    for url in ('/uploads/victim.jpg', victim_key, f'/uploads/{victim_key}', 'https://example.com/x.jpg'):
+        response = client.post('/catches', headers=headers(attacker_id),
+                               json={'imageUrl': url, 'catch_date': '2024-01-01'})
+        if response.status_code != 400:
+            failures.append(f'POST /catches accepted {url} from another user ({response.status_code})')
+    response = client.post('/catches', headers=headers(victim_id),
+                           json={'imageUrl': victim_key, 'catch_date': '2024-01-01'})
+    if response.status_code != 200:
+        failures.append(f'POST /catches refused the owner\'s upload: {response.get_json()}')
+
+    # 이전 방식 경로를 가진 기록을 지워도 다른 행이 쓰는 파일은 남는다
+    session = app_main.Session()
+    legacy = app_main.Catch(user_id=attacker_id, photo_url='victim.jpg', catch_date=datetime.utcnow())
+    own = app_main.Catch(user_id=attacker_id, photo_url='own.jpg', catch_date=datetime.utcnow())
+    session.add_all([legacy, own])
+    session.commit()
+    legacy_id, own_id = legacy.catch_id, own.catch_id
+    session.close()
+    with open(storage.path('own.jpg'), 'wb') as f:
+        f.write(b'own legacy photo')
+    client.delete(f'/catches/{legacy_id}', headers=headers(attacker_id))
+    if not exists('victim.jpg'):
+        failures.append('deleting a catch removed a legacy file still used as an avatar')
+    client.delete(f'/catches/{own_id}', headers=headers(attacker_id))
+    if exists('own.jpg'):
+        failures.append('unreferenced legacy file was not removed')
+
+    # 같은 내용을 두 트랜잭션이 저장하다 먼저 쓴 쪽이 롤백
+    # (SQLite는 쓰기 트랜잭션이 하나뿐이라, 서로의 행이 보이지 않는 별도 DB 파일로 동시 트랜잭션을 흉내 낸다)
+    from sqlalchemy import create_engine
+    other_engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'other.db')}")
+    app_main.Base.metadata.create_all(other_engine)
+    first, second = app_main.Session.session_factory(), app_main.Session.session_factory(bind=other_engine)
+    key = storage.put(first, b'same bytes')
+    storage.put(second, b'same bytes')
+    first.rollback()
+    first.close()
+    if not exists(key):
+        failures.append('rollback deleted a file another open transaction deduplicated against')
+    second.commit()
+    second.close()
+    if not exists(key):
+        failures.append('committed upload has no file')
+
+    # 다른 워커가 커밋 직전에 파일을 지운 경우 커밋 후 복구
+    session = app_main.Session.session_factory()
+    key = storage.put(session, b'restored bytes')
+    os.remove(storage.path(key))
+    session.commit()
+    session.close()
+    if not exists(key):
+        failures.append('commit did not restore a file removed by another worker')
+
+    # 감지 결과는 본인 기록에서만
+    response = client.get('/backend/get-detections', headers=headers(attacker_id), query_string={'imageUrl': victim_key})
+    if response.status_code != 404:
+        failures.append(f'get-detections returned another user\'s catch ({response.status_code})')
+    response = client.get('/backend/get-detections', headers=headers(victim_id), query_string={'imageUrl': victim_key})
+    if response.status_code != 200:
+        failures.append(f'get-detections did not return the owner\'s catch ({response.status_code})')
+
+    if storage._pending:
+        failures.append(f'references left pending: {dict(storage._pending)}')
+    print(f"stats: {storage.stats()}")
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: uploads are only deleted when nothing references them')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Check the grid-cell OpenWeather cache against a local stand-in server.
+
+    cd backend
+    python -m benchmarks.check_weather_cache [--cache redis://127.0.0.1:6379/0]
+
+Starts an HTTP server on 127.0.0.1 that answers like the OpenWeather
+current weather API (after an artificial delay) and counts the calls,
+points OPENWEATHER_API_BASE_URL at it and looks up random points along
+the coast. Checks that each WEATHER_CELL_DEG cell is fetched once, at its
+centre, and that nearby and repeated lookups are answered from the cache.
+With a shared backend (--cache redis://...) a second cache instance, as
+another worker would have, must also be served without upstream calls.
+The cache is cleared first, so point --cache at a scratch Redis database.
+Exits non-zero on a mismatch.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StandIn(BaseHTTPRequestHandler):
+    calls = []
+    delay = 0.05
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        lat, lon = float(query['lat'][0]), float(query['lon'][0])
+        with self.lock:
+            self.calls.append((lat, lon))
+        time.sleep(self.delay)
+        body = {
+            'main': {'temp': round(lat, 3), 'temp_min': 10, 'temp_max': 20, 'humidity': 60, 'pressure': 1013},
+            'wind': {'speed': 3.2, 'deg': 200},
+            'weather': [{'description': f'{lat:.4f},{lon:.4f}'}],
+            'sys': {'sunrise': 1, 'sunset': 2},
+        }
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--cache', default='memory', help="WEATHER_CACHE: 'memory' or a redis:// URL")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['OPENWEATHER_API_BASE_URL'] = f'http://127.0.0.1:{server.server_port}/data/2.5/weather'
+    os.environ['WEATHER_CACHE'] = args.cache
+    sys.path.insert(0, BACKEND_DIR)
+    from services import weather_service
+    from services.response_cache import ResponseCache, make_backend
+
+    weather_service.weather_cache.clear()
+    cell = weather_service.WEATHER_CELL_DEG
+    rng = random.Random(0)
+    # 항구 몇 곳 주변(약 1km 이내)에 몰린 조회
+    harbours = [(35.10, 129.04), (34.74, 127.74), (37.46, 126.60), (33.51, 126.52), (36.03, 129.38)]
+    points = [(lat + rng.uniform(-0.01, 0.01), lon + rng.uniform(-0.01, 0.01))
+              for lat, lon in (rng.choice(harbours) for _ in range(args.lookups))]
+    failures = []
+
+    started = time.perf_counter()
+    results = [weather_service.get_weather_by_coordinates(lat, lon) for lat, lon in points]
+    elapsed = time.perf_counter() - started
+    cells = {weather_service.weather_cell(lat, lon) for lat, lon in points}
+    print(f"lookups={len(points)} cells={len(cells)} upstream calls={len(StandIn.calls)} "
+          f"{elapsed / len(points) * 1000:.2f}ms/lookup (upstream delay {StandIn.delay * 1000:.0f}ms)")
+    if len(StandIn.calls) != len(cells):
+        failures.append(f'{len(StandIn.calls)} upstream calls for {len(cells)} cells')
+    for lat, lon in StandIn.calls:
+        row, col = weather_service.weather_cell(lat, lon)
+        centre = ((row + 0.5) * cell, (col + 0.5) * cell)
+        if abs(lat - centre[0]) > 1e-6 or abs(lon - centre[1]) > 1e-6:
+            failures.append(f'upstream was asked for ({lat}, {lon}), not the cell centre {centre}')
+    for (lat, lon), result in zip(points, results):
+        row, col = weather_service.weather_cell(lat, lon)
+        if result['weather']['temp'] != round((row + 0.5) * cell, 3):
+            failures.append(f'({lat}, {lon}) got the weather of another cell')
+            break
+
+    if args.cache != 'memory':
+        # 다른 워커: 같은 저장소를 쓰는 새 캐시 인스턴스
+        weather_service.weather_cache = ResponseCache(make_backend(args.cache), ttl=weather_service.weather_cache.ttl)
+        before = len(StandIn.calls)
+        for lat, lon in points[:50]:
+            weather_service.get_weather_by_coordinates(lat, lon)
+        if len(StandIn.calls) != before:
+            failures.append(f'another worker made {len(StandIn.calls) - before} upstream calls')
+
+    print(f"stats: {weather_service.weather_cache_stats()}")
+    server.shutdown()
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+    print('OK: one upstream call per grid cell')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,22 @@
 import os
+import glob
 import logging
 from datetime import datetime, timedelta
 import uuid
-from werkzeug.utils import secure_filename
+from collections import Counter
 import base64
 
+# 시작 시간은 표준 라이브러리 다음, 무거운 패키지 import 전부터 측정
+from services.startup import StartupReport, LazyDetector
+startup_report = StartupReport()
+
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_from_directory
-from PIL import Image
+from flask import Flask, request, jsonify, send_from_directory, send_file, redirect, Response
 from functools import wraps
 import jwt
-import torch
+import click
 import io
+import queue
 import requests
 
 from sqlalchemy import (
@@ -30,22 +35,49 @@ from sqlalchemy import (
     Float,
     VARCHAR,
     text,
-    func
+    func,
+    Index,
+    inspect,
+    select,
+    cast
 )
 from sqlalchemy.orm import relationship, sessionmaker, scoped_session, declarative_base
+from sqlalchemy.schema import CreateColumn
 from werkzeug.security import generate_password_hash, check_password_hash
-from services.weather_service import get_sea_weather_by_seapostid, get_weather_by_coordinates
+from services.weather_service import get_sea_weather_by_seapostid, get_weather_by_coordinates, khoa_cache, weather_cache_stats
+from services.http_client import http
 from services.lunar_mulddae import get_mulddae_cycle, calculate_moon_phase
 from services.initialize_db import initialize_service
 from services.openai_assistant import assistant_talk_request, assistant_talk_get
-from ultralytics import YOLO
+from services.batch_scheduler import BatchScheduler
+from services.inference_backend import load_backend, resolve_model_path
+from services.inference_pool import InferencePool
+from services.detection_cache import DetectionCache, make_cache_key
+from services.image_pipeline import prepare_image, MODEL_INPUT_SIZE
+from services.prediction_jobs import PredictionJobQueue
+from services.temp_images import TemporaryImageStore
+from services.image_variants import VariantBuilder, build_variants, parse_variant_path, remove_variants, upload_key, variant_urls
+from services.upload_storage import UploadStorage, is_object_key
+from services.pagination import CachedCount, keyset_page, slice_page
+from services.leaderboard import Leaderboard
+from services.response_cache import ResponseCache, make_backend
+from services.spot_clusters import cell_size, clamp_level, parse_bbox, snap_bbox
+from services.static_snapshot import SnapshotStore
+from services.tide_stations import TideStationIndex, masks_with, parse_capabilities
+from services.detections import CONF_SCORE, build_detections, detection_failed_body
 from flask_cors import CORS
+startup_report.mark('imports')
 
 # Ensure the 'uploads' directory exists
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# 만료되는 임시 이미지와 작업 스풀은 /uploads 로 공개되지 않도록 업로드 폴더 밖에 둔다
+PRIVATE_DATA_DIR = os.getenv('PRIVATE_DATA_DIR', 'private')
+# 이전 버전이 업로드 폴더 안에 만들던 비공개 폴더 (남은 파일도 /uploads 로 내보내지 않음)
+PRIVATE_UPLOAD_SUBDIRS = ('tmp', 'jobs')
+
 # Define allowed extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
@@ -196,12 +228,22 @@ class CommunicationBoard(Base):
     images = Column(JSON, default=list)  # Store multiple image URLs as JSON array
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 좋아요/댓글 수 (좋아요/댓글과 같은 트랜잭션에서 갱신, flask repair-post-counts로 재계산)
+    likes_count = Column(Integer, nullable=False, default=0, server_default='0')
+    comments_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     user = relationship('User', back_populates='posts')
     likes = relationship('PostLike', back_populates='post', cascade='all, delete')
     comments = relationship('PostComment', back_populates='post', cascade='all, delete')
     retweets = relationship('PostRetweet', back_populates='post', cascade='all, delete')
 
+    __table_args__ = (
+        # 피드 커서 페이지네이션 (created_at, post_id)
+        Index('ix_board_created_post', 'created_at', 'post_id'),
+        # 인기 게시글 (likes_count, created_at)
+        Index('ix_board_likes_created', 'likes_count', 'created_at'),
+    )
+
 
 class PostLike(Base):
     __tablename__ = 'PostLikes'
@@ -228,6 +270,9 @@ class PostComment(Base):
     post = relationship('CommunicationBoard', back_populates='comments')
     user = relationship('User')
 
+    # 댓글 커서 페이지네이션 (post_id별 created_at, comment_id)
+    __table_args__ = (Index('ix_comments_post_created', 'post_id', 'created_at', 'comment_id'),)
+
 
 class PostRetweet(Base):
     __tablename__ = 'PostRetweets'
@@ -301,8 +346,13 @@ class TidalObservation(Base):
     obs_lon = Column(Float, nullable=False)
     data_type = Column(String(50), nullable=False)
     obs_object = Column(String(255), nullable=False)
+    # obs_object를 시드할 때 해석한 관측 항목 비트 (services/tide_stations.py 참고)
+    capabilities = Column(Integer, nullable=False, default=0, server_default='0')
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
+    # 관측 항목으로 관측소 분류 (capabilities IN (...) 동등 비교)
+    __table_args__ = (Index('ix_tidal_capabilities', 'capabilities'),)
+
 
 # 낚시터 db 컬럼
 class FishingPlace(Base):
@@ -321,8 +371,22 @@ class FishingPlace(Base):
     safety_facilities = Column(Text, nullable=True)  # 안전 시설 현황
     convenience_facilities = Column(Text, nullable=True)  # 편익 시설 현황
 
-# 데이터베이스 테이블 생성
-Base.metadata.create_all(engine)
+    # 지도 화면 영역(bbox) 조회
+    __table_args__ = (Index('ix_fishing_place_lat_lng', 'latitude', 'longitude'),)
+
+class UploadObject(Base):
+    __tablename__ = 'UploadObjects'
+
+    object_key = Column(String(255), primary_key=True)  # ab/cd/<sha256>.<ext> (uploads/ 기준 경로)
+    refcount = Column(Integer, nullable=False, default=0)  # 이 파일을 참조하는 행 수
+    size_bytes = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+startup_report.mark('database models')
+
+# 스키마 생성/초기 데이터 입력은 `flask --app main init-db`로 분리
+# (INIT_DB_ON_STARTUP=1이면 예전처럼 import 시점에 수행)
+INIT_DB_ON_STARTUP = os.getenv('INIT_DB_ON_STARTUP', '0') == '1'
 
 baseUrl = os.getenv('BASE_URL')
 
@@ -334,71 +398,320 @@ CORS(app, resources={r"/*": {
     "allow_headers": ["Content-Type", "Authorization"]
 }}, supports_credentials=True)
 
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-model = YOLO(f'./models/{os.getenv("MODEL_NAME")}').to(device)
+MODEL_NAME = os.getenv("MODEL_NAME")
+MODEL_PATH = f'./models/{MODEL_NAME}'
+WARMUP_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'warmup.jpg')
+
+# 추론 마이크로 배칭 설정 (동시 요청을 모아 한 번에 forward)
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', '8'))
+INFERENCE_BATCH_WAIT_MS = float(os.getenv('INFERENCE_BATCH_WAIT_MS', '10'))
+# 0이면 Flask 프로세스 안에서 추론, 1 이상이면 별도 추론 프로세스 풀 사용
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '0'))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', '60'))
+# 추론 백엔드: torch(기본) / onnx / openvino, INT8 양자화는 보정 이미지 폴더가 필요
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+INFERENCE_INT8 = os.getenv('INFERENCE_INT8', '0') == '1'
+INFERENCE_CALIB_DIR = os.getenv('INFERENCE_CALIB_DIR')
+# 백엔드/양자화에 따라 결과가 달라지므로 캐시 키에 포함
+MODEL_ID = f'{MODEL_NAME}:{INFERENCE_BACKEND}{":int8" if INFERENCE_INT8 else ""}'
+
+def build_detector():
+    # 필요하면 한 번만 export (워커들이 동시에 export하지 않도록 여기서 처리)
+    backend_model_path = resolve_model_path(
+        MODEL_PATH,
+        backend=INFERENCE_BACKEND,
+        int8=INFERENCE_INT8,
+        calib_dir=INFERENCE_CALIB_DIR,
+        input_size=MODEL_INPUT_SIZE,
+    )
+
+    if INFERENCE_WORKERS > 0:
+        # 워커 프로세스마다 모델을 따로 올리므로 Flask 프로세스에서는 로드하지 않는다
+        return InferencePool(
+            backend_model_path,
+            num_workers=INFERENCE_WORKERS,
+            max_batch_size=INFERENCE_BATCH_SIZE,
+            max_wait_ms=INFERENCE_BATCH_WAIT_MS,
+            backend=INFERENCE_BACKEND,
+        )
+
+    model = load_backend(backend_model_path, backend=INFERENCE_BACKEND)
+    return BatchScheduler(
+        model.predict_batch,
+        max_batch_size=INFERENCE_BATCH_SIZE,
+        max_wait_ms=INFERENCE_BATCH_WAIT_MS,
+    )
+
+def warmup_detector(detector):
+    # 첫 요청이 모델 초기화 비용을 떠안지 않도록 번들 이미지로 한 번 추론
+    detector.predict(prepare_image(WARMUP_IMAGE).tensor, timeout=INFERENCE_TIMEOUT)
+
+# 모델은 서버 시작(또는 첫 /backend/ready, 첫 추론) 때 백그라운드에서 로드되며 준비 상태는 /backend/ready 로 확인
+# import만 하는 CLI 명령(init-db 등)과 점검 스크립트는 모델을 올리지 않는다
+detector = LazyDetector(build_detector, warmup=warmup_detector, report=startup_report)
+
+# 동일 이미지 재업로드 시 추론을 건너뛰기 위한 감지 결과 캐시
+detection_cache = DetectionCache(
+    max_entries=int(os.getenv('DETECTION_CACHE_SIZE', '1024')),
+    disk_dir=os.getenv('DETECTION_CACHE_DIR') or None,
+    max_disk_bytes=int(os.getenv('DETECTION_CACHE_DISK_MB', '256')) * 1024 * 1024,
+)
 
 # 초시 헤더를 한 after_request 데코레이터를 앱 초기화 직후에 추가
 @app.after_request
 def add_header(response):
-    if request.path.startswith('/uploads/'):
+    if request.path.startswith('/uploads/') and response.status_code == 200:
         response.cache_control.max_age = 31536000  # 1년
         response.cache_control.public = True
     return response
 
+startup_report.mark('app setup')
+
+@app.cli.command('build-variants')
+def build_variants_command():
+    """Create missing image variants for every upload referenced in the database."""
+    session = Session()
+    try:
+        urls = [url for (url,) in session.query(Catch.photo_url).filter(Catch.photo_url.isnot(None))]
+        urls += [url for (url,) in session.query(User.avatar).filter(User.avatar.isnot(None))]
+        for (images,) in session.query(CommunicationBoard.images):
+            urls += images or []
+    finally:
+        session.close()
+
+    keys = sorted({key for key in map(upload_key, urls) if key})
+    built = failed = 0
+    for key in keys:
+        try:
+            built += 1 if build_variants(UPLOAD_FOLDER, key) else 0
+        except Exception as e:
+            failed += 1
+            print(f"Skipping {key}: {e}")
+    print(f"Checked {len(keys)} uploads, built variants for {built}, failed {failed}")
+
+@app.cli.command('migrate-uploads')
+@click.option('--dry-run', is_flag=True, help='report what would change without writing anything')
+@click.option('--keep-originals', is_flag=True, help='leave the old flat files in place after migrating')
+@click.option('--batch-size', default=200, show_default=True, help='rows committed per transaction')
+def migrate_uploads_command(dry_run, keep_originals, batch_size):
+    """Move existing uploads into content-addressed storage and rewrite photo_url, images and avatar."""
+    migrated = {}  # 기존 경로 -> 새 key
+    missing = set()
+    session = Session()
+
+    def migrate(url):
+        key = upload_key(url)
+        if not key or is_object_key(key):
+            return url
+        path = os.path.join(UPLOAD_FOLDER, key)
+        if not os.path.exists(path):
+            missing.add(key)
+            return url
+        ext = os.path.splitext(key)[1] or '.jpg'
+        with open(path, 'rb') as f:
+            data = f.read()
+        new_key = upload_storage.make_key(data, ext) if dry_run else upload_storage.put(session, data, ext)
+        migrated[key] = new_key
+        # 원래 저장 형식 유지: 'abc.jpg' -> 'ab/cd/...jpg', '/uploads/abc.jpg' -> '/uploads/ab/cd/...jpg'
+        return upload_storage.url(new_key) if url.startswith('/uploads/') else new_key
+
+    def rewrite(model, pk, criteria, apply):
+        # 기본 키를 먼저 읽고 batch_size 단위로 나눠 처리/커밋
+        ids = [row_id for (row_id,) in session.query(pk).filter(*criteria).order_by(pk)]
+        changed = 0
+        for start in range(0, len(ids), batch_size):
+            for row in session.query(model).filter(pk.in_(ids[start:start + batch_size])):
+                changed += apply(row)
+            if not dry_run:
+                session.commit()
+        return changed
+
+    def migrate_catch(catch):
+        new_url = migrate(catch.photo_url)
+        if new_url == catch.photo_url:
+            return 0
+        if not dry_run:
+            catch.photo_url = new_url
+        return 1
+
+    def migrate_user(user):
+        new_url = migrate(user.avatar)
+        if new_url == user.avatar:
+            return 0
+        if not dry_run:
+            user.avatar = new_url
+        return 1
+
+    def migrate_post(post):
+        images = post.images or []
+        new_images = [migrate(url) for url in images]
+        if new_images == images:
+            return 0
+        if not dry_run:
+            post.images = new_images  # JSON 컬럼 변경 감지를 위해 새 리스트로 교체
+        return 1
+
+    try:
+        catches = rewrite(Catch, Catch.catch_id, [Catch.photo_url.isnot(None)], migrate_catch)
+        users = rewrite(User, User.user_id, [User.avatar.isnot(None)], migrate_user)
+        posts = rewrite(CommunicationBoard, CommunicationBoard.post_id, [], migrate_post)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    print(f"{'Would rewrite' if dry_run else 'Rewrote'} {catches} catches, {users} avatars, {posts} posts; "
+          f"{len(migrated)} files -> {len(set(migrated.values()))} stored objects")
+    if missing:
+        print(f"{len(missing)} referenced files were missing and left unchanged: {', '.join(sorted(missing)[:10])}")
+
+    if dry_run or keep_originals:
+        return
+    # 모든 참조를 옮긴 뒤 기존 파일과 변환본 정리
+    for key in migrated:
+        try:
+            os.remove(os.path.join(UPLOAD_FOLDER, key))
+        except OSError:
+            pass
+        remove_variants(UPLOAD_FOLDER, key)
+    print("Removed the old files; run 'flask build-variants' to create variants for the migrated uploads")
+
+def create_missing_columns():
+    """Add model columns that existing tables do not have yet. Returns [(table, column)]."""
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}'))
+                added.append((table.name, column.name))
+    return added
+
+def create_missing_indexes():
+    # create_all()은 이미 있는 테이블에 새 인덱스를 추가하지 않으므로 따로 생성
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+def update_schema():
+    Base.metadata.create_all(engine)
+    added = create_missing_columns()
+    create_missing_indexes()
+    if any(table == CommunicationBoard.__tablename__ for table, _ in added):
+        # 새로 추가된 카운터 컬럼은 0으로 시작하므로 바로 채운다
+        session = Session()
+        try:
+            repair_post_counts(session)
+        finally:
+            session.close()
+    if any(table == TidalObservation.__tablename__ for table, _ in added):
+        # 기존 관측소의 capabilities는 0이므로 obs_object에서 채운다
+        session = Session()
+        try:
+            backfill_station_capabilities(session)
+        finally:
+            session.close()
+
+def backfill_station_capabilities(session):
+    """
+    Parse obs_object into TidalObservation.capabilities for every station
+    whose stored bits differ. Returns the number of stations updated.
+    """
+    stale = {}
+    for station_id, obs_object, capabilities in session.query(
+            TidalObservation.obs_station_id, TidalObservation.obs_object, TidalObservation.capabilities):
+        parsed = parse_capabilities(obs_object)
+        if parsed != capabilities:
+            stale.setdefault(parsed, []).append(station_id)
+    for capabilities, station_ids in stale.items():
+        session.query(TidalObservation).filter(TidalObservation.obs_station_id.in_(station_ids))\
+            .update({TidalObservation.capabilities: capabilities}, synchronize_session=False)
+    session.commit()
+    return sum(len(station_ids) for station_ids in stale.values())
+
+def repair_post_counts(session, batch_size=500):
+    """
+    Recompute CommunicationBoard.likes_count/comments_count from PostLikes and
+    PostComments for every post whose stored counters drifted. Returns the
+    number of posts fixed.
+    """
+    likes = select(func.count(PostLike.like_id))\
+        .where(PostLike.post_id == CommunicationBoard.post_id)\
+        .scalar_subquery()
+    comments = select(func.count(PostComment.comment_id))\
+        .where(PostComment.post_id == CommunicationBoard.post_id)\
+        .scalar_subquery()
+    drifted = [post_id for (post_id,) in session.query(CommunicationBoard.post_id)
+               .filter((CommunicationBoard.likes_count != likes) | (CommunicationBoard.comments_count != comments))
+               .order_by(CommunicationBoard.post_id)]
+    for start in range(0, len(drifted), batch_size):
+        session.query(CommunicationBoard)\
+            .filter(CommunicationBoard.post_id.in_(drifted[start:start + batch_size]))\
+            .update({CommunicationBoard.likes_count: likes, CommunicationBoard.comments_count: comments},
+                    synchronize_session=False)
+        session.commit()
+    return len(drifted)
+
+def adjust_post_counts(session, post_id, likes=0, comments=0):
+    """Add to a post's counters with an atomic UPDATE in the caller's transaction"""
+    values = {}
+    if likes:
+        values[CommunicationBoard.likes_count] = CommunicationBoard.likes_count + likes
+    if comments:
+        values[CommunicationBoard.comments_count] = CommunicationBoard.comments_count + comments
+    if values:
+        session.query(CommunicationBoard).filter(CommunicationBoard.post_id == post_id)\
+            .update(values, synchronize_session=False)
+
+@app.cli.command('repair-post-counts')
+def repair_post_counts_command():
+    """Recompute the denormalized like/comment counters of every post."""
+    session = Session()
+    try:
+        fixed = repair_post_counts(session)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    print(f"Repaired the counters of {fixed} posts")
+
+@app.cli.command('backfill-station-capabilities')
+def backfill_station_capabilities_command():
+    """Re-parse obs_object into the capability bits of every tide station."""
+    session = Session()
+    try:
+        updated = backfill_station_capabilities(session)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    print(f"Updated the capabilities of {updated} tide stations")
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the tables and seed tide stations / fishing places."""
+    with startup_report.phase('create tables'):
+        update_schema()
+    with startup_report.phase('seed data'):
+        initialize_service()
+    startup_report.log()
+
 # 초기 DB install
-initialize_service()
-
-# 라벨 매핑 (영어 -> 한국어)
-labels_korean = {
- 0: '감성돔',
- 1: '대구',
- 2: '꽃게',
- 3: '갈치',
- 4: '말쥐치',
- 5: '넙치',
- 6: '조피볼락',
- 7: '삼치',
- 8: '문치가자미',
- 9: '참문어',
- 10: '돌돔',
- 11: '참돔',
- 12: '낙지',
- 13: '대게',
- 14: '살오징어',
- 15: '옥돔',
- 16: '주꾸미'
-}
-
-# Add this dictionary at the top of your file
-PROHIBITED_DATES = {
-    "넙치": "",
-    "조피볼락": "",
-    "참돔": "",
-    "감성돔": "05.01~05.31",
-    "돌돔": "",
-    "명태": "01.01~12.31",
-    "대구": "01.16~02.15",
-    "살오징어": "04.01~05.31",
-    "고등어": "04.01~06.30",
-    "삼치": "05.01~05.31",
-    "참문어": "05.16~06.30",
-    "전어": "05.01~07.15",
-    "말쥐치": "05.01~07.31",
-    "주꾸미": "05.11~08.31",
-    "낙지": "06.01~06.30",
-    "참홍어": "06.01~07.15",
-    "꽃게": "06.21~08.20",
-    "대게": "06.01~11.30",
-    "갈치": "07.01~07.31",
-    "참조기": "07.01~07.31",
-    "붉은대게": "07.10~08.25",
-    "옥돔": "07.21~08.20",
-    "연어": "10.01~11.30",
-    "쥐노래미": "11.01~12.31",
-    "문치가자미": "12.01~01.31"
-}
-
-CONF_SCORE = 0.5
+if INIT_DB_ON_STARTUP:
+    update_schema()
+    startup_report.mark('create tables')
+    initialize_service()
+    startup_report.mark('seed data')
 
 # REST API
 @app.route('/')
@@ -529,172 +842,457 @@ def login():
     finally:
         session.close()
 
-# 이미지 최적화 함수 추가
-def optimize_image(image, max_size=1024):
-    """Optimize image size and quality for mobile"""
-    if max(image.size) > max_size:
-        ratio = max_size / max(image.size)
-        new_size = tuple(int(dim * ratio) for dim in image.size)
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
-    
-    # Convert to RGB if necessary
-    if image.mode in ('RGBA', 'P'):
-        image = image.convert('RGB')
-    
-    # Optimize
-    buffer = io.BytesIO()
-    image.save(buffer, format='JPEG', quality=85, optimize=True)
-    buffer.seek(0)
-    return buffer
+# 업로드 이미지의 썸네일/피드/원본 크기 WebP·JPEG 변환본은 백그라운드에서 생성
+variant_builder = VariantBuilder(UPLOAD_FOLDER, num_workers=int(os.getenv('IMAGE_VARIANT_WORKERS', '2')))
+
+def upload_url_forms(key):
+    # Catch.photo_url은 key 그대로, 게시물 이미지/아바타는 '/uploads/<key>'로 저장
+    return [key, f'/uploads/{key}']
+
+def legacy_upload_referenced(connection, key):
+    """Whether any catch, avatar or post still points at a pre-storage upload."""
+    urls = upload_url_forms(key)
+    queries = [
+        select(Catch.catch_id).where(Catch.photo_url.in_(urls)),
+        select(User.user_id).where(User.avatar.in_(urls)),
+        select(CommunicationBoard.post_id).where(cast(CommunicationBoard.images, Text).contains(key, autoescape=True)),
+    ]
+    return any(connection.execute(query.limit(1)).first() is not None for query in queries)
+
+def user_owns_upload(session, user_id, key):
+    """Whether one of the user's catches, posts or their avatar already uses a stored upload."""
+    urls = upload_url_forms(key)
+    if session.query(Catch.catch_id).filter(Catch.user_id == user_id, Catch.photo_url.in_(urls)).first():
+        return True
+    if session.query(User.user_id).filter(User.user_id == user_id, User.avatar.in_(urls)).first():
+        return True
+    return session.query(CommunicationBoard.post_id).filter(
+        CommunicationBoard.user_id == user_id,
+        cast(CommunicationBoard.images, Text).contains(key, autoescape=True),
+    ).first() is not None
+
+# 모든 업로드 파일은 내용 해시 기반 저장소를 통해 저장/삭제 (같은 파일은 한 번만 저장)
+upload_storage = UploadStorage(UPLOAD_FOLDER, UploadObject, Session.session_factory, legacy_upload_referenced)
+
+def store_upload(session, data, ext='jpg'):
+    """Store an upload in the session's transaction and queue its variants. Returns the storage key"""
+    key = upload_storage.put(session, data, ext)
+    variant_builder.schedule(key)
+    return key
+
+def upload_extension(filename):
+    return filename.rsplit('.', 1)[1].lower()
+
+# 업로드 이미지 저장 (JPEG 인코딩은 실제로 저장할 때 한 번만 수행)
+def save_prepared_image(session, prepared):
+    return store_upload(session, prepared.to_jpeg(), 'jpg')
+
+# 비로그인 예측 결과 이미지는 디스크에 잠시 보관하고 URL로 전달
+temp_images = TemporaryImageStore(
+    os.path.join(PRIVATE_DATA_DIR, 'predict-images'),
+    ttl=int(os.getenv('PREDICT_TEMP_IMAGE_TTL', '300')),
+)
+
+# 비로그인 응답 이미지 전달 방식
+#   url: 임시 이미지 URL (기본), multipart: multipart/mixed 응답의 바이너리 파트,
+#   base64: 기존 JSON image_base64 (image_base64로 요청한 구버전 클라이언트 기본값)
+IMAGE_TRANSPORTS = ('url', 'multipart', 'base64')
+RAW_IMAGE_TYPES = {'image/jpeg', 'image/png', 'application/octet-stream'}
+
+def predict_image_transport():
+    requested = request.args.get('image')
+    if requested in IMAGE_TRANSPORTS:
+        return requested
+    if request.accept_mimetypes.best_match(['application/json', 'multipart/mixed']) == 'multipart/mixed':
+        return 'multipart'
+    return 'base64' if request.is_json else 'url'
+
+def anonymous_image_fields(prepared, transport):
+    """Response fields carrying the result image for users that are not logged in"""
+    jpeg = prepared.to_jpeg()
+    if transport == 'base64':
+        return {'image_base64': base64.b64encode(jpeg).decode()}
+    if transport == 'multipart':
+        # predict()가 꺼내서 바이너리 파트로 보낸다
+        return {'image_jpeg': jpeg}
+    token = temp_images.put(jpeg)
+    return {
+        'temp_image_url': f'/backend/predict/images/{token}',
+        'temp_image_expires_in': temp_images.ttl,
+    }
+
+def multipart_response(body, image_jpeg, status=200):
+    # JSON 파트 + image/jpeg 파트 (base64 없이 원본 바이트 그대로 전송)
+    boundary = uuid.uuid4().hex
+    json_part = jsonify(body).get_data()
+    payload = b''.join([
+        f'--{boundary}\r\nContent-Type: application/json\r\n'
+        f'Content-Disposition: inline; name="result"\r\n\r\n'.encode(),
+        json_part,
+        f'\r\n--{boundary}\r\nContent-Type: image/jpeg\r\n'
+        f'Content-Disposition: inline; name="image"; filename="result.jpg"\r\n'
+        f'Content-Length: {len(image_jpeg)}\r\n\r\n'.encode(),
+        image_jpeg,
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ])
+    return Response(payload, status=status, mimetype=f'multipart/mixed; boundary={boundary}')
+
+# predict 요청에서 업로드 이미지 읽기 (multipart 파일, raw 바이너리 본문 또는 JSON base64)
+def read_predict_upload():
+    """Return (file-like source, None) or (None, (error body, status))"""
+    if request.mimetype in RAW_IMAGE_TYPES:
+        # Content-Type: image/jpeg 등으로 파일 바이트를 본문에 그대로 보낸 경우
+        data = request.get_data(cache=False)
+        if not data:
+            return None, ({
+                'error': 'invalid_file_name',
+                'message': '파일이 선택되지 않았습니다.'
+            }, 400)
+        return io.BytesIO(data), None
+
+    if 'image' in request.files:
+        file = request.files['image']
+        # 파일 이름이 비어있는지 먼저 확인
+        if file.filename == '':
+            return None, ({
+                'error': 'invalid_file_name',
+                'message': '파일이 선택되지 않았습니다.'
+            }, 400)
+
+        # 파일 타입 검증
+        if not allowed_file(file.filename):
+            return None, ({
+                'error': 'invalid_file_type',
+                'message': '지원하지 않는 파일 형식입니다.'
+            }, 400)
+        return file.stream, None
 
-# predict 라트 수정
-@app.route('/backend/predict', methods=['POST'])
-def predict():
     try:
-        if 'image' in request.files:
-            file = request.files['image']
-            # 파일 이름이 비어있는지 먼저 확인
-            if file.filename == '':
-                return jsonify({
-                    'error': 'invalid_file_name',
-                    'message': '파일이 선택되지 않았습니다.'
-                }), 400
-                
-            # 파일 타입 검증
-            if not allowed_file(file.filename):
-                return jsonify({
-                    'error': 'invalid_file_type',
-                    'message': '지원하지 않는 파일 형식입니다.'
-                }), 400
-                
-            try:
-                img = Image.open(file.stream).convert('RGB')
-            except Exception as e:
-                return jsonify({
-                    'error': 'invalid_file_open',
-                    'message': '이미지를 처리할 수 없습니다.'
-                }), 400
-        else:
-            try:
-                data = request.get_json()
-                image_base64 = data.get('image_base64')
-                if not image_base64:
-                    return jsonify({                   
-                                    'error': 'invalid_image_formatting_error',
-                                    'message': '업로드 이미지를 변환하는 중 오류가 발생했습니다.'
-                                    }), 400
-                image_data = base64.b64decode(image_base64)
-                img = Image.open(io.BytesIO(image_data)).convert('RGB')
-            except Exception as e:
-                ({                   
-                    'error': 'invalid_image_open',
-                    'message': '업로드 이미지를 열지 못했습니다.'
-                    }), 400
-
-        # 이미지 최적화
-        optimized_buffer = optimize_image(img)
-        img = Image.open(optimized_buffer)
-
-        results = model(img, exist_ok=True, device=device)
-        detections = []
-        
-        for result in results:  # Iterate over results
-            for cls, conf, bbox in zip(result.boxes.cls, result.boxes.conf, result.boxes.xyxy):
-                if float(conf) > CONF_SCORE:
-                    detections.append({
-                        'label': labels_korean.get(int(cls), '알 수 없는 라벨'),
-                        'confidence': float(conf),
-                        'prohibited_dates': PROHIBITED_DATES.get(labels_korean.get(int(cls), ''), ''),
-                        'bbox': bbox.tolist()
-                    })
-                    
-        detections.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        if detections:
-            try:
-                top_fish = detections[0]['label']
-                assistant_request_id = assistant_talk_request(f"{top_fish}")
-            
-            except Exception as e:
-                print(f"assistant_request_id 호출 실패 : {e}")
-                assistant_request_id = None
+        data = request.get_json()
+        image_base64 = data.get('image_base64')
+        if not image_base64:
+            return None, ({
+                'error': 'invalid_image_formatting_error',
+                'message': '업로드 이미지를 변환하는 중 오류가 발생했습니다.'
+            }, 400)
+        return io.BytesIO(base64.b64decode(image_base64)), None
+    except Exception:
+        return None, ({
+            'error': 'invalid_image_open',
+            'message': '업로드 이미지를 열지 못했습니다.'
+        }, 400)
+
+# 토큰이 있으면 user_id, 없거나 잘못되었으면 None
+def get_optional_user_id():
+    token = request.headers.get('Authorization')
+    if not token:
+        return None
+    try:
+        data = jwt.decode(token.split(' ')[1], SECRET_KEY, algorithms=['HS256'])
+        return data['user_id']
+    except Exception:
+        return None
 
-        # 감지 결과가 없거나 모든 결과의 정확도가 낮은 경우
-        if not detections:
-            return jsonify({
-                'error': 'detection_failed',
-                'errorType': 'no_detection' if not results[0].boxes.cls.size(0) else 'low_confidence',
-                'message': '물고기를 감지할 수 없습니다.' if not results[0].boxes.cls.size(0) else '물고기를 정확하게 인식할 수 없습니다.'
-            }), 200  # 프론트엔드 처리를 위해 200 반환
+def detect_images(prepared_images):
+    """Raw boxes (letterbox coordinates) for each prepared upload"""
+    raws = [None] * len(prepared_images)
+    keys = [make_cache_key(prepared.tensor, MODEL_ID, CONF_SCORE) for prepared in prepared_images]
 
-        session = Session()
-        token = request.headers.get('Authorization')
-        if token:
-            token = token.split(' ')[1]
-            try:
-                data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-                user_id = data['user_id']
-                current_user = session.query(User).filter_by(user_id=user_id).first()
-            except:
-                current_user = None
-        else:
-            current_user = None
+    # 같은 이미지/모델/기준 점수로 이미 추론했다면 캐시된 결과 사용
+    misses = []
+    for i, key in enumerate(keys):
+        raws[i] = detection_cache.get(key)
+        if raws[i] is None:
+            misses.append(i)
+
+    # 캐시에 없는 이미지는 한꺼번에 제출해 같은 배치로 추론되도록 한다
+    futures = [detector.submit(prepared_images[i].tensor) for i in misses]
+    try:
+        for i, future in zip(misses, futures):
+            raws[i] = future.result(timeout=INFERENCE_TIMEOUT)
+            detection_cache.set(keys[i], raws[i])
+    except Exception:
+        # 기다리다 포기한 작업은 추론 풀에서 회수 (공유 메모리 해제)
+        for future in futures:
+            detector.cancel(future)
+        raise
+    return raws
+
+def run_prediction(source, user_id=None, catch_id=None, image_transport='url'):
+    """Decode, detect and persist one upload. Returns (response body, status code)"""
+    try:
+        # 축소 디코딩 후 모델 입력(letterbox)까지 한 번에 준비
+        prepared = prepare_image(source)
+    except Exception:
+        return {
+            'error': 'invalid_file_open',
+            'message': '이미지를 처리할 수 없습니다.'
+        }, 400
+
+    raw = detect_images([prepared])[0]
+    detections = build_detections(prepared.map_boxes(raw))
+
+    # 감지 결과가 없거나 모든 결과의 정확도가 낮은 경우
+    if not detections:
+        return detection_failed_body(raw), 200  # 프론트엔드 처리를 위해 200 반환
+
+    try:
+        top_fish = detections[0]['label']
+        assistant_request_id = assistant_talk_request(f"{top_fish}")
+    except Exception as e:
+        print(f"assistant_request_id 호출 실패 : {e}")
+        assistant_request_id = None
+
+    session = Session()
+    try:
+        current_user = session.query(User).filter_by(user_id=user_id).first() if user_id else None
 
         if current_user:
-            # Check if catchId is provided in the request
-            catch_id = request.args.get('catchId')
             if catch_id:
                 # Update existing catch
                 existing_catch = session.query(Catch).filter_by(catch_id=catch_id, user_id=current_user.user_id).first()
-                if existing_catch:
-                    existing_catch.exif_data = detections
-                    existing_catch.photo_url = filename
-                    existing_catch.catch_date = datetime.utcnow()
-                    session.commit()
-                    response_data = {
-                        'id': existing_catch.catch_id,
-                        'detections': detections,
-                        'imageUrl': filename
-                    }
-                else:
-                    return jsonify({'error': 'Catch not found'}), 404
+                if not existing_catch:
+                    return {'error': 'Catch not found'}, 404
+                filename = save_prepared_image(session, prepared)
+                upload_storage.release(session, existing_catch.photo_url)
+                existing_catch.exif_data = detections
+                existing_catch.photo_url = filename
+                existing_catch.catch_date = datetime.utcnow()
+                session.commit()
+                return {
+                    'id': existing_catch.catch_id,
+                    'detections': detections,
+                    'imageUrl': filename
+                }, 200
+
+            # Save new catch
+            filename = save_prepared_image(session, prepared)
+            new_catch = Catch(
+                user_id=current_user.user_id,
+                photo_url=filename,
+                exif_data=detections,
+                catch_date=datetime.utcnow()
+            )
+            session.add(new_catch)
+            session.commit()
+            return {
+                'id': new_catch.catch_id,
+                'detections': detections,
+                'imageUrl': filename,
+                'assistant_request_id': assistant_request_id
+            }, 200
+
+        # Do not save the image to the database
+        return {
+            'detections': detections,
+            **anonymous_image_fields(prepared, image_transport),
+            'assistant_request_id': assistant_request_id
+        }, 200
+    finally:
+        session.close()
+
+# predict 라트 수정
+@app.route('/backend/predict', methods=['POST'])
+def predict():
+    try:
+        source, error = read_predict_upload()
+        if error:
+            return jsonify(error[0]), error[1]
+
+        transport = predict_image_transport()
+        response_data, status = run_prediction(
+            source,
+            user_id=get_optional_user_id(),
+            catch_id=request.args.get('catchId'),
+            image_transport=transport,
+        )
+        image_jpeg = response_data.pop('image_jpeg', None)
+        if transport == 'multipart' and image_jpeg is not None:
+            return multipart_response(response_data, image_jpeg, status)
+        return jsonify(response_data), status
+    except Exception as e:
+        logging.error(f"Error processing image: {e}")
+        return jsonify({'error': '이미지 처리 중 오류가 발생했습니다.'}), 500
+
+PREDICT_BATCH_MAX_IMAGES = int(os.getenv('PREDICT_BATCH_MAX_IMAGES', '10'))
+
+# 여러 장의 사진을 한 번의 요청으로 판별
+@app.route('/backend/predict/batch', methods=['POST'])
+def predict_batch():
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'error': 'invalid_file_name', 'message': '파일이 선택되지 않았습니다.'}), 400
+    if len(files) > PREDICT_BATCH_MAX_IMAGES:
+        return jsonify({
+            'error': 'too_many_images',
+            'message': f'한 번에 최대 {PREDICT_BATCH_MAX_IMAGES}장까지 업로드할 수 있습니다.'
+        }), 400
+
+    results = [{'index': i, 'filename': file.filename} for i, file in enumerate(files)]
+    prepared_images = {}
+    for i, file in enumerate(files):
+        if file.filename == '' or not allowed_file(file.filename):
+            results[i].update({'error': 'invalid_file_type', 'message': '지원하지 않는 파일 형식입니다.'})
+            continue
+        try:
+            prepared_images[i] = prepare_image(file.stream)
+        except Exception:
+            results[i].update({'error': 'invalid_file_open', 'message': '이미지를 처리할 수 없습니다.'})
+
+    session = Session()
+    try:
+        indexes = list(prepared_images)
+        raws = detect_images([prepared_images[i] for i in indexes])
+
+        detected = {}
+        for i, raw in zip(indexes, raws):
+            detections = build_detections(prepared_images[i].map_boxes(raw))
+            if detections:
+                detected[i] = detections
+                results[i]['detections'] = detections
             else:
-                # Save new catch
-                filename = secure_filename(f"{uuid.uuid4().hex}.jpg")
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                img.save(file_path, format='JPEG')
+                results[i].update(detection_failed_body(raw))
 
-                new_catch = Catch(
+        # 어종별로 한 번씩만 설명 요청
+        assistant_ids = {}
+        for detections in detected.values():
+            top_fish = detections[0]['label']
+            if top_fish not in assistant_ids:
+                try:
+                    assistant_ids[top_fish] = assistant_talk_request(f"{top_fish}")
+                except Exception as e:
+                    print(f"assistant_request_id 호출 실패 : {e}")
+                    assistant_ids[top_fish] = None
+        for i, detections in detected.items():
+            results[i]['assistant_request_id'] = assistant_ids[detections[0]['label']]
+
+        user_id = get_optional_user_id()
+        current_user = session.query(User).filter_by(user_id=user_id).first() if user_id else None
+        if current_user:
+            # 모든 Catch를 하나의 트랜잭션으로 저장
+            new_catches = {}
+            for i, detections in detected.items():
+                filename = save_prepared_image(session, prepared_images[i])
+                new_catches[i] = Catch(
                     user_id=current_user.user_id,
                     photo_url=filename,
                     exif_data=detections,
                     catch_date=datetime.utcnow()
                 )
-                session.add(new_catch)
-                session.commit()
-                response_data = {
-                    'id': new_catch.catch_id,
-                    'detections': detections,
-                    'imageUrl': filename,
-                    'assistant_request_id': assistant_request_id
-                }
+            session.add_all(new_catches.values())
+            session.commit()
+            for i, new_catch in new_catches.items():
+                results[i]['id'] = new_catch.catch_id
+                results[i]['imageUrl'] = new_catch.photo_url
         else:
-            # Do not save the image to disk or database
-            buffered = io.BytesIO()
-            img.save(buffered, format='JPEG')
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            response_data = {
-                'detections': detections,
-                'image_base64': img_str,
-                'assistant_request_id': assistant_request_id
-            }
+            # 여러 이미지를 한 응답에 담으므로 multipart 대신 임시 URL 사용
+            transport = 'base64' if request.args.get('image') == 'base64' else 'url'
+            for i in detected:
+                results[i].update(anonymous_image_fields(prepared_images[i], transport))
 
-        session.close()
-        return jsonify(response_data)
+        return jsonify({'results': results})
     except Exception as e:
-        logging.error(f"Error processing image: {e}")
+        session.rollback()
+        logging.error(f"Error processing image batch: {e}")
         return jsonify({'error': '이미지 처리 중 오류가 발생했습니다.'}), 500
-    
+    finally:
+        session.close()
+
+# 비동기 예측 작업 큐 (업로드 즉시 job_id 반환, 결과는 폴링)
+prediction_jobs = PredictionJobQueue(
+    run_prediction,
+    spool_dir=os.path.join(PRIVATE_DATA_DIR, 'prediction-jobs'),
+    num_workers=int(os.getenv('PREDICT_JOB_WORKERS', '2')),
+    max_queue=int(os.getenv('PREDICT_JOB_QUEUE_SIZE', '100')),
+    result_ttl=int(os.getenv('PREDICT_JOB_RESULT_TTL', '600')),
+)
+
+@app.route('/backend/predict/jobs', methods=['POST'])
+def submit_prediction_job():
+    source, error = read_predict_upload()
+    if error:
+        return jsonify(error[0]), error[1]
+
+    user_id = get_optional_user_id()
+    # 결과는 폴링 JSON으로 전달되므로 multipart 대신 임시 URL 사용
+    transport = 'base64' if predict_image_transport() == 'base64' else 'url'
+    try:
+        job_id = prediction_jobs.submit(
+            source.read(),
+            owner_id=user_id,
+            user_id=user_id,
+            catch_id=request.args.get('catchId'),
+            image_transport=transport,
+        )
+    except queue.Full:
+        return jsonify({
+            'error': 'queue_full',
+            'message': '요청이 많아 잠시 후 다시 시도해주세요.'
+        }), 503
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/backend/predict/jobs/{job_id}'
+    }), 202
+
+@app.route('/backend/predict/jobs/<job_id>', methods=['GET'])
+def get_prediction_job(job_id):
+    job = prediction_jobs.get(job_id)
+    # 로그인 사용자의 작업은 본인만 조회 가능
+    if not job or (job['owner_id'] and job['owner_id'] != get_optional_user_id()):
+        return jsonify({'error': 'Job not found'}), 404
+
+    response_data = {
+        'job_id': job_id,
+        'status': job['status'],
+        'created_at': datetime.utcfromtimestamp(job['created_at']).isoformat(),
+    }
+    if job['status'] in ('done', 'failed'):
+        response_data['result'] = job['result']
+        response_data['status_code'] = job['status_code']
+    return jsonify(response_data)
+
+@app.route('/backend/predict/images/<token>', methods=['GET'])
+def get_temp_image(token):
+    found = temp_images.lookup(token)
+    if not found:
+        return jsonify({'error': 'Image not found or expired'}), 404
+    path, expires_in = found
+    response = send_file(os.path.abspath(path), mimetype='image/jpeg')
+    response.headers['Cache-Control'] = f'private, max-age={expires_in}'
+    return response
+
+@app.route('/backend/ready', methods=['GET'])
+def readiness():
+    # 배포 환경의 준비 확인 요청이 모델 로드를 시작시킨다
+    detector.start()
+    response_data = {
+        'ready': detector.ready,
+        'model': detector.state,
+        'error': detector.error,
+        'startup': startup_report.as_dict(),
+    }
+    return jsonify(response_data), 200 if detector.ready else 503
+
+@app.route('/backend/inference/stats', methods=['GET'])
+def inference_stats():
+    return jsonify({
+        'detector': detector.stats(),
+        'image_variants': variant_builder.stats(),
+        'upload_storage': upload_storage.stats(),
+        'detection_cache': detection_cache.stats(),
+        'prediction_jobs': prediction_jobs.stats(),
+        'temp_images': temp_images.stats(),
+        'top_posts': top_posts.stats(),
+        'response_cache': response_cache.stats(),
+        'fishing_snapshots': fishing_snapshots.stats(),
+        'tide_stations': tide_stations.stats(),
+        'khoa_cache': khoa_cache.stats(),
+        'weather_cache': weather_cache_stats(),
+        'upstreams': http.stats(),
+    })
+
 @app.route('/backend/chat/<thread_id>/<run_id>', methods=['GET'])
 def assistant_talk_result(thread_id, run_id):
     try:
@@ -761,6 +1359,7 @@ def profile(user_id):
                 return jsonify({'message': '현재 비밀번호가 일치하지 않습니다.'}), 400
         session.add(current_user)
         session.commit()
+        invalidate_user_content(session, user_id)  # 게시글/댓글에 표시되는 이름
         session.close()
         return jsonify({'message': '프로필이 성공적으로 업데이트되었습니다.'}), 200
 
@@ -783,6 +1382,7 @@ def recent_activities(user_id):
             'location': catch.location.address if catch.location else '알 수 없음',
             'date': catch.catch_date.strftime('%Y-%m-%d'),
             'image': catch.photo_url or '/placeholder.svg?height=80&width=80',
+            'image_variants': variant_urls(catch.photo_url, prefix=''),
         }
         for catch in activities
     ]
@@ -795,9 +1395,17 @@ def create_catch(user_id):
     data = request.get_json()
     session = Session()
     try:
+        # 이미지는 이 사용자가 이미 올린 업로드만 가리킬 수 있다 (참조 수 증가)
+        image_key = None
+        if data.get('imageUrl'):
+            image_key = upload_key(data['imageUrl'])
+            if not is_object_key(image_key) or not user_owns_upload(session, user_id, image_key):
+                return jsonify({'error': 'imageUrl must be one of your uploads'}), 400
+            if not upload_storage.retain(session, image_key):
+                return jsonify({'error': 'imageUrl must be one of your uploads'}), 400
         new_catch = Catch(
             user_id=user_id,
-            photo_url=data.get('imageUrl'),
+            photo_url=image_key,
             exif_data=data.get('detections'),
             catch_date=datetime.strptime(data.get('catch_date'), '%Y-%m-%d')
         )
@@ -837,6 +1445,7 @@ def get_catches(user_id):
         return jsonify([{
             'id': catch.catch_id,
             'imageUrl': catch.photo_url,
+            'imageVariants': variant_urls(catch.photo_url, prefix=''),
             'detections': catch.exif_data,
             'catch_date': catch.catch_date.strftime('%Y-%m-%d'),
             'weight_kg': float(catch.weight_kg) if catch.weight_kg else None,
@@ -931,6 +1540,7 @@ def delete_catch(user_id, catch_id):
         return jsonify({'message': 'Catch not found'}), 404
 
     try:
+        upload_storage.release(session, catch.photo_url)
         session.delete(catch)
         session.commit()
         session.close()
@@ -943,6 +1553,21 @@ def delete_catch(user_id, catch_id):
 
 @app.route('/uploads/<path:filename>', methods=['GET'])
 def uploaded_file(filename):
+    if filename.split('/', 1)[0] in PRIVATE_UPLOAD_SUBDIRS:
+        return jsonify({'error': 'File not found'}), 404
+    variant = parse_variant_path(filename)
+    if variant and not os.path.exists(os.path.join(UPLOAD_FOLDER, filename)):
+        # 아직 변환본이 없으면 생성을 예약하고 이번에는 원본으로 안내
+        stem, _ = variant
+        originals = sorted(glob.glob(os.path.join(glob.escape(os.path.join(UPLOAD_FOLDER, stem)) + '.*')))
+        if not originals:
+            return jsonify({'error': 'File not found'}), 404
+        original = os.path.relpath(originals[0], UPLOAD_FOLDER).replace(os.sep, '/')
+        variant_builder.schedule(original)
+        response = redirect(f'/uploads/{original}')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
     response = send_from_directory('uploads', filename)
     # 캐시 컨트롤 헤더 추가
     response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1년
@@ -958,7 +1583,7 @@ def get_detections(user_id):
 
     try:
         session = Session()
-        catch = session.query(Catch).filter_by(photo_url=imageUrl).first()
+        catch = session.query(Catch).filter_by(photo_url=imageUrl, user_id=user_id).first()
         session.close()
 
         if not catch:
@@ -972,38 +1597,173 @@ def get_detections(user_id):
 @app.route('/api/map_fishing_spot', methods=['POST'])
 # 추후 Token 관련 데코레이터 ��가할 것
 def map_fishing_spot():
-    session = Session()
-    fishing_spots = session.query(FishingPlace).all()
-    session.close()
+    # 전체 필드 목록 (이전 클라이언트용): 미리 직렬화/압축해 둔 스냅샷을 그대로 보낸다
+    try:
+        return snapshot_response(fishing_snapshots.get('full'))
+    except Exception as e:
+        return jsonify({f'message : 호출 실패, {e}'}), 401
 
+# 지도 화면 단위 낚시터 조회 설정
+FISHING_CLUSTER_LEVEL = int(os.getenv('FISHING_CLUSTER_LEVEL', '8'))  # 이 카카오맵 레벨 이상(축소)이면 서버에서 묶음
+FISHING_CLUSTER_CELL_PX = int(os.getenv('FISHING_CLUSTER_CELL_PX', '60'))  # 묶음 격자 한 칸의 화면 크기(px)
+FISHING_SPOTS_MAX = int(os.getenv('FISHING_SPOTS_MAX', '300'))  # 개별 표시 최대 개수 (넘으면 묶음으로 응답)
+
+def serialize_fishing_spot(spot):
+    """List/map fields of a fishing place (the facility texts are in the detail endpoint)"""
+    return {
+        'fishing_place_id': spot.fishing_place_id,
+        'name': spot.name,
+        'type': spot.type,
+        'latitude': spot.latitude,
+        'longitude': spot.longitude,
+        'address_road': spot.address_road,
+        'address_land': spot.address_land,
+    }
+
+def serialize_fishing_spot_detail(spot):
+    detail = serialize_fishing_spot(spot)
+    detail.update({
+        'phone_number': spot.phone_number,
+        'main_fish_species': spot.main_fish_species,
+        'usage_fee': spot.usage_fee,
+        'safety_facilities': spot.safety_facilities,
+        'convenience_facilities': spot.convenience_facilities,
+    })
+    return detail
+
+def fishing_spot_clusters(session, filters, cell):
+    # 격자 칸별 개수/평균 위치/범위를 DB에서 바로 집계
+    row = func.floor(FishingPlace.latitude / cell)
+    col = func.floor(FishingPlace.longitude / cell)
+    groups = session.query(
+        func.count(FishingPlace.fishing_place_id),
+        func.avg(FishingPlace.latitude), func.avg(FishingPlace.longitude),
+        func.min(FishingPlace.latitude), func.min(FishingPlace.longitude),
+        func.max(FishingPlace.latitude), func.max(FishingPlace.longitude),
+        func.min(FishingPlace.fishing_place_id),
+    ).filter(*filters).group_by(row, col).all()
+
+    clusters = []
+    for count, lat, lng, min_lat, min_lng, max_lat, max_lng, first_id in groups:
+        cluster = {
+            'count': count,
+            'latitude': float(lat),
+            'longitude': float(lng),
+            'bounds': [float(min_lng), float(min_lat), float(max_lng), float(max_lat)],
+        }
+        if count == 1:
+            cluster['fishing_place_id'] = first_id
+        clusters.append(cluster)
+    return clusters
+
+@app.route('/api/fishing_spots', methods=['GET'])
+def fishing_spots():
+    """
+    Fishing places for the visible part of the map.
+
+    ?bbox=west,south,east,north&level=<Kakao map level>&type=바다&type=...
+    Below FISHING_CLUSTER_LEVEL the spots in the bbox are returned one by
+    one (list fields only); from that level up, or when more than
+    FISHING_SPOTS_MAX are visible, they are grouped on a grid whose cells
+    cover about FISHING_CLUSTER_CELL_PX pixels. Without bbox every spot is
+    returned with the list fields, for the searchable list.
+    """
+    session = Session()
     try:
-        locations = [{
-            'fishing_place_id': spot.fishing_place_id,
-            'name': spot.name,
-            'type': spot.type,
-            'latitude': spot.latitude,
-            'longitude': spot.longitude,
-            'address_road': spot.address_road,
-            'address_land': spot.address_land,
-            'phone_number': spot.phone_number,
-            'main_fish_species': spot.main_fish_species,
-            'usage_fee': spot.usage_fee,
-            'safety_facilities': spot.safety_facilities,
-            'convenience_facilities' : spot.convenience_facilities, 
-        } for spot in fishing_spots]
-        
+        filters = []
+        types = request.args.getlist('type')
+        if types:
+            filters.append(FishingPlace.type.in_(types))
+        columns = [FishingPlace.fishing_place_id, FishingPlace.name, FishingPlace.type,
+                   FishingPlace.latitude, FishingPlace.longitude,
+                   FishingPlace.address_road, FishingPlace.address_land]
+
+        if not request.args.get('bbox'):
+            if not types:
+                return snapshot_response(fishing_snapshots.get('list'))
+            spots = session.query(*columns).filter(*filters).all()
+            return jsonify({'clustered': False, 'spots': [serialize_fishing_spot(spot) for spot in spots]})
 
-        return jsonify({
-            'message': 'DB호출 완료',
-            'location': locations
-        })
+        try:
+            bbox = parse_bbox(request.args['bbox'])
+        except ValueError:
+            return jsonify({'error': 'invalid_bbox', 'message': 'bbox는 west,south,east,north 형식이어야 합니다.'}), 400
+        level = clamp_level(request.args.get('level', FISHING_CLUSTER_LEVEL, type=int))
+        cell = cell_size(level, FISHING_CLUSTER_CELL_PX)
+
+        def within(west, south, east, north):
+            return [FishingPlace.latitude.between(south, north), FishingPlace.longitude.between(west, east)]
+
+        if level < FISHING_CLUSTER_LEVEL:
+            spots = session.query(*columns).filter(*filters, *within(*bbox))\
+                .limit(FISHING_SPOTS_MAX + 1).all()
+            if len(spots) <= FISHING_SPOTS_MAX:
+                return jsonify({
+                    'level': level,
+                    'clustered': False,
+                    'spots': [serialize_fishing_spot(spot) for spot in spots],
+                })
+
+        clusters = fishing_spot_clusters(session, filters + within(*snap_bbox(bbox, cell)), cell)
+        return jsonify({'level': level, 'clustered': True, 'cell': cell, 'clusters': clusters})
     except Exception as e:
-        return jsonify({f'message : 호출 실패, {e}'}), 401
+        logging.error(f"Error getting fishing spots: {e}")
+        return jsonify({'error': '낚시터 정보를 불러오는 중 오류가 발생했습니다.'}), 500
+    finally:
+        session.close()
+
+@app.route('/api/fishing_spots/<int:fishing_place_id>', methods=['GET'])
+def fishing_spot_detail(fishing_place_id):
+    session = Session()
+    try:
+        spot = session.query(FishingPlace).get(fishing_place_id)
+        if not spot:
+            return jsonify({'error': '낚시터를 찾을 수 없습니다.'}), 404
+        return jsonify(serialize_fishing_spot_detail(spot))
+    finally:
+        session.close()
+
+def build_fishing_snapshots():
+    session = Session.session_factory()
+    try:
+        spots = session.query(FishingPlace).order_by(FishingPlace.fishing_place_id).all()
+        return {
+            'list': {'clustered': False, 'spots': [serialize_fishing_spot(spot) for spot in spots]},
+            'full': {'message': 'DB호출 완료', 'location': [serialize_fishing_spot_detail(spot) for spot in spots]},
+        }
+    finally:
+        session.close()
+
+def fishing_places_fingerprint():
+    # 낚시터는 시드 데이터로만 추가되므로 개수와 최대 id로 변경 여부를 판단
+    session = Session.session_factory()
+    try:
+        return tuple(session.query(func.count(FishingPlace.fishing_place_id),
+                                   func.max(FishingPlace.fishing_place_id)).one())
+    finally:
+        session.close()
 
-# Create uploads directory path
-AVATAR_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, 'avatars')
-if not os.path.exists(AVATAR_UPLOAD_FOLDER):
-    os.makedirs(AVATAR_UPLOAD_FOLDER)
+fishing_snapshots = SnapshotStore(
+    build_fishing_snapshots, fishing_places_fingerprint,
+    check_interval=int(os.getenv('FISHING_SNAPSHOT_CHECK_INTERVAL', '60')),
+)
+
+def snapshot_response(snapshot):
+    """Precompressed snapshot body with a strong ETag; 304 when the client already has it"""
+    encodings = [encoding for encoding in ('br', 'gzip') if encoding in snapshot.encoded]
+    encoding = request.accept_encodings.best_match(encodings, default='identity')
+    etag = snapshot.etag(encoding)
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.encoded[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # 매번 ETag로 재검증 (시드 데이터가 바뀌면 바로 반영)
+    response.cache_control.no_cache = True
+    return response
 
 # Endpoint to handle avatar upload
 @app.route('/profile/avatar', methods=['POST'])
@@ -1015,10 +1775,6 @@ def upload_avatar(user_id):
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     if file and allowed_file(file.filename):
-        filename = secure_filename(f"{user_id}_{uuid.uuid4().hex}.jpg")
-        file_path = os.path.join(AVATAR_UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        
         session = Session()
         try:
             # Query the user within the new session
@@ -1026,10 +1782,13 @@ def upload_avatar(user_id):
             if not current_user:
                 return jsonify({'error': 'User not found'}), 404
 
-            # Update user's avatar URL
-            current_user.avatar = f"/uploads/avatars/{filename}"
+            # Update user's avatar URL (이전 아바타는 참조 해제)
+            key = store_upload(session, file.stream, upload_extension(file.filename))
+            upload_storage.release(session, current_user.avatar)
+            current_user.avatar = upload_storage.url(key)
             session.commit()
             avatar_url = current_user.avatar
+            invalidate_user_content(session, user_id)
         except Exception as e:
             session.rollback()
             logging.error(f"Error uploading avatar: {e}")
@@ -1037,99 +1796,124 @@ def upload_avatar(user_id):
         finally:
             session.close()
 
-        return jsonify({'message': 'Avatar uploaded successfully', 'avatarUrl': avatar_url}), 200
+        return jsonify({
+            'message': 'Avatar uploaded successfully',
+            'avatarUrl': avatar_url,
+            'avatarVariants': variant_urls(avatar_url)
+        }), 200
     else:
         return jsonify({'error': 'Invalid file type'}), 400
     
-# 요청 위치 기준 가장 가까운 관 위치 반환 
+def load_tide_stations(required):
+    session = Session.session_factory()
+    try:
+        stations = session.query(TidalObservation)\
+            .filter(TidalObservation.capabilities.in_(masks_with(required)))
+        return [{
+            'obs_station_id': station.obs_station_id,
+            'obs_post_id': station.obs_post_id,
+            'obs_post_name': station.obs_post_name,
+            'obs_lat': station.obs_lat,
+            'obs_lon': station.obs_lon,
+        } for station in stations]
+    finally:
+        session.close()
+
+def tide_stations_fingerprint():
+    # 관측소는 시드로만 바뀌므로 개수/최대 id, 관측 항목 비트 합으로 변경 여부를 판단
+    session = Session.session_factory()
+    try:
+        return tuple(session.query(func.count(TidalObservation.obs_station_id),
+                                   func.max(TidalObservation.obs_station_id),
+                                   func.sum(TidalObservation.capabilities)).one())
+    finally:
+        session.close()
+
+# 관측소 분류별 KD-tree (다른 프로세스의 시드도 확인 주기 안에 반영)
+tide_stations = TideStationIndex(
+    load_tide_stations, tide_stations_fingerprint,
+    check_interval=int(os.getenv('TIDE_STATION_CHECK_INTERVAL', '60')),
+)
+TIDE_BATCH_MAX_POINTS = int(os.getenv('TIDE_BATCH_MAX_POINTS', '1000'))
+
+def serialize_tide_station(match):
+    station, distance = match
+    return {
+        'obs_station_id': station['obs_station_id'],
+        'obs_post_id': station['obs_post_id'],
+        'obs_post_name': station['obs_post_name'],
+        'distance': distance / 1000,
+    }
+
+# 요청 위치 기준 가장 가까운 관측소 반환
 @app.route('/backend/closest-sealoc', methods=['POST'])
 def get_closest_sealoc():
-    user_lat = request.form.get('lat')
-    user_lon = request.form.get('lon')
-
-    if user_lat is None or user_lon is None:
+    try:
+        user_lat = float(request.form['lat'])
+        user_lon = float(request.form['lon'])
+    except (KeyError, TypeError, ValueError):
         return jsonify({'error': 'Invalid input'}), 400
 
-    session = Session()
-    
-    ## ST_Distance_Sphere를 사용하여 MySQL에 직접 거리 계산
-    # 조위, 수온, 기온 , 기압 4개 모두 체 가능한 우
-    query_obsrecent = text("""
-        SELECT obs_station_id, obs_post_id, obs_post_name,
-            ST_Distance_Sphere(POINT(:lon, :lat), POINT(obs_lon, obs_lat)) AS distance
-        FROM TidalObservations
-        WHERE obs_object LIKE '%조위%'
-            AND obs_object LIKE '%수온%'
-            AND obs_object LIKE '%기온%'
-            AND obs_object LIKE '%기압%'
-        ORDER BY distance ASC
-        LIMIT 1;
-    """)
-    
-    # 조수간 태그 + 없음 제거
-    query_obspretab = text("""
-        SELECT obs_station_id, obs_post_id, obs_post_name,
-            ST_Distance_Sphere(POINT(:lon, :lat), POINT(obs_lon, obs_lat)) AS distance
-        FROM TidalObservations
-        WHERE obs_object LIKE '%조수간만%'
-            AND obs_object NOT LIKE '%없음%'
-        ORDER BY distance ASC
-        LIMIT 1;
-    """)
+    # 조위/수온/기온/기압 관측소와 조수간만 예보 관측소 (메모리 인덱스, DB 조회 없음)
+    result_obsrecent = tide_stations.nearest('obsrecent', user_lat, user_lon)
+    result_obspretab = tide_stations.nearest('obspretab', user_lat, user_lon)
+    if not (result_obsrecent and result_obspretab):
+        return jsonify({'error': 'No tidal observations found'}), 404
+
+    # 조위 관측 정보
+    obsrecent_data = serialize_tide_station(result_obsrecent)
+    # 조수간만 관측소 정보
+    obspretab_data = serialize_tide_station(result_obspretab)
 
+    # KHOA API 호출
     try:
-        #  개 쿼리 실행
-        result_obsrecent = session.execute(query_obsrecent, {'lat': user_lat, 'lon': user_lon}).fetchone()
-        result_obspretab = session.execute(query_obspretab, {'lat': user_lat, 'lon': user_lon}).fetchone()
-
-        if result_obsrecent and result_obspretab:
-            print(f"obs recent : {result_obsrecent}")
-            print(f"obs pretab : {result_obspretab}")
-            # 조위 관측 정보
-            obsrecent_data = {
-                'obs_station_id': result_obsrecent[0],
-                'obs_post_id': result_obsrecent[1],
-                'obs_post_name': result_obsrecent[2],
-                'distance': result_obsrecent[3] / 1000
-            }
+        api_data = get_sea_weather_by_seapostid({
+            'obsrecent': obsrecent_data['obs_post_id'],
+            'obspretab': obspretab_data['obs_post_id']
+        })
 
-            # 조수간만 관측소 정보
-            obspretab_data = {
-                'obs_station_id': result_obspretab[0],
-                'obs_post_id': result_obspretab[1],
-                'obs_post_name': result_obspretab[2],
-                'distance': result_obspretab[3] / 1000
+        # 프론트엔드에 보낼 데이터 구성
+        closest_data = {
+            'obsrecent': {
+                **obsrecent_data,
+                'api_response': api_data['obsrecent']
+            },
+            'obspretab': {
+                **obspretab_data,
+                'api_response': api_data['obspretab']
             }
+        }
+        return jsonify(closest_data)
 
-            # KHOA API 호출
-            try:
-                api_data = get_sea_weather_by_seapostid({
-                    'obsrecent': obsrecent_data['obs_post_id'],
-                    'obspretab': obspretab_data['obs_post_id']
-                })
-                
-                # 프론트엔드에 보낼 데이터 구성
-                closest_data = {
-                    'obsrecent': {
-                        **obsrecent_data,
-                        'api_response': api_data['obsrecent']
-                    },
-                    'obspretab': {
-                        **obspretab_data,
-                        'api_response': api_data['obspretab']
-                    }
-                }
-                return jsonify(closest_data)
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'API request failed: {e}'}), 500
 
-            except requests.exceptions.RequestException as e:
-                return jsonify({'error': f'API request failed: {e}'}), 500
+@app.route('/backend/closest-sealoc/batch', methods=['POST'])
+def get_closest_sealoc_batch():
+    """
+    Nearest stations of both classes for many points at once, without the
+    KHOA calls: {"points": [{"lat": .., "lon": ..}, ...]} ->
+    {"results": [{"obsrecent": {...}, "obspretab": {...}}, ...]} in order.
+    """
+    data = request.get_json(silent=True) or {}
+    points = data.get('points')
+    if not isinstance(points, list) or not points:
+        return jsonify({'error': 'points must be a non-empty list of {lat, lon}'}), 400
+    if len(points) > TIDE_BATCH_MAX_POINTS:
+        return jsonify({'error': f'At most {TIDE_BATCH_MAX_POINTS} points per request'}), 400
+    try:
+        lats = [float(point['lat']) for point in points]
+        lons = [float(point['lon']) for point in points]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Invalid input'}), 400
 
-        else:
-            return jsonify({'error': 'No tidal observations found'}), 404
+    matches = {name: tide_stations.nearest_many(name, lats, lons) for name in ('obsrecent', 'obspretab')}
+    results = [
+        {name: serialize_tide_station(found[i]) if found[i] else None for name, found in matches.items()}
+        for i in range(len(points))
+    ]
+    return jsonify({'results': results})
 
-    finally:
-        session.close()
-        
 @app.route('/backend/get-weather', methods=['POST'])
 def get_weather_api():
     try:
@@ -1236,59 +2020,172 @@ def get_full_url(url):
         return url
     return f"{baseUrl}{url}"
 
+def get_variant_urls(url):
+    """Full URLs of the thumb/feed/full WebP and JPEG variants of an upload"""
+    return variant_urls(url, prefix=f"{baseUrl}/uploads/")
+
+def load_liked_post_ids(session, post_ids, user_id):
+    """The subset of `post_ids` that `user_id` has liked, in a single query"""
+    if not post_ids or user_id is None:
+        return set()
+    return {post_id for (post_id,) in session.query(PostLike.post_id)
+            .filter(PostLike.post_id.in_(post_ids), PostLike.user_id == user_id)
+            .distinct()}
+
+def serialize_post_summary(post, user):
+    """Post fields shared by /api/posts, /api/posts/<id> and /api/posts/top (everything but is_liked)"""
+    return {
+        'post_id': post.post_id,
+        'user_id': post.user_id,
+        'username': user.username if user else 'Unknown',
+        'avatar': get_full_url(user.avatar) if user and user.avatar else None,
+        'avatar_variants': get_variant_urls(user.avatar) if user else None,
+        'title': post.title,
+        'content': post.content,
+        'images': [get_full_url(image) for image in (post.images or [])],
+        'image_variants': [get_variant_urls(image) for image in (post.images or [])],
+        'created_at': post.created_at.isoformat(),
+        'updated_at': (post.updated_at or post.created_at).isoformat(),
+        'likes_count': post.likes_count,
+        'comments_count': post.comments_count,
+    }
+
+
+POSTS_MAX_PER_PAGE = 50
+COMMENTS_PER_PAGE = int(os.getenv('COMMENTS_PER_PAGE', '50'))
+COMMENTS_MAX_PER_PAGE = 100
+# 전체 게시글 수는 요청할 때만 계산하고 잠시 캐시 (게시글 작성/삭제 시 무효화)
+post_total = CachedCount(ttl=int(os.getenv('POST_COUNT_CACHE_TTL', '60')))
+
+def top_post_key(entry):
+    # likes_count, created_at, post_id 내림차순 (created_at은 같은 형식의 ISO 문자열이라 문자열 비교로 충분)
+    return entry['likes_count'], entry['created_at'], entry['post_id']
+
+def load_top_posts(limit):
+    # 요청 세션과 별개로 읽는다 (top()은 요청 중 어디서든 불릴 수 있음)
+    session = Session.session_factory()
+    try:
+        rows = session.query(CommunicationBoard, User)\
+            .outerjoin(User, User.user_id == CommunicationBoard.user_id)\
+            .order_by(CommunicationBoard.likes_count.desc(), CommunicationBoard.created_at.desc(),
+                      CommunicationBoard.post_id.desc())\
+            .limit(limit)\
+            .all()
+        return [serialize_post_summary(post, user) for post, user in rows]
+    finally:
+        session.close()
+
+# 인기 게시글 보드: 이 프로세스의 쓰기는 바로 반영, 다른 워커의 쓰기는 TOP_POSTS_MAX_AGE초 안에 반영
+top_posts = Leaderboard(
+    load_top_posts, key=top_post_key, size=5,
+    depth=int(os.getenv('TOP_POSTS_DEPTH', '20')),
+    max_age=float(os.getenv('TOP_POSTS_MAX_AGE', '30')),
+)
+
+def update_top_posts(post, user=None):
+    """Move a post on the top-posts board after its likes, comments or content changed"""
+    key = (post.likes_count, post.created_at.isoformat(), post.post_id)
+    if top_posts.wants(key) or top_posts.contains(post.post_id):
+        top_posts.put(serialize_post_summary(post, user or post.user))
+
+# 커뮤니티 읽기 캐시: 게시글(post:<id>), 피드 첫 페이지(feed:first), 댓글 첫 페이지(comments:<post_id>)
+# RESPONSE_CACHE=memory(워커별 LRU) | off | redis://host:6379/0 (워커 간 공유)
+response_cache = ResponseCache(
+    make_backend(os.getenv('RESPONSE_CACHE', 'memory'), int(os.getenv('RESPONSE_CACHE_SIZE', '2048'))),
+    ttl=int(os.getenv('RESPONSE_CACHE_TTL', '300')),
+)
+
+def load_post_entities(session, post_ids):
+    """{post_id: serialized post} from the cache, loading the misses with one query"""
+    entities = response_cache.get_many('post', post_ids)
+    missing = [post_id for post_id in post_ids if post_id not in entities]
+    if missing:
+        rows = session.query(CommunicationBoard, User)\
+            .outerjoin(User, User.user_id == CommunicationBoard.user_id)\
+            .filter(CommunicationBoard.post_id.in_(missing))\
+            .all()
+        loaded = {post.post_id: serialize_post_summary(post, user) for post, user in rows}
+        response_cache.set_many('post', loaded)
+        entities.update(loaded)
+    return entities
+
+def load_first_feed_page(session):
+    """The newest POSTS_MAX_PER_PAGE posts (serialized) and the cursor after them"""
+    page = response_cache.get('feed', 'first')
+    if page is not None:
+        entities = load_post_entities(session, page['post_ids'])
+        return [entities[post_id] for post_id in page['post_ids'] if post_id in entities], page['next_cursor']
+
+    query = session.query(CommunicationBoard, User)\
+        .outerjoin(User, User.user_id == CommunicationBoard.user_id)
+    rows, next_cursor = keyset_page(query, CommunicationBoard.created_at, CommunicationBoard.post_id,
+                                    limit=POSTS_MAX_PER_PAGE)
+    posts = [serialize_post_summary(post, user) for post, user in rows]
+    response_cache.set_many('post', {post['post_id']: post for post in posts})
+    response_cache.set('feed', 'first', {'post_ids': [post['post_id'] for post in posts], 'next_cursor': next_cursor})
+    return posts, next_cursor
+
+def invalidate_user_content(session, user_id):
+    """Drop cached posts and comment pages that show this user's name or avatar"""
+    post_ids = [post_id for (post_id,) in session.query(CommunicationBoard.post_id)
+                .filter(CommunicationBoard.user_id == user_id)]
+    commented = [post_id for (post_id,) in session.query(PostComment.post_id)
+                 .filter(PostComment.user_id == user_id).distinct()]
+    response_cache.delete('post', *post_ids)
+    response_cache.delete('comments', *commented)
+    if any(top_posts.contains(post_id) for post_id in post_ids):
+        top_posts.invalidate()
 
 @app.route('/api/posts', methods=['GET'])
 @token_required
 def get_posts(user_id):
+    session = Session()
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
-        session = Session()
-        
-        # Calculate total posts and pages
-        total = session.query(CommunicationBoard).count()
-        offset = (page - 1) * per_page
-        
-        # Get posts with pagination
-        posts = session.query(CommunicationBoard)\
-            .order_by(CommunicationBoard.created_at.desc())\
-            .offset(offset)\
-            .limit(per_page)\
-            .all()
-            
+        cursor = request.args.get('cursor')
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), POSTS_MAX_PER_PAGE)
+        # page는 이전 클라이언트 호환용 (OFFSET), 새 클라이언트는 next_cursor 사용
+        page = request.args.get('page', type=int)
+        offset = (page - 1) * per_page if page and page > 1 and not cursor else 0
+
+        if not cursor and not offset:
+            # First page: cached ids and posts, cut down to per_page
+            posts, next_cursor = load_first_feed_page(session)
+            posts, next_cursor = slice_page(posts, per_page, next_cursor, 'post_id')
+        else:
+            # Get posts with their authors for this page (one query)
+            query = session.query(CommunicationBoard, User)\
+                .outerjoin(User, User.user_id == CommunicationBoard.user_id)
+            try:
+                rows, next_cursor = keyset_page(
+                    query, CommunicationBoard.created_at, CommunicationBoard.post_id,
+                    cursor=cursor, limit=per_page, offset=offset,
+                )
+            except ValueError:
+                return jsonify({'error': 'invalid_cursor', 'message': '잘못된 페이지 정보입니다.'}), 400
+            posts = [serialize_post_summary(post, user) for post, user in rows]
+
+        # The caller's likes for the whole page (one query); counts are stored on the posts
+        liked = load_liked_post_ids(session, [post['post_id'] for post in posts], user_id)
+
         result = []
-        for post in posts:
-            user = session.query(User).get(post.user_id)
-            
-            # Get like status for current user
-            is_liked = session.query(PostLike)\
-                .filter_by(post_id=post.post_id, user_id=user_id)\
-                .first() is not None
-            
-            post_data = {
-                'post_id': post.post_id,
-                'user_id': post.user_id,
-                'username': user.username if user else 'Unknown',
-                'avatar': get_full_url(user.avatar) if user and user.avatar else None,
-                'title': post.title,
-                'content': post.content,
-                'images': [get_full_url(image) for image in (post.images or [])],
-                'created_at': post.created_at.isoformat(),
-                'likes_count': session.query(PostLike).filter_by(post_id=post.post_id).count(),
-                'comments_count': session.query(PostComment).filter_by(post_id=post.post_id).count(),
-                'is_liked': is_liked
-            }
+        for post_data in posts:
+            post_data['is_liked'] = post_data['post_id'] in liked
             result.append(post_data)
-            
-        total_pages = (total + per_page - 1) // per_page
-        
-        return jsonify({
+
+        response_data = {
             'posts': result,
-            'total': total,
-            'pages': total_pages,
-            'current_page': page
-        })
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None,
+            'per_page': per_page,
+        }
+        if page or request.args.get('include_total') == '1':
+            total = post_total.get(lambda: session.query(func.count(CommunicationBoard.post_id)).scalar())
+            response_data.update({
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'current_page': page or 1,
+            })
+        return jsonify(response_data)
     except Exception as e:
         logging.error(f"Error getting posts: {str(e)}")
         return jsonify({'error': '게시물을 불러오는 중 오류가 발생했습니다.'}), 500
@@ -1322,19 +2219,20 @@ def create_post(user_id):
         for image in images:
             if image and allowed_file(image.filename):
                 try:
-                    filename = secure_filename(f"{uuid.uuid4()}_{image.filename}")
-                    image_path = os.path.join(UPLOAD_FOLDER, filename)
-                    image.save(image_path)
-                    new_post.images.append(f'/uploads/{filename}')
+                    key = store_upload(session, image.stream, upload_extension(image.filename))
+                    new_post.images.append(upload_storage.url(key))
                 except Exception as e:
                     logging.error(f"Error saving image {image.filename}: {str(e)}")
                     continue
 
         session.add(new_post)
         session.commit()
+        post_total.invalidate()
+        response_cache.delete('feed', 'first')
 
         # Get user info for response
         user = session.query(User).get(user_id)
+        update_top_posts(new_post, user)
 
         response_data = {
             'message': '게시물이 성공적으로 작성되었습니다.',
@@ -1346,6 +2244,7 @@ def create_post(user_id):
                 'title': new_post.title,
                 'content': new_post.content,
                 'images': [get_full_url(url) for url in new_post.images],
+                'image_variants': [get_variant_urls(url) for url in new_post.images],
                 'created_at': new_post.created_at.isoformat(),
                 'updated_at': new_post.updated_at.isoformat(),
                 'likes_count': 0,
@@ -1367,48 +2266,17 @@ def create_post(user_id):
 def get_post(user_id, post_id):
     session = Session()
     try:
-        post = session.query(CommunicationBoard).get(post_id)
-        if not post:
+        # Post with its author and counts from the cache (one query on a miss)
+        response_data = load_post_entities(session, [post_id]).get(post_id)
+        if not response_data:
             return jsonify({'error': '게시물을 찾을 수 없습니다.'}), 404
 
-        user = session.query(User).get(post.user_id)
-        if not user:
-            return jsonify({'error': '게시물 작성자를 찾을 수 없습니다.'}), 500
-
         # Check if the current user has liked this post
-        is_liked = session.query(PostLike).filter_by(
+        response_data['is_liked'] = session.query(PostLike).filter_by(
             post_id=post_id,
             user_id=user_id
         ).first() is not None
 
-        # Get counts
-        likes_count = session.query(PostLike).filter_by(post_id=post_id).count()
-        comments_count = session.query(PostComment).filter_by(post_id=post_id).count()
-
-        # Handle images safely
-        images = []
-        if post.images:
-            if isinstance(post.images, list):
-                images = [get_full_url(image) for image in post.images]
-            else:
-                logging.warning(f"Unexpected images type for post {post_id}: {type(post.images)}")
-                images = []
-
-        response_data = {
-            'post_id': post.post_id,
-            'user_id': post.user_id,
-            'username': user.username,
-            'avatar': get_full_url(user.avatar),
-            'title': post.title,
-            'content': post.content,
-            'images': images,
-            'created_at': post.created_at.isoformat(),
-            'updated_at': post.updated_at.isoformat() if post.updated_at else post.created_at.isoformat(),
-            'likes_count': likes_count,
-            'comments_count': comments_count,
-            'is_liked': is_liked
-        }
-
         return jsonify(response_data)
     except Exception as e:
         logging.error(f"Error getting post {post_id}: {str(e)}")
@@ -1431,14 +2299,15 @@ def update_post(user_id, post_id):
         # 폼 데이터와 파일 가져오기
         data = request.form
         new_images = request.files.getlist('images')
-        removed_images = request.form.getlist('removed_images[]')
         existing_images = request.form.getlist('existing_images[]')
 
         # 이미지 목록 초기화
         post.images = []
 
-        # 기존 이미지 처리
+        # 기존 이미지 처리 (응답에서 받은 전체 URL도 저장된 경로와 비교)
         for image_url in existing_images:
+            if baseUrl and image_url.startswith(baseUrl):
+                image_url = image_url[len(baseUrl):]
             if image_url in current_images:
                 post.images.append(image_url)
 
@@ -1446,22 +2315,14 @@ def update_post(user_id, post_id):
         for image in new_images:
             if image and allowed_file(image.filename):
                 try:
-                    filename = secure_filename(f"{uuid.uuid4()}_{image.filename}")
-                    image_path = os.path.join(UPLOAD_FOLDER, filename)
-                    image.save(image_path)
-                    post.images.append(f'/uploads/{filename}')
+                    key = store_upload(session, image.stream, upload_extension(image.filename))
+                    post.images.append(upload_storage.url(key))
                 except Exception as e:
                     logging.error(f"Error saving image {image.filename}: {str(e)}")
 
-        # 삭제된 이미지 파일 제거
-        for image_url in removed_images:
-            if image_url in current_images:
-                try:
-                    file_path = os.path.join(app.root_path, image_url.lstrip('/'))
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                except Exception as e:
-                    logging.error(f"Error removing file {image_url}: {str(e)}")
+        # 더 이상 쓰지 않는 이미지는 참조 해제 (마지막 참조였다면 커밋 후 파일 삭제)
+        for image_url in (Counter(current_images) - Counter(post.images)).elements():
+            upload_storage.release(session, image_url)
 
         # 게시물 내용 업데이트
         post.title = data.get('title', post.title)
@@ -1469,6 +2330,8 @@ def update_post(user_id, post_id):
         post.updated_at = datetime.utcnow()
 
         session.commit()
+        update_top_posts(post)
+        response_cache.delete('post', post_id)
 
         response_data = {
             'message': '게시물이 성공적으로 수정되었습니다.',
@@ -1477,6 +2340,7 @@ def update_post(user_id, post_id):
                 'title': post.title,
                 'content': post.content,
                 'images': [get_full_url(url) for url in post.images],
+                'image_variants': [get_variant_urls(url) for url in post.images],
                 'updated_at': post.updated_at.isoformat()
             }
         }
@@ -1498,15 +2362,17 @@ def delete_post(user_id, post_id):
         if not post:
             return jsonify({'error': '게시물을 찾을 수 없거나 삭제 권한이 없습니다.'}), 404
 
-        # Delete all associated images
-        if post.images:
-            for image_url in post.images:
-                image_path = os.path.join(UPLOAD_FOLDER, os.path.basename(image_url))
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+        # Release all associated images
+        for image_url in post.images or []:
+            upload_storage.release(session, image_url)
 
         session.delete(post)
         session.commit()
+        post_total.invalidate()
+        top_posts.remove(post_id)
+        response_cache.delete('feed', 'first')
+        response_cache.delete('post', post_id)
+        response_cache.delete('comments', post_id)
 
         return jsonify({'message': '게시물이 성공적으로 삭제되었습니다.'})
     except Exception as e:
@@ -1526,33 +2392,23 @@ def toggle_like(user_id, post_id):
         if not post:
             return jsonify({'error': '게시물을 찾을 수 없습니다.'}), 404
 
-        # Check if user already liked the post
-        existing_like = session.query(PostLike).filter_by(
-            post_id=post_id,
-            user_id=user_id
-        ).first()
-
-        if existing_like:
-            # Unlike
-            session.delete(existing_like)
-            session.commit()
-            likes_count = session.query(PostLike).filter_by(post_id=post_id).count()
-            return jsonify({
-                'message': '좋아요가 취소되었습니다.',
-                'is_liked': False,
-                'likes_count': likes_count
-            })
+        # Unlike if the user already liked the post; the counter changes in the same transaction
+        removed = session.query(PostLike).filter_by(post_id=post_id, user_id=user_id)\
+            .delete(synchronize_session=False)
+        if removed:
+            adjust_post_counts(session, post_id, likes=-removed)
         else:
-            # Like
-            new_like = PostLike(post_id=post_id, user_id=user_id)
-            session.add(new_like)
-            session.commit()
-            likes_count = session.query(PostLike).filter_by(post_id=post_id).count()
-            return jsonify({
-                'message': '좋아요가 추가되었습니다.',
-                'is_liked': True,
-                'likes_count': likes_count
-            })
+            session.add(PostLike(post_id=post_id, user_id=user_id))
+            adjust_post_counts(session, post_id, likes=1)
+        session.commit()
+        update_top_posts(post)
+        response_cache.delete('post', post_id)
+
+        return jsonify({
+            'message': '좋아요가 취소되었습니다.' if removed else '좋아요가 추가되었습니다.',
+            'is_liked': not removed,
+            'likes_count': post.likes_count
+        })
 
     except Exception as e:
         session.rollback()
@@ -1566,19 +2422,38 @@ def toggle_like(user_id, post_id):
 def get_comments(user_id, post_id):
     session = Session()
     try:
+        limit = min(max(request.args.get('limit', COMMENTS_PER_PAGE, type=int), 1), COMMENTS_MAX_PER_PAGE)
+        cursor = request.args.get('cursor')
+
+        # First page of every post is cached with the largest page size and cut down to `limit`
+        if not cursor:
+            cached = response_cache.get('comments', post_id)
+            if cached is not None:
+                comments_data, next_cursor = slice_page(cached['comments'], limit, cached['next_cursor'], 'comment_id')
+                return jsonify({
+                    'comments': comments_data,
+                    'next_cursor': next_cursor,
+                    'has_more': next_cursor is not None
+                })
+
         # Check if post exists
         post = session.query(CommunicationBoard).get(post_id)
         if not post:
             return jsonify({'error': '게시물을 찾을 수 없습니다.'}), 404
 
-        # Get comments with user information
-        comments = session.query(PostComment, User).join(
+        # Get comments with user information, newest first, one page at a time
+        query = session.query(PostComment, User).join(
             User, PostComment.user_id == User.user_id
         ).filter(
             PostComment.post_id == post_id
-        ).order_by(
-            PostComment.created_at.desc()
-        ).all()
+        )
+        try:
+            comments, next_cursor = keyset_page(
+                query, PostComment.created_at, PostComment.comment_id,
+                cursor=cursor, limit=limit if cursor else COMMENTS_MAX_PER_PAGE,
+            )
+        except ValueError:
+            return jsonify({'error': 'invalid_cursor', 'message': '잘못된 페이지 정보입니다.'}), 400
 
         comments_data = [{
             'comment_id': comment.comment_id,
@@ -1589,7 +2464,15 @@ def get_comments(user_id, post_id):
             'created_at': comment.created_at.isoformat()
         } for comment, user in comments]
 
-        return jsonify({'comments': comments_data})
+        if not cursor:
+            response_cache.set('comments', post_id, {'comments': comments_data, 'next_cursor': next_cursor})
+            comments_data, next_cursor = slice_page(comments_data, limit, next_cursor, 'comment_id')
+
+        return jsonify({
+            'comments': comments_data,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        })
 
     except Exception as e:
         logging.error(f"Error getting comments for post {post_id}: {str(e)}")
@@ -1618,7 +2501,11 @@ def create_comment(user_id, post_id):
             content=data['content']
         )
         session.add(new_comment)
+        adjust_post_counts(session, post_id, comments=1)
         session.commit()
+        update_top_posts(post)
+        response_cache.delete('post', post_id)
+        response_cache.delete('comments', post_id)
 
         # Get user info for response
         user = session.query(User).get(user_id)
@@ -1646,52 +2533,28 @@ def create_comment(user_id, post_id):
 
 @app.route('/api/posts/top', methods=['GET'])
 def get_top_posts():
-    session = Session()
     try:
-        # Get top 5 posts by likes
-        top_posts = session.query(CommunicationBoard)\
-            .outerjoin(PostLike)\
-            .group_by(CommunicationBoard.post_id)\
-            .order_by(func.count(PostLike.like_id).desc(), CommunicationBoard.created_at.desc())\
-            .limit(5)\
-            .all()
-
-        if not top_posts:
-            # If no posts with likes, get the most recent 5 posts
-            top_posts = session.query(CommunicationBoard)\
-                .order_by(CommunicationBoard.created_at.desc())\
-                .limit(5)\
-                .all()
-
-        result = []
-        for post in top_posts:
-            user = session.query(User).get(post.user_id)
-            post_data = {
-                'post_id': post.post_id,
-                'user_id': post.user_id,
-                'username': user.username if user else 'Unknown',
-                'avatar': get_full_url(user.avatar) if user else None,
-                'title': post.title,
-                'content': post.content,
-                'images': [get_full_url(image) for image in (post.images or [])],
-                'created_at': post.created_at.isoformat(),
-                'likes_count': session.query(PostLike).filter_by(post_id=post.post_id).count(),
-                'comments_count': session.query(PostComment).filter_by(post_id=post.post_id).count(),
-            }
-            result.append(post_data)
-
-        return jsonify(result)
+        # Top 5 posts by likes (newest first on ties) from the in-memory board;
+        # reloads at most every TOP_POSTS_MAX_AGE seconds with one indexed query
+        return jsonify(top_posts.top())
     except Exception as e:
         logging.error(f"Error getting top posts: {str(e)}")
         return jsonify({'error': 'Error fetching top posts'}), 500
-    finally:
-        session.close()
         
     # 애플리케이션 종료 시 세 제거
 @app.teardown_appcontext
 def remove_session(exception=None):
     Session.remove()
 
+startup_report.mark('routes')
+
+# 시드 직후 낚시터 스냅샷을 미리 만들어 첫 지도 요청부터 DB 조회/직렬화 없이 응답
+if INIT_DB_ON_STARTUP:
+    fishing_snapshots.rebuild()
+    tide_stations.reload()
+    startup_report.mark('fishing snapshots')
+
 # Ensure the backend server is running on port 5000
 if __name__ == '__main__':
+    detector.start()
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
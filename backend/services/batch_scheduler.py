@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def collect_batch(get, max_batch_size, max_wait_ms):
+    """
+    Block for the first item, then keep pulling items until the batch is full
+    or the wait window (measured from the first item) closes. Items that are
+    already queued are always taken, even with a zero wait window.
+    """
+    batch = [get(None)]
+    deadline = time.monotonic() + max_wait_ms / 1000.0
+
+    while len(batch) < max_batch_size:
+        try:
+            batch.append(get(max(0.0, deadline - time.monotonic())))
+        except queue.Empty:
+            break
+    return batch
+
+
+class BatchScheduler:
+    """
+    Micro-batching scheduler in front of a model.
+
+    Callers submit one image and get a Future back. A single dispatcher thread
+    groups concurrent submissions for up to `max_wait_ms` (or until
+    `max_batch_size` is reached), runs `run_batch(images)` once and hands each
+    caller its own element of the returned list.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10.0, name='batch-scheduler'):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be >= 1')
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'items': 0, 'max_batch': 0}
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        if self._stopped.is_set():
+            raise RuntimeError('BatchScheduler is stopped')
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_batch'] = stats['items'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def stop(self):
+        self._stopped.set()
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+        # 처리되지 못한 요청은 에러로 마무리
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError('BatchScheduler is stopped'))
+
+    def _get(self, timeout):
+        item = self._queue.get(timeout=timeout)
+        if item is None:
+            # stop() 신호는 다음 루프에서 처리하도록 다시 넣어둔다
+            self._queue.put(None)
+            raise queue.Empty
+        return item
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                batch = collect_batch(self._get, self.max_batch_size, self.max_wait_ms)
+            except queue.Empty:
+                continue
+
+            # 취소된 요청은 배치에서 제외
+            batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                outputs = self.run_batch([image for image, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f'run_batch returned {len(outputs)} results for {len(batch)} inputs')
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['items'] += len(batch)
+                self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
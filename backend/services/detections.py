@@ -0,0 +1,76 @@
+# 감지 결과 후처리: 라벨/금어기 매핑과 응답 형식
+
+# 라벨 매핑 (영어 -> 한국어)
+labels_korean = {
+ 0: '감성돔',
+ 1: '대구',
+ 2: '꽃게',
+ 3: '갈치',
+ 4: '말쥐치',
+ 5: '넙치',
+ 6: '조피볼락',
+ 7: '삼치',
+ 8: '문치가자미',
+ 9: '참문어',
+ 10: '돌돔',
+ 11: '참돔',
+ 12: '낙지',
+ 13: '대게',
+ 14: '살오징어',
+ 15: '옥돔',
+ 16: '주꾸미'
+}
+
+PROHIBITED_DATES = {
+    "넙치": "",
+    "조피볼락": "",
+    "참돔": "",
+    "감성돔": "05.01~05.31",
+    "돌돔": "",
+    "명태": "01.01~12.31",
+    "대구": "01.16~02.15",
+    "살오징어": "04.01~05.31",
+    "고등어": "04.01~06.30",
+    "삼치": "05.01~05.31",
+    "참문어": "05.16~06.30",
+    "전어": "05.01~07.15",
+    "말쥐치": "05.01~07.31",
+    "주꾸미": "05.11~08.31",
+    "낙지": "06.01~06.30",
+    "참홍어": "06.01~07.15",
+    "꽃게": "06.21~08.20",
+    "대게": "06.01~11.30",
+    "갈치": "07.01~07.31",
+    "참조기": "07.01~07.31",
+    "붉은대게": "07.10~08.25",
+    "옥돔": "07.21~08.20",
+    "연어": "10.01~11.30",
+    "쥐노래미": "11.01~12.31",
+    "문치가자미": "12.01~01.31"
+}
+
+CONF_SCORE = 0.5
+
+
+def build_detections(raw):
+    """Turn raw model boxes into the detection dicts returned by the API"""
+    detections = []
+    for cls, conf, bbox in zip(raw['cls'], raw['conf'], raw['xyxy']):
+        if float(conf) > CONF_SCORE:
+            label = labels_korean.get(int(cls), '알 수 없는 라벨')
+            detections.append({
+                'label': label,
+                'confidence': float(conf),
+                'prohibited_dates': PROHIBITED_DATES.get(labels_korean.get(int(cls), ''), ''),
+                'bbox': list(bbox)
+            })
+    detections.sort(key=lambda x: x['confidence'], reverse=True)
+    return detections
+
+
+def detection_failed_body(raw):
+    return {
+        'error': 'detection_failed',
+        'errorType': 'no_detection' if not raw['cls'] else 'low_confidence',
+        'message': '물고기를 감지할 수 없습니다.' if not raw['cls'] else '물고기를 정확하게 인식할 수 없습니다.'
+    }
@@ -0,0 +1,164 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 재시도할 응답 코드 (일시적인 서버 오류/요청 제한)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 다시 보내도 안전한 메서드만 재시도
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The upstream failed repeatedly; calls are refused until its cooldown ends."""
+
+
+class _Upstream:
+    """Keep-alive session, circuit breaker state and counters of one upstream."""
+
+    def __init__(self, name, pool_size):
+        self.name = name
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.failures = 0  # 연속 실패 수
+        self.open_until = 0.0
+        self.probing = False
+        self.stats = {'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+
+class HttpClient:
+    """
+    Outbound HTTP for every service module.
+
+    Each upstream (named by the caller, host by default) gets its own
+    requests.Session, so connections are kept alive and reused instead of
+    paying a TCP/TLS handshake per call. Calls have connect/read timeouts;
+    GET/HEAD/OPTIONS are retried `retries` times with full-jitter backoff
+    on connection errors, timeouts and 429/5xx. Every call goes through a
+    circuit breaker: after `failure_threshold` consecutive failed calls the
+    upstream is refused (CircuitOpenError, a requests ConnectionError) for
+    `cooldown` seconds, then a single probe call decides whether it closes.
+
+    `executor` is one long-lived thread pool for fanning out calls.
+    """
+
+    def __init__(self, connect_timeout=3.0, read_timeout=10.0, retries=2, backoff=0.2,
+                 failure_threshold=5, cooldown=30.0, pool_size=10, fanout_workers=8):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.pool_size = pool_size
+        self.executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix='http-fanout')
+        self._lock = threading.Lock()
+        self._upstreams = {}
+
+    def get(self, url, upstream=None, **kwargs):
+        return self.request('GET', url, upstream, **kwargs)
+
+    def request(self, method, url, upstream=None, **kwargs):
+        """
+        requests-style call that returns the final Response (which may still
+        be an error status) or raises a RequestException once retries are
+        exhausted.
+        """
+        state = self._upstream(upstream or urlsplit(url).netloc)
+        self._admit(state)
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = state.session.request(method, url, **kwargs)
+                error = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error = None, e
+            except Exception:
+                # 잘못된 URL 등 재시도해도 소용없는 오류
+                self._finish(state, time.perf_counter() - started, failed=True)
+                raise
+            failed = error is not None or response.status_code in RETRY_STATUSES
+            if not failed or attempt >= self.retries or method.upper() not in IDEMPOTENT_METHODS:
+                break
+            attempt += 1
+            with state.lock:
+                state.stats['retries'] += 1
+            # full jitter: 0 ~ backoff * 2^(시도-1) 초
+            time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+        self._finish(state, time.perf_counter() - started, failed=failed)
+        if error is not None:
+            raise error
+        return response
+
+    def stats(self, upstream=None):
+        with self._lock:
+            upstreams = dict(self._upstreams)
+        if upstream is not None:
+            return self._upstream_stats(upstreams[upstream]) if upstream in upstreams else {}
+        return {name: self._upstream_stats(state) for name, state in upstreams.items()}
+
+    def _upstream(self, name):
+        with self._lock:
+            state = self._upstreams.get(name)
+            if state is None:
+                state = self._upstreams[name] = _Upstream(name, self.pool_size)
+            return state
+
+    def _admit(self, state):
+        with state.lock:
+            if state.failures < self.failure_threshold:
+                return
+            if time.monotonic() >= state.open_until and not state.probing:
+                # 쿨다운이 끝나면 한 번만 시험 호출
+                state.probing = True
+                return
+            state.stats['rejected'] += 1
+        raise CircuitOpenError(f"Circuit open for {state.name}")
+
+    def _finish(self, state, seconds, failed):
+        with state.lock:
+            stats = state.stats
+            stats['calls'] += 1
+            stats['total_ms'] += seconds * 1000
+            stats['max_ms'] = max(stats['max_ms'], seconds * 1000)
+            state.probing = False
+            if not failed:
+                state.failures = 0
+                return
+            stats['errors'] += 1
+            state.failures += 1
+            if state.failures >= self.failure_threshold:
+                state.open_until = time.monotonic() + self.cooldown
+                logging.warning(f"Circuit opened for {state.name} after {state.failures} failed calls")
+
+    def _upstream_stats(self, state):
+        with state.lock:
+            stats = dict(state.stats)
+            is_open = state.failures >= self.failure_threshold
+        stats['avg_ms'] = round(stats.pop('total_ms') / max(stats['calls'], 1), 1)
+        stats['max_ms'] = round(stats['max_ms'], 1)
+        stats['circuit'] = 'open' if is_open else 'closed'
+        return stats
+
+
+# 모든 서비스 모듈이 함께 쓰는 클라이언트
+http = HttpClient(
+    connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '3')),
+    read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', '10')),
+    retries=int(os.getenv('HTTP_RETRIES', '2')),
+    backoff=float(os.getenv('HTTP_RETRY_BACKOFF', '0.2')),
+    failure_threshold=int(os.getenv('HTTP_CIRCUIT_FAILURES', '5')),
+    cooldown=float(os.getenv('HTTP_CIRCUIT_COOLDOWN', '30')),
+    pool_size=int(os.getenv('HTTP_POOL_SIZE', '10')),
+    fanout_workers=int(os.getenv('HTTP_FANOUT_WORKERS', '8')),
+)
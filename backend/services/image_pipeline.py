@@ -0,0 +1,115 @@
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+# 저장/응답용 이미지의 최대 변 길이
+MAX_IMAGE_SIZE = 1024
+# 모델 입력(letterbox) 크기
+MODEL_INPUT_SIZE = int(os.getenv('MODEL_INPUT_SIZE', '640'))
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def decode_image(source, max_size=MAX_IMAGE_SIZE, resize=True):
+    """
+    Decode an upload (path, file object or stream) to an RGB image whose
+    longest side is at most `max_size`.
+
+    For JPEGs the decoder is put in draft mode first, so libjpeg does the
+    1/2, 1/4 or 1/8 DCT scaling while decoding and the full-resolution pixels
+    are never materialized. Draft never goes below the requested size; with
+    `resize=True` the remaining step down to `max_size` is a single LANCZOS
+    resize. Images that are small enough are not resized.
+    """
+    image = Image.open(source)
+
+    width, height = image.size
+    longest = max(width, height)
+    if image.format == 'JPEG' and longest > max_size:
+        ratio = max_size / longest
+        image.draft('RGB', (max(1, int(width * ratio)), max(1, int(height * ratio))))
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if resize and max(image.size) > max_size:
+        image = image.resize(fit_size(image.size, max_size), Image.Resampling.LANCZOS)
+    else:
+        image.load()
+    return image
+
+
+def fit_size(size, max_size):
+    if max(size) <= max_size:
+        return size
+    ratio = max_size / max(size)
+    return tuple(max(1, int(dim * ratio)) for dim in size)
+
+
+def letterbox(image, size=MODEL_INPUT_SIZE):
+    """
+    Resize `image` once to fit a size x size square, pad the rest with the
+    YOLO letterbox grey and return (HWC uint8 RGB array, ratio, (pad_x, pad_y)).
+    """
+    width, height = image.size
+    ratio = min(size / width, size / height)
+    new_size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    pad = ((size - new_size[0]) // 2, (size - new_size[1]) // 2)
+
+    canvas = Image.new('RGB', (size, size), LETTERBOX_COLOR)
+    resized = image if new_size == image.size else image.resize(new_size, Image.Resampling.BILINEAR)
+    canvas.paste(resized, pad)
+    return np.asarray(canvas), ratio, pad
+
+
+class PreparedImage:
+    """
+    An upload decoded once and turned into the model's letterbox input.
+
+    `tensor` goes to the detector; `map_boxes()` converts boxes from tensor
+    coordinates to the coordinates of `output_image()`, the version that is
+    persisted or returned. That image and its JPEG encoding are produced
+    lazily, only when somebody asks for them.
+    """
+
+    def __init__(self, image, input_size=MODEL_INPUT_SIZE, max_size=MAX_IMAGE_SIZE):
+        self.image = image
+        self.max_size = max_size
+        self.output_size = fit_size(image.size, max_size)
+        self.tensor, self.ratio, self.pad = letterbox(image, input_size)
+        self._output_image = None
+
+    def map_boxes(self, raw):
+        # letterbox 좌표 -> 디코딩 이미지 좌표 -> 저장 이미지 좌표
+        scale_x = self.output_size[0] / self.image.size[0]
+        scale_y = self.output_size[1] / self.image.size[1]
+        pad_x, pad_y = self.pad
+        width, height = float(self.output_size[0]), float(self.output_size[1])
+        xyxy = []
+        for x1, y1, x2, y2 in raw['xyxy']:
+            xyxy.append([
+                min(max((x1 - pad_x) / self.ratio * scale_x, 0.0), width),
+                min(max((y1 - pad_y) / self.ratio * scale_y, 0.0), height),
+                min(max((x2 - pad_x) / self.ratio * scale_x, 0.0), width),
+                min(max((y2 - pad_y) / self.ratio * scale_y, 0.0), height),
+            ])
+        return {**raw, 'xyxy': xyxy}
+
+    def output_image(self):
+        if self._output_image is None:
+            if self.output_size == self.image.size:
+                self._output_image = self.image
+            else:
+                self._output_image = self.image.resize(self.output_size, Image.Resampling.LANCZOS)
+        return self._output_image
+
+    def to_jpeg(self, quality=85):
+        buffer = io.BytesIO()
+        self.output_image().save(buffer, format='JPEG', quality=quality, optimize=True)
+        return buffer.getvalue()
+
+
+def prepare_image(source, input_size=MODEL_INPUT_SIZE, max_size=MAX_IMAGE_SIZE):
+    # draft 디코딩 후 리사이즈는 letterbox 한 번만 수행
+    return PreparedImage(decode_image(source, max_size, resize=False), input_size, max_size)
@@ -0,0 +1,149 @@
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .image_pipeline import decode_image, fit_size
+
+# 크기 구간별 최대 변 길이 (큰 것부터 만들어 다음 단계의 원본으로 사용)
+VARIANT_SIZES = {'full': 1600, 'feed': 720, 'thumb': 200}
+VARIANT_FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_DIR = 'variants'
+
+
+def upload_key(url):
+    """
+    Path of an upload relative to the upload folder, for the forms stored in
+    the database ('abc.jpg', '/uploads/abc.jpg', '/uploads/avatars/x.jpg').
+    None for external URLs, placeholders and variants themselves.
+    """
+    if not url or url.startswith(('http://', 'https://', 'data:')):
+        return None
+    key = url.split('?', 1)[0]
+    if key.startswith('/uploads/'):
+        key = key[len('/uploads/'):]
+    key = key.lstrip('/')
+    if not key or key.startswith(f'{VARIANT_DIR}/') or key.startswith('placeholder') or '..' in key.split('/'):
+        return None
+    return key
+
+
+def variant_relpath(key, size, fmt):
+    ext = VARIANT_FORMATS[fmt][0]
+    return f'{VARIANT_DIR}/{os.path.splitext(key)[0]}/{size}.{ext}'
+
+
+def variant_urls(url, prefix='/uploads/'):
+    """
+    {'thumb': {'webp': ..., 'jpeg': ...}, 'feed': {...}, 'full': {...}} for
+    an upload, or None if `url` is not a local upload. `prefix` is put in
+    front of the path relative to the upload folder.
+    """
+    key = upload_key(url)
+    if not key:
+        return None
+    return {
+        size: {fmt: f'{prefix}{variant_relpath(key, size, fmt)}' for fmt in VARIANT_FORMATS}
+        for size in ('thumb', 'feed', 'full')
+    }
+
+
+def parse_variant_path(relpath):
+    """'variants/<stem>/<size>.<ext>' -> (stem, size) or None."""
+    parts = relpath.split('/')
+    if len(parts) < 3 or parts[0] != VARIANT_DIR:
+        return None
+    size, _, ext = parts[-1].partition('.')
+    if size not in VARIANT_SIZES or ext not in {spec[0] for spec in VARIANT_FORMATS.values()}:
+        return None
+    return '/'.join(parts[1:-1]), size
+
+
+def build_variants(upload_root, key, overwrite=False):
+    """Write every size/format variant of `key`. Returns the number of files written."""
+    source = os.path.join(upload_root, key)
+    targets = {
+        (size, fmt): os.path.join(upload_root, variant_relpath(key, size, fmt))
+        for size in VARIANT_SIZES for fmt in VARIANT_FORMATS
+    }
+    if not overwrite and all(os.path.exists(path) for path in targets.values()):
+        return 0
+
+    # 가장 큰 구간 크기로 한 번만 디코딩하고, 작은 구간은 직전 결과에서 줄인다
+    image = decode_image(source, max(VARIANT_SIZES.values()))
+    written = 0
+    for size, max_size in VARIANT_SIZES.items():
+        if max(image.size) > max_size:
+            image = image.resize(fit_size(image.size, max_size), Image.Resampling.LANCZOS)
+        for fmt, (_, pil_format, options) in VARIANT_FORMATS.items():
+            path = targets[(size, fmt)]
+            if not overwrite and os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            image.save(tmp_path, format=pil_format, **options)
+            os.replace(tmp_path, path)
+            written += 1
+    return written
+
+
+def remove_variants(upload_root, url):
+    key = upload_key(url)
+    if not key:
+        return
+    folder = os.path.join(upload_root, VARIANT_DIR, os.path.splitext(key)[0])
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+class VariantBuilder:
+    """
+    Builds upload variants on a small thread pool so request handlers only
+    pay for saving the original. schedule() ignores keys that are already
+    queued or being built.
+    """
+
+    def __init__(self, upload_root, num_workers=2):
+        self.upload_root = upload_root
+        self.num_workers = num_workers
+        self._executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='image-variants')
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stats = {'scheduled': 0, 'built': 0, 'skipped': 0, 'failed': 0}
+
+    def schedule(self, url):
+        key = upload_key(url)
+        if not key:
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self._stats['scheduled'] += 1
+        self._executor.submit(self._build, key)
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        stats['workers'] = self.num_workers
+        return stats
+
+    def _build(self, key):
+        try:
+            written = build_variants(self.upload_root, key)
+            outcome = 'built' if written else 'skipped'
+        except FileNotFoundError:
+            outcome = 'skipped'
+        except Exception as e:
+            logging.error(f"Building image variants for {key} failed: {e}")
+            outcome = 'failed'
+        with self._lock:
+            self._pending.discard(key)
+            self._stats[outcome] += 1
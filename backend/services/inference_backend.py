@@ -0,0 +1,254 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+# ultralytics predict() 기본값과 동일하게 맞춘 후처리 설정
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+
+
+def select_device():
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def to_nchw(images):
+    # letterbox 된 HWC uint8 RGB 배열들 -> NCHW float32 (0~1)
+    return np.ascontiguousarray(np.stack(images).transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+
+def _nms(boxes, scores, iou_threshold):
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def yolo_postprocess(output, conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD,
+                     max_detections=MAX_DETECTIONS):
+    """
+    Decode a raw YOLOv8-style head output of shape (batch, 4 + classes, anchors)
+    into the same per-image dicts TorchBackend returns.
+    """
+    results = []
+    for prediction in np.asarray(output, dtype=np.float32):
+        prediction = prediction.T  # (anchors, 4 + classes)
+        class_scores = prediction[:, 4:]
+        cls = class_scores.argmax(axis=1)
+        conf = class_scores[np.arange(len(cls)), cls]
+        mask = conf > conf_threshold
+        cx, cy, w, h = prediction[mask, :4].T
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        cls, conf = cls[mask], conf[mask]
+
+        # 클래스별 NMS: 클래스마다 좌표를 멀리 떨어뜨려 한 번에 처리
+        keep = _nms(boxes + cls[:, None] * 7680.0, conf, iou_threshold)[:max_detections]
+        results.append({
+            'cls': cls[keep].astype(float).tolist(),
+            'conf': conf[keep].astype(float).tolist(),
+            'xyxy': boxes[keep].astype(float).tolist(),
+        })
+    return results
+
+
+class TorchBackend:
+    """
+    Eager PyTorch YOLO checkpoint run through ultralytics.
+
+    predict_batch() takes a list of letterboxed HWC uint8 RGB arrays (see
+    services.image_pipeline.letterbox) and returns one dict per image with
+    plain lists `cls`, `conf` and `xyxy` in letterbox coordinates, so results
+    can cross process boundaries.
+    """
+    name = 'torch'
+
+    def __init__(self, model_path, device=None, num_threads=None):
+        import torch
+        from ultralytics import YOLO
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.torch = torch
+        self.model_path = model_path
+        self.device = device or select_device()
+        self.model = YOLO(model_path).to(self.device)
+
+    def predict_batch(self, images):
+        # 이미 letterbox 된 입력이므로 tensor로 넘겨 ultralytics 전처리를 건너뛴다
+        batch = self.torch.from_numpy(np.stack(images)).to(self.device)
+        batch = batch.permute(0, 3, 1, 2).float().div_(255.0)
+        results = self.model(batch, device=self.device, verbose=False)
+        return [{
+            'cls': result.boxes.cls.tolist(),
+            'conf': result.boxes.conf.tolist(),
+            'xyxy': result.boxes.xyxy.tolist(),
+        } for result in results]
+
+
+class OnnxBackend:
+    """Exported ONNX model on ONNX Runtime (CPU), same input/output contract as TorchBackend."""
+    name = 'onnx'
+
+    def __init__(self, model_path, device=None, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_batch(self, images):
+        output = self.session.run(None, {self.input_name: to_nchw(images)})[0]
+        return yolo_postprocess(output)
+
+
+class OpenVinoBackend:
+    """Exported OpenVINO IR model on the CPU plugin, same contract as TorchBackend."""
+    name = 'openvino'
+
+    def __init__(self, model_path, device=None, num_threads=None):
+        import openvino as ov
+
+        config = {'PERFORMANCE_HINT': 'THROUGHPUT'}
+        if num_threads:
+            config['INFERENCE_NUM_THREADS'] = num_threads
+        self.model_path = model_path
+        self.compiled = ov.Core().compile_model(model_path, 'CPU', config)
+
+    def predict_batch(self, images):
+        output = self.compiled(to_nchw(images))[self.compiled.output(0)]
+        return yolo_postprocess(output)
+
+
+def exported_model_path(model_path, backend, int8=False):
+    # ./models/best.pt -> ./models/best.onnx, ./models/best.int8.onnx,
+    #                     ./models/best_openvino_model/best.xml, ./models/best_int8_openvino_model/best.xml
+    stem, _ = os.path.splitext(model_path)
+    name = os.path.basename(stem)
+    if backend == 'onnx':
+        return f'{stem}.int8.onnx' if int8 else f'{stem}.onnx'
+    if backend == 'openvino':
+        folder = f'{stem}_int8_openvino_model' if int8 else f'{stem}_openvino_model'
+        return os.path.join(folder, f'{name}.xml')
+    return model_path
+
+
+def load_calibration_images(calib_dir, input_size, limit=300):
+    from .image_pipeline import prepare_image
+
+    paths = sorted(
+        path for pattern in ('*.jpg', '*.jpeg', '*.png')
+        for path in glob.glob(os.path.join(calib_dir, '**', pattern), recursive=True)
+    )[:limit]
+    if not paths:
+        raise FileNotFoundError(f'No calibration images found in {calib_dir}')
+    return [prepare_image(path, input_size=input_size).tensor for path in paths]
+
+
+def export_model(model_path, backend, int8=False, calib_dir=None, input_size=640):
+    """
+    Export the ultralytics checkpoint once to ONNX or OpenVINO, optionally
+    quantized to INT8 with calibration images from `calib_dir`.
+    Returns the path of the exported model; existing exports are reused.
+    """
+    if backend not in ('onnx', 'openvino'):
+        raise ValueError(f'Cannot export to {backend}')
+    target = exported_model_path(model_path, backend, int8)
+    if os.path.exists(target):
+        return target
+
+    fp32_path = exported_model_path(model_path, backend)
+    if not os.path.exists(fp32_path):
+        from ultralytics import YOLO
+        # 배치 추론을 위해 dynamic batch로 export
+        YOLO(model_path).export(format=backend, imgsz=input_size, dynamic=True, simplify=backend == 'onnx')
+    if not int8:
+        return fp32_path
+
+    if not calib_dir:
+        raise ValueError('INT8 export needs a calibration image folder')
+    calibration = load_calibration_images(calib_dir, input_size)
+
+    if backend == 'onnx':
+        import onnxruntime as ort
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+        input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+        class _Reader(CalibrationDataReader):
+            def __init__(self):
+                self.items = iter({input_name: to_nchw([image])} for image in calibration)
+
+            def get_next(self):
+                return next(self.items, None)
+
+        quantize_static(
+            fp32_path, target, _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    else:
+        import nncf
+        import openvino as ov
+
+        model = ov.Core().read_model(fp32_path)
+        dataset = nncf.Dataset(calibration, lambda image: to_nchw([image]))
+        quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        ov.save_model(quantized, target)
+    return target
+
+
+def resolve_model_path(model_path, backend='torch', int8=False, calib_dir=None, input_size=640):
+    """Path to load for `backend`, exporting the checkpoint first if needed."""
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown inference backend: {backend}')
+    if backend == 'torch':
+        return model_path
+    return export_model(model_path, backend, int8=int8, calib_dir=calib_dir, input_size=input_size)
+
+
+def load_backend(model_path, device=None, num_threads=None, backend='torch'):
+    if backend == 'onnx':
+        return OnnxBackend(model_path, num_threads=num_threads)
+    if backend == 'openvino':
+        return OpenVinoBackend(model_path, num_threads=num_threads)
+    return TorchBackend(model_path, device=device, num_threads=num_threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the YOLO checkpoint to an optimized CPU backend')
+    parser.add_argument('model', help='ultralytics checkpoint, e.g. ./models/best.pt')
+    parser.add_argument('--backend', choices=['onnx', 'openvino'], required=True)
+    parser.add_argument('--int8', action='store_true', help='quantize to INT8 (needs --calib-dir)')
+    parser.add_argument('--calib-dir', help='folder of representative images for INT8 calibration')
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args()
+
+    path = export_model(args.model, args.backend, int8=args.int8, calib_dir=args.calib_dir, input_size=args.imgsz)
+    print(f'Exported {args.model} -> {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch_scheduler import collect_batch
+
+# 모델 로드에 실패한 워커의 종료 코드 (다시 띄워도 같은 결과이므로 재시작하지 않음)
+LOAD_FAILED_EXIT_CODE = 3
+
+
+def _worker_main(worker_id, backend_kwargs, request_queue, result_queue, max_batch_size, max_wait_ms):
+    from .inference_backend import load_backend
+
+    try:
+        backend = load_backend(**backend_kwargs)
+    except Exception as e:
+        result_queue.put(('worker_failed', worker_id, repr(e)))
+        result_queue.close()
+        result_queue.join_thread()
+        os._exit(LOAD_FAILED_EXIT_CODE)
+    result_queue.put(('worker_ready', worker_id, None))
+
+    stopping = False
+
+    def get(timeout):
+        nonlocal stopping
+        item = request_queue.get(timeout=timeout)
+        if item is None:
+            # 모은 배치는 마저 처리하고 루프를 빠져나간다
+            stopping = True
+            raise queue.Empty
+        return item
+
+    while not stopping:
+        try:
+            batch = collect_batch(get, max_batch_size, max_wait_ms)
+        except queue.Empty:
+            continue
+
+        # 이 워커가 죽으면 부모가 이 작업들을 실패 처리할 수 있도록 먼저 알린다
+        result_queue.put(('taken', os.getpid(), [job_id for job_id, _, _ in batch]))
+        handles = []
+        images = []
+        jobs = []
+        try:
+            for job_id, shm_name, shape in batch:
+                # spawn 워커는 부모의 resource_tracker를 공유하므로 unlink는 부모가 맡는다
+                try:
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                except FileNotFoundError:
+                    # 호출자가 기다리다 포기해 이미 회수된 작업
+                    continue
+                handles.append(shm)
+                jobs.append(job_id)
+                # 복사 없이 공유 메모리를 그대로 배치 입력으로 사용
+                images.append(np.ndarray(shape, dtype=np.uint8, buffer=shm.buf))
+            outputs = backend.predict_batch(images) if images else []
+            for job_id, output in zip(jobs, outputs):
+                result_queue.put(('result', job_id, output))
+        except Exception as e:
+            for job_id in jobs:
+                result_queue.put(('error', job_id, repr(e)))
+        finally:
+            del images
+            for shm in handles:
+                shm.close()
+
+
+class InferencePool:
+    """
+    Pool of inference worker processes, each holding its own copy of the model.
+
+    submit() copies the image once into a shared memory segment and returns a
+    Future; only the segment name travels through the queue. Workers pull
+    jobs from one shared queue and micro-batch whatever is waiting, so idle
+    workers pick up load automatically.
+
+    A job whose caller gives up (predict() timeout, or future.cancel()) is
+    dropped and its segment unlinked. Jobs a worker had taken when it died
+    fail and the worker is restarted. Workers that cannot load the model
+    exit and are not restarted; when none is left the pool is unhealthy and
+    every pending and later job fails at once.
+    """
+
+    def __init__(self, model_path, device=None, num_workers=None, max_batch_size=4,
+                 max_wait_ms=5.0, threads_per_worker=None, backend='torch'):
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or cpu_count
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.backend_kwargs = {
+            'model_path': model_path,
+            'device': device,
+            'num_threads': threads_per_worker or max(1, cpu_count // self.num_workers),
+            'backend': backend,
+        }
+
+        self._ctx = mp.get_context('spawn')  # torch는 fork 이후 안전하지 않음
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}  # job_id -> (future, shm)
+        self._taken = {}  # job_id -> 처리 중인 워커 pid
+        self._dead_pids = set()
+        self._ready = set()
+        self._load_failed = set()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'worker_restarts': 0}
+        self._stopped = False
+        self.error = None  # 모든 워커가 모델 로드에 실패하면 그 오류
+
+        self._workers = [self._spawn(i) for i in range(self.num_workers)]
+        self._collector = threading.Thread(target=self._collect, name='inference-pool-collector', daemon=True)
+        self._collector.start()
+
+    def _spawn(self, worker_id):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.backend_kwargs, self._requests, self._results,
+                  self.max_batch_size, self.max_wait_ms),
+            name=f'inference-worker-{worker_id}',
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def submit(self, image):
+        if self._stopped:
+            raise RuntimeError('InferencePool is stopped')
+        if self.error is not None:
+            raise RuntimeError(f'Inference workers failed to load the model: {self.error}')
+
+        # letterbox 된 입력 배열을 공유 메모리에 한 번만 복사
+        array = np.asarray(image, dtype=np.uint8)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf)[...] = array
+
+        future = Future()
+        job_id = next(self._ids)
+        future.job_id = job_id
+        with self._lock:
+            self._pending[job_id] = (future, shm)
+            self._stats['submitted'] += 1
+        self._requests.put((job_id, shm.name, array.shape))
+        return future
+
+    def predict(self, image, timeout=None):
+        future = self.submit(image)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            self.cancel(future)
+            raise
+
+    def cancel(self, future):
+        """Give up on a submitted job: fail its future and release its shared memory."""
+        future.cancel()
+        self._finish(future.job_id, cancelled=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._pending)
+            stats['ready_workers'] = len(self._ready)
+            stats['load_failed_workers'] = len(self._load_failed)
+        stats['error'] = self.error
+        stats['workers'] = self.num_workers
+        stats['alive_workers'] = sum(1 for process in self._workers if process.is_alive())
+        return stats
+
+    def _finish(self, job_id, result=None, error=None, cancelled=False):
+        with self._lock:
+            entry = self._pending.pop(job_id, None)
+            self._taken.pop(job_id, None)
+            if entry:
+                self._stats['cancelled' if cancelled else 'completed' if error is None else 'failed'] += 1
+        if not entry:
+            return
+        future, shm = entry
+        shm.close()
+        shm.unlink()
+        if cancelled or not future.set_running_or_notify_cancel():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(f'Inference worker error: {error}'))
+
+    def _collect(self):
+        last_check = time.monotonic()
+        while not self._stopped:
+            if time.monotonic() - last_check > 1.0:
+                self._reap_cancelled()
+                self._restart_dead_workers()
+                last_check = time.monotonic()
+            try:
+                kind, key, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == 'result':
+                self._finish(key, result=payload)
+            elif kind == 'error':
+                self._finish(key, error=payload)
+            elif kind == 'taken':
+                self._mark_taken(key, payload)
+            elif kind == 'worker_ready':
+                with self._lock:
+                    self._ready.add(key)
+            elif kind == 'worker_failed':
+                self._worker_load_failed(key, payload)
+
+    def _mark_taken(self, pid, job_ids):
+        with self._lock:
+            dead = pid in self._dead_pids
+            if not dead:
+                for job_id in job_ids:
+                    if job_id in self._pending:
+                        self._taken[job_id] = pid
+        if dead:
+            # 워커가 죽은 뒤에 도착한 알림
+            for job_id in job_ids:
+                self._finish(job_id, error='inference worker died')
+
+    def _worker_load_failed(self, worker_id, error):
+        logging.error(f"Inference worker {worker_id} failed to load model: {error}")
+        with self._lock:
+            self._ready.discard(worker_id)
+            self._load_failed.add(worker_id)
+            unhealthy = len(self._load_failed) == self.num_workers
+            if unhealthy:
+                self.error = error
+                pending = list(self._pending)
+        if unhealthy:
+            for job_id in pending:
+                self._finish(job_id, error=f'no inference worker could load the model: {error}')
+
+    def _reap_cancelled(self):
+        # future.cancel()만 하고 떠난 호출자의 작업 회수
+        with self._lock:
+            cancelled = [job_id for job_id, (future, _) in self._pending.items() if future.cancelled()]
+        for job_id in cancelled:
+            self._finish(job_id, cancelled=True)
+
+    def _restart_dead_workers(self):
+        for i, process in enumerate(self._workers):
+            if self._stopped or process.is_alive() or process.exitcode in (0, None, LOAD_FAILED_EXIT_CODE):
+                continue
+            logging.error(f"Inference worker {i} exited with code {process.exitcode}, restarting")
+            with self._lock:
+                self._ready.discard(i)
+                self._stats['worker_restarts'] += 1
+                self._dead_pids.add(process.pid)
+                lost = [job_id for job_id, pid in self._taken.items() if pid == process.pid]
+            for job_id in lost:
+                self._finish(job_id, error=f'inference worker exited with code {process.exitcode}')
+            self._workers[i] = self._spawn(i)
+
+    def stop(self, timeout=10):
+        if self._stopped:
+            return
+        self._stopped = True
+        for _ in self._workers:
+            self._requests.put(None)
+        for process in self._workers:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            pending = list(self._pending)
+        for job_id in pending:
+            self._finish(job_id, error='pool stopped')
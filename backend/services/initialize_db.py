@@ -19,6 +19,7 @@ def insert_tidal_data():
         return
 
     from main import engine, TidalObservation
+    from services.tide_stations import parse_capabilities
 
     # SQLAlchemy 세션 생성
     Session = sessionmaker(bind=engine)
@@ -42,6 +43,7 @@ def insert_tidal_data():
                     obs_lat=float(entry['obs_lat']),
                     obs_lon=float(entry['obs_lon']),
                     obs_object=entry['obs_object'],
+                    capabilities=parse_capabilities(entry['obs_object']),
                 ))
             except (KeyError, ValueError, TypeError) as e:
                 print(f"Skipping invalid entry: {entry}, Error: {e}")
@@ -0,0 +1,102 @@
+import threading
+import time
+
+
+class Leaderboard:
+    """
+    The top `size` posts kept in memory.
+
+    `load(limit)` returns the best `limit` entries (dicts) from the database
+    in ranking order; `key(entry)` is the sort key, higher first. The board
+    keeps `depth` >= `size` entries so posts can move up and down without a
+    reload, and records the key of the best entry it does not hold (`floor`):
+    a post below the floor may be outranked by posts the board never saw, so
+    it is dropped instead of guessed at.
+
+    Writes in this process update the board right away. Writes in other
+    worker processes show up at the latest after `max_age` seconds, when the
+    next read reloads it. top() never touches the database otherwise.
+    """
+
+    def __init__(self, load, key, size=5, depth=20, max_age=30):
+        self.load = load
+        self.key = key
+        self.size = size
+        self.depth = max(depth, size)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._entries = []  # (key, entry) 내림차순
+        self._floor = None
+        self._loaded_at = None
+        self._stats = {'hits': 0, 'reloads': 0, 'updates': 0}
+
+    def top(self):
+        with self._lock:
+            if self._fresh():
+                self._stats['hits'] += 1
+                return [entry for _, entry in self._entries[:self.size]]
+        with self._reload_lock:
+            with self._lock:
+                if self._fresh():  # 다른 스레드가 방금 다시 읽은 경우
+                    self._stats['hits'] += 1
+                    return [entry for _, entry in self._entries[:self.size]]
+            entries = self.load(self.depth)
+            with self._lock:
+                self._entries = [(self.key(entry), entry) for entry in entries]
+                self._floor = self._entries[-1][0] if len(self._entries) >= self.depth else None
+                self._loaded_at = time.monotonic()
+                self._stats['reloads'] += 1
+                return [entry for _, entry in self._entries[:self.size]]
+
+    def wants(self, key):
+        """Whether an entry with this key would be on the board (to skip building it)."""
+        with self._lock:
+            return self._loaded_at is not None and (self._floor is None or key > self._floor)
+
+    def put(self, entry):
+        """Insert or move an entry after its likes (or content) changed."""
+        key = self.key(entry)
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._stats['updates'] += 1
+            self._discard(entry['post_id'])
+            if self._floor is not None and key <= self._floor:
+                return
+            index = next((i for i, (other, _) in enumerate(self._entries) if key > other), len(self._entries))
+            self._entries.insert(index, (key, entry))
+            while len(self._entries) > self.depth:
+                dropped, _ = self._entries.pop()
+                self._floor = dropped if self._floor is None else max(self._floor, dropped)
+
+    def contains(self, post_id):
+        with self._lock:
+            return any(entry['post_id'] == post_id for _, entry in self._entries)
+
+    def remove(self, post_id):
+        with self._lock:
+            self._stats['updates'] += 1
+            self._discard(post_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['age'] = round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+        stats['max_age'] = self.max_age
+        return stats
+
+    def _fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            return False
+        # 보드에서 빠진 글 때문에 size보다 적게 남았고 보드 밖에 글이 더 있을 수 있으면 다시 읽는다
+        return len(self._entries) >= self.size or self._floor is None
+
+    def _discard(self, post_id):
+        self._entries = [(k, entry) for k, entry in self._entries if entry['post_id'] != post_id]
+
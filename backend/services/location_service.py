@@ -1,6 +1,8 @@
 import requests
 import os
 
+from services.http_client import http
+
 # 환경변수에서 WEATHER_API_KEY를 가져옵니다.
 KAKAO_API_KEY = os.getenv('KAKAO_API_KEY')
 
@@ -11,7 +13,7 @@ def get_location_by_coordinates(lat, lon):
             "Authorization": KAKAO_API_KEY,
         }
 
-        response = requests.get(url, headers=headers)
+        response = http.get(url, upstream='kakao', headers=headers)
         response.raise_for_status()  # Raise an error for bad status codes
 
         data = response.json()
@@ -0,0 +1,88 @@
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor for the row a page ended on."""
+    payload = json.dumps({'t': created_at.isoformat(), 'id': row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, row_id) from encode_cursor(); raises ValueError for anything else."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['t']), int(payload['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
+
+
+def keyset_page(query, created_column, id_column, cursor=None, limit=10, offset=0):
+    """
+    Newest-first page of `query` ordered by (created_at, id), starting after
+    `cursor`. Fetches one extra row to know whether another page exists.
+    Returns (rows, next_cursor or None). `rows` are whatever the query
+    yields; the first entity of each row must have the two key attributes.
+    `offset` only exists for old page-number clients.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_column < created_at,
+            and_(created_column == created_at, id_column < row_id),
+        ))
+    query = query.order_by(created_column.desc(), id_column.desc())
+    if offset:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        entity = last[0] if isinstance(last, tuple) or hasattr(last, '_fields') else last
+        next_cursor = encode_cursor(getattr(entity, created_column.key), getattr(entity, id_column.key))
+    return rows, next_cursor
+
+
+class CachedCount:
+    """A count(*) that is recomputed at most every `ttl` seconds, or after invalidate()."""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, load):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+        value = load()
+        with self._lock:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+def slice_page(items, limit, next_cursor, id_key):
+    """
+    Cut a cached first page of serialized rows (dicts with 'created_at' and
+    `id_key`, fetched with the largest page size) down to `limit` rows and
+    rebuild the cursor keyset_page() would have returned for that size.
+    """
+    if len(items) > limit:
+        last = items[limit - 1]
+        return items[:limit], encode_cursor(datetime.fromisoformat(last['created_at']), last[id_key])
+    return items, next_cursor
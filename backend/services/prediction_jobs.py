@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class PredictionJobQueue:
+    """
+    Background queue for prediction jobs.
+
+    submit() spools the uploaded bytes to `spool_dir`, queues the job and
+    returns its id immediately. `num_workers` threads take jobs off the
+    queue and call `handler(file_object, **kwargs)`, which must return
+    (response_data, status_code).
+
+    The job record (status, owner, result) is a JSON file next to the
+    spooled upload, replaced atomically on every status change, so a poll
+    answered by any gunicorn worker sharing `spool_dir` sees the job. Files
+    untouched for `result_ttl` seconds (finished results, or jobs left
+    behind by a worker that exited) are swept at most every
+    `sweep_interval` seconds from submit().
+    """
+
+    def __init__(self, handler, spool_dir, num_workers=2, max_queue=100, result_ttl=600, sweep_interval=60):
+        self.handler = handler
+        self.spool_dir = spool_dir
+        self.num_workers = num_workers
+        self.result_ttl = result_ttl
+        self.sweep_interval = sweep_interval
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._last_sweep = 0.0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'swept': 0}
+        self._workers = [
+            threading.Thread(target=self._loop, name=f'prediction-job-{i}', daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, data, owner_id=None, **kwargs):
+        """Returns the job id, or raises queue.Full when the queue is at capacity."""
+        self._maybe_sweep()
+        job_id = uuid.uuid4().hex
+        path = self._path(job_id, 'upload')
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'owner_id': owner_id,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'status_code': None,
+        }
+        self._write(job)
+        try:
+            self._queue.put_nowait((job, path, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            self._remove(self._path(job_id, 'json'))
+            self._remove(path)
+            raise
+        with self._lock:
+            self._stats['submitted'] += 1
+        return job_id
+
+    def get(self, job_id):
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id, 'json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['busy_workers'] = self._busy
+        try:
+            stats['tracked_jobs'] = sum(1 for name in os.listdir(self.spool_dir) if name.endswith('.json'))
+        except OSError:
+            stats['tracked_jobs'] = None
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        stats['workers'] = self.num_workers
+        return stats
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.spool_dir, f'{job_id}.{extension}')
+
+    def _write(self, job):
+        path = self._path(job['job_id'], 'json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _maybe_sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+
+        swept = 0
+        try:
+            entries = list(os.scandir(self.spool_dir))
+        except OSError as e:
+            logging.warning(f"Prediction job sweep failed: {e}")
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.result_ttl:
+                    os.remove(entry.path)
+                    swept += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._stats['swept'] += swept
+
+    def _loop(self):
+        while True:
+            job, path, kwargs = self._queue.get()
+            with self._lock:
+                self._busy += 1
+            job.update({'status': 'running', 'started_at': time.time()})
+            try:
+                self._write(job)
+                with open(path, 'rb') as f:
+                    result, status_code = self.handler(f, **kwargs)
+                status = 'done'
+            except Exception as e:
+                logging.error(f"Prediction job {job['job_id']} failed: {e}")
+                result, status_code = {'error': '이미지 처리 중 오류가 발생했습니다.'}, 500
+                status = 'failed'
+            finally:
+                self._remove(path)
+
+            job.update({
+                'status': status,
+                'finished_at': time.time(),
+                'result': result,
+                'status_code': status_code,
+            })
+            try:
+                self._write(job)
+            except (OSError, TypeError, ValueError) as e:
+                # 결과를 저장하지 못하면 폴링하는 쪽이 무한히 기다리지 않도록 실패로 기록
+                logging.error(f"Could not store prediction job {job['job_id']}: {e}")
+                status = 'failed'
+                job.update({'status': status, 'result': {'error': '이미지 처리 중 오류가 발생했습니다.'},
+                            'status_code': 500})
+                try:
+                    self._write(job)
+                except OSError:
+                    pass
+            with self._lock:
+                self._busy -= 1
+                self._stats['completed' if status == 'done' else 'failed'] += 1
@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """In-process LRU of JSON strings with a per-entry TTL. Each worker has its own copy."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, items, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, payload in items.items():
+                self._entries[key] = (expires_at, payload)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Redis (or any server speaking its protocol) shared by every worker, so
+    an invalidation in one process is seen by all of them. Requires the
+    `redis` package; keys are prefixed so several apps can share a server.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='snapish:', timeout=0.2):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self.prefix + key for key in keys])
+        return {key: value.decode() for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items, ttl):
+        pipeline = self._client.pipeline(transaction=False)
+        for key, payload in items.items():
+            pipeline.set(self.prefix + key, payload, ex=max(1, int(ttl)))
+        pipeline.execute()
+
+    def delete_many(self, keys):
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=f'{self.prefix}*', count=500))
+        for start in range(0, len(keys), 500):
+            self._client.delete(*keys[start:start + 500])
+
+    def size(self):
+        return None
+
+
+def make_backend(spec, max_entries=2048):
+    """'memory', 'off' or a redis:// URL (RESPONSE_CACHE)."""
+    spec = (spec or 'memory').strip()
+    if spec == 'off':
+        return None
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(spec)
+    if spec != 'memory':
+        raise ValueError(f"Unknown cache backend {spec!r}; use 'memory', 'off' or a redis:// URL")
+    return MemoryBackend(max_entries)
+
+
+class ResponseCache:
+    """
+    Read-through cache for JSON-serializable values, grouped into namespaces
+    ('post', 'feed', ...) that have their own hit/miss counters.
+
+    Values are stored as JSON, so every get returns a fresh copy the caller
+    may add per-user fields to. Write paths delete the keys they make stale;
+    `ttl` only bounds how long a value can outlive a missed invalidation
+    (a reader storing what it loaded just before a concurrent write). If the
+    backend fails, lookups count as misses and the error is logged, so the
+    cache can go away without taking reads with it.
+    """
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._errors = 0
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, namespace, key):
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace, keys):
+        keys = list(keys)
+        if not self.enabled or not keys:
+            return {}
+        try:
+            found = self.backend.get_many([f'{namespace}:{key}' for key in keys])
+            values = {key: json.loads(found[f'{namespace}:{key}']) for key in keys if f'{namespace}:{key}' in found}
+        except Exception as e:
+            self._failed('get', e)
+            values = {}
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+            stats['hits'] += len(values)
+            stats['misses'] += len(keys) - len(values)
+        return values
+
+    def set(self, namespace, key, value, ttl=None):
+        self.set_many(namespace, {key: value}, ttl)
+
+    def set_many(self, namespace, values, ttl=None):
+        if not self.enabled or not values:
+            return
+        try:
+            self.backend.set_many(
+                {f'{namespace}:{key}': json.dumps(value, separators=(',', ':')) for key, value in values.items()},
+                ttl or self.ttl,
+            )
+        except Exception as e:
+            self._failed('set', e)
+
+    def delete(self, namespace, *keys):
+        if not self.enabled or not keys:
+            return
+        try:
+            self.backend.delete_many([f'{namespace}:{key}' for key in keys])
+        except Exception as e:
+            self._failed('delete', e)
+
+    def clear(self):
+        if not self.enabled:
+            return
+        try:
+            self.backend.clear()
+        except Exception as e:
+            self._failed('clear', e)
+
+    def stats(self):
+        with self._lock:
+            namespaces = {
+                namespace: dict(counts, hit_rate=round(counts['hits'] / max(counts['hits'] + counts['misses'], 1), 3))
+                for namespace, counts in self._stats.items()
+            }
+            errors = self._errors
+        stats = {'backend': self.backend.name if self.enabled else 'off', 'ttl': self.ttl,
+                 'errors': errors, 'namespaces': namespaces}
+        if self.enabled:
+            try:
+                stats['entries'] = self.backend.size()
+            except Exception:
+                stats['entries'] = None
+        return stats
+
+    def _failed(self, operation, error):
+        with self._lock:
+            self._errors += 1
+        logging.warning(f"Response cache {operation} failed: {error}")
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Flight:
+    """One upstream call in progress; followers wait on `done` and read the outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """
+    In-process TTL cache for slow upstream calls.
+
+    get(key, fetch, ttl, stale_ttl):
+      - fresh entry (younger than `ttl`): returned without calling upstream.
+      - stale entry (up to `stale_ttl` seconds past `ttl`): returned at once
+        while one background thread refreshes it.
+      - otherwise `fetch()` runs once; concurrent callers for the same key
+        wait for that call instead of making their own.
+
+    `fetch()` raising means "nothing to cache": waiting callers get the same
+    exception, and a failed background refresh keeps the stale value.
+
+    Background refreshes run on `executor`, by default a small pool of
+    `refresh_workers` long-lived threads owned by the cache. It should not be
+    a pool whose threads may call get(): a caller waiting on a refresh still
+    queued behind it would never be woken.
+    """
+
+    def __init__(self, max_entries=1024, refresh_workers=2, executor=None):
+        self.max_entries = max_entries
+        self.executor = executor or ThreadPoolExecutor(max_workers=refresh_workers,
+                                                       thread_name_prefix='cache-refresh')
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self._flights = {}  # key -> _Flight
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0, 'errors': 0}
+
+    def get(self, key, fetch, ttl, stale_ttl=0):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[2]:
+                self._entries.move_to_end(key)
+                if now < entry[1]:
+                    self._stats['hits'] += 1
+                    return entry[0]
+                # 만료됐지만 허용 범위 안: 이전 값을 주고 한 번만 백그라운드 갱신
+                self._stats['stale_hits'] += 1
+                if key not in self._flights:
+                    flight = self._flights[key] = _Flight()
+                    self._stats['refreshes'] += 1
+                    try:
+                        self.executor.submit(self._run, key, fetch, ttl, stale_ttl)
+                    except RuntimeError:
+                        # 종료 중이라 실행기가 닫힘: 갱신 없이 이전 값만 준다
+                        del self._flights[key]
+                        flight.done.set()
+                return entry[0]
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['coalesced'] += 1
+        if leader:
+            self._run(key, fetch, ttl, stale_ttl)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['in_flight'] = len(self._flights)
+        served = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits'] + stats['coalesced']) / max(served, 1), 3)
+        return stats
+
+    def _run(self, key, fetch, ttl, stale_ttl):
+        with self._lock:
+            flight = self._flights[key]
+        try:
+            flight.value = fetch()
+        except Exception as e:
+            flight.error = e
+            logging.warning(f"Upstream fetch for {key} failed: {e}")
+        with self._lock:
+            if flight.error is None:
+                now = time.monotonic()
+                self._entries[key] = (flight.value, now + ttl, now + ttl + stale_ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._stats['errors'] += 1
+            del self._flights[key]
+        flight.done.set()
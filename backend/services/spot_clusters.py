@@ -0,0 +1,42 @@
+import math
+
+METERS_PER_DEGREE = 111320
+
+# 카카오맵 레벨 1에서 화면 1px이 나타내는 대략적인 거리(m), 레벨이 1 오를 때마다 두 배
+LEVEL1_METERS_PER_PIXEL = 0.25
+MIN_LEVEL, MAX_LEVEL = 1, 14
+
+
+def parse_bbox(value):
+    """'west,south,east,north' in degrees -> tuple of floats; raises ValueError."""
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f'Invalid bbox: {value!r}') from e
+    if not all(math.isfinite(v) for v in (west, south, east, north)) or west > east or south > north:
+        raise ValueError(f'Invalid bbox: {value!r}')
+    return west, south, east, north
+
+
+def clamp_level(level):
+    return min(max(level, MIN_LEVEL), MAX_LEVEL)
+
+
+def cell_size(level, cell_px=60):
+    """Edge (degrees) of a grid cell that covers about `cell_px` screen pixels at a Kakao map level."""
+    meters_per_pixel = LEVEL1_METERS_PER_PIXEL * 2 ** (clamp_level(level) - 1)
+    return cell_px * meters_per_pixel / METERS_PER_DEGREE
+
+
+def snap_bbox(bbox, cell):
+    """
+    Grow a bbox outward to whole grid cells, so a cluster on the edge of
+    the screen counts all of its spots and does not change while panning.
+    """
+    west, south, east, north = bbox
+    return (
+        math.floor(west / cell) * cell,
+        math.floor(south / cell) * cell,
+        (math.floor(east / cell) + 1) * cell,
+        (math.floor(north / cell) + 1) * cell,
+    )
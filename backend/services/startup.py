@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Wall-clock timings of the startup phases, measured from process start."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._phases = []
+        self._lock = threading.Lock()
+        self._last_mark = self.started_at
+
+    def mark(self, name):
+        # 직전 mark 이후 경과 시간을 하나의 단계로 기록 (메인 스레드의 순차 단계용)
+        now = time.perf_counter()
+        self.record(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._phases.append({
+                'phase': name,
+                'ms': round(seconds * 1000, 1),
+                'thread': threading.current_thread().name,
+            })
+
+    def as_dict(self):
+        with self._lock:
+            phases = list(self._phases)
+        return {
+            'phases': phases,
+            'since_start_ms': round((time.perf_counter() - self.started_at) * 1000, 1),
+        }
+
+    def log(self):
+        lines = [f"  {p['phase']:<24} {p['ms']:>9.1f} ms  [{p['thread']}]" for p in self.as_dict()['phases']]
+        print("Startup timing report:\n" + "\n".join(lines))
+
+
+class LazyDetector:
+    """
+    Builds the real detector (BatchScheduler or InferencePool) on a
+    background thread and runs a warmup prediction, so the app can start
+    serving other routes immediately. Nothing is loaded until start() is
+    called (the server entry point, the readiness probe) or the detector is
+    first used, so importing the app for CLI commands or scripts stays
+    cheap. submit()/predict() wait for loading to finish; `state` is
+    'idle', 'loading', 'ready' or 'failed'.
+    """
+
+    def __init__(self, build, warmup=None, report=None, load_timeout=600):
+        self.load_timeout = load_timeout
+        self.state = 'idle'
+        self.error = None
+        self._build = build
+        self._warmup = warmup
+        self._report = report or StartupReport()
+        self._detector = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Begin loading in the background; later calls do nothing."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self.state = 'loading'
+                self._thread = threading.Thread(target=self._load, name='model-loader', daemon=True)
+                self._thread.start()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def _load(self):
+        try:
+            with self._report.phase('model load'):
+                detector = self._build()
+            if self._warmup:
+                with self._report.phase('warmup inference'):
+                    self._warmup(detector)
+            self._detector = detector
+            self.state = 'ready'
+        except Exception as e:
+            logging.error(f"Model loading failed: {e}")
+            self.error = repr(e)
+            self.state = 'failed'
+        finally:
+            self._ready.set()
+            self._report.log()
+
+    def wait(self, timeout=None):
+        self.start()
+        if not self._ready.wait(self.load_timeout if timeout is None else timeout):
+            raise TimeoutError('Model is still loading')
+        if self._detector is None:
+            raise RuntimeError(f'Model failed to load: {self.error}')
+        return self._detector
+
+    def submit(self, image):
+        return self.wait().submit(image)
+
+    def predict(self, image, timeout=None):
+        return self.wait().predict(image, timeout=timeout)
+
+    def cancel(self, future):
+        """Give up on a submitted job so the detector can release it."""
+        detector = self._detector
+        if detector is not None and hasattr(detector, 'cancel'):
+            detector.cancel(future)
+        else:
+            future.cancel()
+
+    def stats(self):
+        stats = {'state': self.state, 'error': self.error}
+        if self._detector is not None:
+            stats.update(self._detector.stats())
+        return stats
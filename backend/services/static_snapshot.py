@@ -0,0 +1,96 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+
+
+def _brotli(data, quality):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=quality)
+
+
+class Snapshot:
+    """
+    One JSON document serialized once and compressed once per encoding.
+    Each encoding is its own representation, so each gets its own strong
+    ETag derived from the content hash.
+    """
+
+    def __init__(self, payload, brotli_quality=9):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.version = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {'identity': self.body, 'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)}
+        compressed = _brotli(self.body, brotli_quality)
+        if compressed is not None:
+            self.encoded['br'] = compressed
+
+    def etag(self, encoding):
+        return self.version if encoding == 'identity' else f'{self.version}-{encoding}'
+
+    def sizes(self):
+        return {encoding: len(data) for encoding, data in self.encoded.items()}
+
+
+class SnapshotStore:
+    """
+    Named snapshots built together by `build()` (-> {name: payload}).
+
+    `fingerprint()` is a cheap query that changes whenever the source rows
+    do; it is re-run at most every `check_interval` seconds, and only then
+    is the data read and compressed again. So requests in between cost no
+    database work, and a re-seed done by another process (flask init-db) is
+    picked up within `check_interval`.
+    """
+
+    def __init__(self, build, fingerprint, check_interval=60, brotli_quality=9):
+        self.build = build
+        self.fingerprint = fingerprint
+        self.check_interval = check_interval
+        self.brotli_quality = brotli_quality
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._fingerprint = None
+        self._checked_at = None
+        self._stats = {'builds': 0, 'checks': 0}
+
+    def get(self, name):
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._snapshots[name]
+            self._checked_at = now
+            self._stats['checks'] += 1
+            fingerprint = self.fingerprint()
+            if fingerprint != self._fingerprint or name not in self._snapshots:
+                self._rebuild(fingerprint)
+            return self._snapshots[name]
+
+    def rebuild(self):
+        """Build now (startup, after seeding) instead of on the next request."""
+        with self._lock:
+            self._rebuild(self.fingerprint())
+            self._checked_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['snapshots'] = {
+                name: {'version': snapshot.version, 'bytes': snapshot.sizes()}
+                for name, snapshot in self._snapshots.items()
+            }
+        stats['check_interval'] = self.check_interval
+        return stats
+
+    def _rebuild(self, fingerprint):
+        started = time.perf_counter()
+        self._snapshots = {
+            name: Snapshot(payload, self.brotli_quality) for name, payload in self.build().items()
+        }
+        self._fingerprint = fingerprint
+        self._stats['builds'] += 1
+        logging.info(f"Built snapshots {sorted(self._snapshots)} in {time.perf_counter() - started:.2f}s")
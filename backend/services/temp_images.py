@@ -0,0 +1,96 @@
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+_TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class TemporaryImageStore:
+    """
+    Short-lived JPEGs for anonymous predictions.
+
+    put() writes the bytes under an unguessable token and returns it; the
+    file's mtime is the expiry clock, so every gunicorn worker sharing the
+    directory agrees on what is still valid. Expired files are swept at most
+    every `sweep_interval` seconds from put().
+    """
+
+    def __init__(self, directory, ttl=300, sweep_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._stats = {'stored': 0, 'served': 0, 'expired': 0, 'swept': 0}
+
+    def put(self, data):
+        token = uuid.uuid4().hex
+        path = self._path(token)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._stats['stored'] += 1
+        self._maybe_sweep()
+        return token
+
+    def lookup(self, token):
+        """Returns (path, seconds left) for a valid token, or None."""
+        if not _TOKEN_PATTERN.match(token):
+            return None
+        path = self._path(token)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if age > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self._stats['expired'] += 1
+            return None
+        with self._lock:
+            self._stats['served'] += 1
+        return path, max(0, int(self.ttl - age))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['ttl'] = self.ttl
+        return stats
+
+    def _path(self, token):
+        return os.path.join(self.directory, f'{token}.jpg')
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _maybe_sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+
+        swept = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError as e:
+            logging.warning(f"Temporary image sweep failed: {e}")
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+                    swept += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._stats['swept'] += swept
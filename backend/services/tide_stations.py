@@ -0,0 +1,188 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+# MySQL ST_Distance_Sphere와 같은 지구 반지름(m)이라 기존 응답의 거리와 같다
+EARTH_RADIUS_M = 6370986
+
+# obs_object(관측 항목 문자열)에서 읽는 관측 항목 비트 (시드할 때 한 번 계산해 capabilities 컬럼에 저장)
+TIDE_LEVEL = 1  # 조위
+WATER_TEMP = 2  # 수온
+AIR_TEMP = 4  # 기온
+AIR_PRESSURE = 8  # 기압
+TIDE_TABLE = 16  # 조수간만 예보 ('없음' 표기 제외)
+ALL_CAPABILITIES = TIDE_LEVEL | WATER_TEMP | AIR_TEMP | AIR_PRESSURE | TIDE_TABLE
+
+# 관측소 분류: 이름 -> 모두 있어야 하는 관측 항목 비트
+STATION_CLASSES = {
+    # 조위, 수온, 기온, 기압 4개 모두 관측 가능한 관측소
+    'obsrecent': TIDE_LEVEL | WATER_TEMP | AIR_TEMP | AIR_PRESSURE,
+    # 조수간만 예보가 있는 관측소
+    'obspretab': TIDE_TABLE,
+}
+
+
+def parse_capabilities(obs_object):
+    """Capability bitmask of an obs_object string such as '조위, 수온, 기온, 기압, 조수간만'."""
+    obs_object = obs_object or ''
+    capabilities = 0
+    for bit, item in ((TIDE_LEVEL, '조위'), (WATER_TEMP, '수온'), (AIR_TEMP, '기온'), (AIR_PRESSURE, '기압')):
+        if item in obs_object:
+            capabilities |= bit
+    if '조수간만' in obs_object and '없음' not in obs_object:
+        capabilities |= TIDE_TABLE
+    return capabilities
+
+
+def masks_with(required):
+    """
+    Every bitmask that contains all of `required`. There are only 32, so
+    `capabilities IN (...)` selects a class with indexed equality lookups.
+    """
+    return [value for value in range(ALL_CAPABILITIES + 1) if value & required == required]
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) points on the unit sphere; chord length orders pairs the same way as great-circle distance."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in metres (arrays broadcast)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _haversine_scalar(lat1, lon1, lat2, lon2):
+    # 한 점 조회는 numpy 오버헤드 없이 계산
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(max(a, 0.0), 1.0)))
+
+
+class StationIndex:
+    """KD-tree over the stations of one class, on unit-sphere coordinates."""
+
+    def __init__(self, stations):
+        from scipy.spatial import cKDTree
+
+        self.stations = stations
+        self._lat = np.array([station['obs_lat'] for station in stations], dtype=np.float64)
+        self._lon = np.array([station['obs_lon'] for station in stations], dtype=np.float64)
+        self._tree = cKDTree(unit_vectors(self._lat, self._lon)) if stations else None
+
+    def __len__(self):
+        return len(self.stations)
+
+    def nearest(self, lat, lon):
+        """(station, distance in metres) or None when the class has no stations."""
+        if self._tree is None:
+            return None
+        _, index = self._tree.query(unit_vectors(lat, lon))
+        station = self.stations[index]
+        return station, _haversine_scalar(lat, lon, station['obs_lat'], station['obs_lon'])
+
+    def nearest_many(self, lats, lons):
+        """(station indices, distances in metres) for arrays of coordinates, in one vectorized pass."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if self._tree is None:
+            return np.full(lats.shape, -1), np.full(lats.shape, np.nan)
+        _, indices = self._tree.query(unit_vectors(lats, lons))
+        return indices, haversine_m(lats, lons, self._lat[indices], self._lon[indices])
+
+
+class TideStationIndex:
+    """
+    Nearest tide station per capability class, answered from memory.
+
+    `load(required)` returns the stations having every capability bit in
+    `required`, as dicts (obs_station_id, obs_post_id, obs_post_name,
+    obs_lat, obs_lon). The table is small and only changes when it is
+    seeded, so the trees are built once and kept. Like SnapshotStore,
+    `fingerprint()` (a cheap query that changes whenever the rows do) is
+    re-run at most every `check_interval` seconds and the trees are rebuilt
+    only when it changed, so a seed done by another process (flask init-db)
+    is picked up. While some class is still empty the interval is not
+    started, so seeding is noticed on the very next request.
+    """
+
+    def __init__(self, load, fingerprint=None, check_interval=60, classes=STATION_CLASSES):
+        self.load = load
+        self.fingerprint = fingerprint
+        self.check_interval = check_interval
+        self.classes = classes
+        self._lock = threading.Lock()
+        self._indexes = None
+        self._fingerprint = None
+        self._checked_at = None
+        self._stats = {'builds': 0, 'checks': 0}
+
+    def index(self, name):
+        indexes = self._indexes
+        if indexes is None or self._expired():
+            with self._lock:
+                if self._indexes is None or self._expired():
+                    self._refresh()
+                indexes = self._indexes
+        return indexes[name]
+
+    def reload(self):
+        """Build now (startup, after seeding) instead of on the next check."""
+        with self._lock:
+            self._rebuild(self.fingerprint() if self.fingerprint else None)
+
+    def nearest(self, name, lat, lon):
+        return self.index(name).nearest(lat, lon)
+
+    def nearest_many(self, name, lats, lons):
+        index = self.index(name)
+        indices, distances = index.nearest_many(lats, lons)
+        return [
+            (index.stations[i], float(distance)) if i >= 0 else None
+            for i, distance in zip(indices.tolist(), distances.tolist())
+        ]
+
+    def stats(self):
+        with self._lock:
+            indexes = self._indexes
+            stats = dict(self._stats)
+        stats['check_interval'] = self.check_interval
+        if indexes is None:
+            return {'loaded': False, **stats}
+        return {'loaded': True, 'stations': {name: len(index) for name, index in indexes.items()}, **stats}
+
+    def _expired(self):
+        checked_at = self._checked_at
+        return checked_at is None or time.monotonic() - checked_at >= self.check_interval
+
+    def _refresh(self):
+        self._stats['checks'] += 1
+        if self.fingerprint is None:
+            # 확인할 방법이 없으면 빈 분류가 있을 때만 다시 읽는다
+            changed = self._checked_at is None
+            fingerprint = None
+        else:
+            fingerprint = self.fingerprint()
+            changed = fingerprint != self._fingerprint
+        if self._indexes is None or changed:
+            self._rebuild(fingerprint)
+        else:
+            self._mark_checked()
+
+    def _rebuild(self, fingerprint):
+        self._indexes = {name: StationIndex(self.load(required)) for name, required in self.classes.items()}
+        self._fingerprint = fingerprint
+        self._stats['builds'] += 1
+        self._mark_checked()
+
+    def _mark_checked(self):
+        # 빈 분류가 있으면(시드 전) 간격을 시작하지 않고 다음 요청에서 다시 확인
+        empty = any(len(index) == 0 for index in self._indexes.values())
+        self._checked_at = None if empty else time.monotonic()
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from .image_variants import remove_variants, upload_key
+
+# <sha256 앞 2글자>/<다음 2글자>/<sha256>.<ext>
+_OBJECT_KEY = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$')
+_EXTENSIONS = {'jpeg': 'jpg', 'jpg': 'jpg', 'png': 'png', 'webp': 'webp'}
+
+
+def is_object_key(key):
+    return bool(key and _OBJECT_KEY.match(key))
+
+
+class UploadStorage:
+    """
+    Content-addressed upload storage.
+
+    Files are named by the SHA-256 of their bytes and sharded into two
+    levels of hash-prefix directories under `root`, so identical uploads are
+    stored once. `model` is the ORM class holding one row per stored object
+    (object_key, refcount, size_bytes); put()/retain()/release() change the
+    refcount in the caller's session, so the count commits or rolls back
+    together with the row that references the file. Files whose count drops
+    to zero are deleted (with their variants) after that commit; files
+    written by a transaction that rolls back are deleted again.
+
+    A file is never deleted while an open transaction in this process still
+    references it (`_pending`, checked under the same lock as the deletion),
+    and a transaction that stored bytes puts them back after its commit if
+    another worker deleted the file in between. Uploads that predate this
+    storage have no refcount; they are only deleted when
+    `legacy_referenced(connection, key)` finds no row using them.
+
+    Keys are paths relative to `root`; callers store them either as is
+    (Catch.photo_url) or as '/uploads/<key>' (post images, avatars) and may
+    pass either form back in.
+    """
+
+    def __init__(self, root, model, session_factory, legacy_referenced=None):
+        self.root = root
+        self.model = model
+        self.legacy_referenced = legacy_referenced
+        self._lock = threading.Lock()
+        self._pending = Counter()  # key -> 아직 커밋/롤백되지 않은 트랜잭션의 참조 수
+        self._stats = {'stored': 0, 'deduplicated': 0, 'released': 0, 'deleted': 0}
+        event.listen(session_factory, 'after_commit', self._after_commit)
+        event.listen(session_factory, 'after_rollback', self._after_rollback)
+
+    # --- 경로 ---
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def url(self, key):
+        return f'/uploads/{key}'
+
+    @staticmethod
+    def make_key(data, ext):
+        digest = hashlib.sha256(data).hexdigest()
+        ext = _EXTENSIONS.get(ext.lower().lstrip('.'), ext.lower().lstrip('.'))
+        return f'{digest[:2]}/{digest[2:4]}/{digest}.{ext}'
+
+    # --- 참조 카운트 ---
+    def put(self, session, data, ext='jpg'):
+        """Store `data` (bytes or a file object) and count one reference to it. Returns the key."""
+        if hasattr(data, 'read'):
+            data = data.read()
+        key = self.make_key(data, ext)
+        path = self.path(key)
+        # 삭제 판단보다 먼저 참조를 등록해, 다른 트랜잭션이 이 파일을 지우지 못하게 한다
+        self._hold(session, key)
+        session.info.setdefault('upload_storage_data', {})[key] = data
+        if os.path.exists(path):
+            self._count('deduplicated')
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._count('stored')
+            session.info.setdefault('upload_storage_written', set()).add(key)
+        self._increment(session, key, len(data))
+        return key
+
+    def retain(self, session, url):
+        """Count one more reference to an already stored upload. Returns its key or None."""
+        key = upload_key(url)
+        if not is_object_key(key):
+            return None
+        self._hold(session, key)
+        if not os.path.exists(self.path(key)):
+            return None
+        self._increment(session, key, os.path.getsize(self.path(key)))
+        return key
+
+    def release(self, session, url):
+        """
+        Drop one reference. When none are left the object row is deleted and
+        the file is removed after the session commits. Uploads that predate
+        this storage (not content-addressed) are removed after the commit
+        only if no row references them any more.
+        """
+        key = upload_key(url)
+        if not key:
+            return
+        self._count('released')
+        if is_object_key(key):
+            model = self.model
+            session.query(model).filter(model.object_key == key, model.refcount > 0)\
+                .update({model.refcount: model.refcount - 1}, synchronize_session=False)
+            deleted = session.query(model).filter(model.object_key == key, model.refcount <= 0)\
+                .delete(synchronize_session=False)
+            if not deleted:
+                return
+        elif self.legacy_referenced is None:
+            return
+        session.info.setdefault('upload_storage_orphans', set()).add(key)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _increment(self, session, key, size):
+        model = self.model
+        updated = session.query(model).filter(model.object_key == key)\
+            .update({model.refcount: model.refcount + 1}, synchronize_session=False)
+        if updated:
+            return
+        try:
+            with session.begin_nested():
+                session.add(model(object_key=key, refcount=1, size_bytes=size))
+        except IntegrityError:
+            # 다른 요청이 먼저 같은 내용을 저장한 경우
+            session.query(model).filter(model.object_key == key)\
+                .update({model.refcount: model.refcount + 1}, synchronize_session=False)
+        # 고아 파일 목록에 있었다면 다시 참조되므로 삭제하지 않는다
+        session.info.get('upload_storage_orphans', set()).discard(key)
+
+    def _hold(self, session, key):
+        with self._lock:
+            self._pending[key] += 1
+        session.info.setdefault('upload_storage_held', []).append(key)
+
+    def _after_commit(self, session):
+        # begin_nested() 세이브포인트의 커밋/롤백에도 호출되므로 바깥 트랜잭션만 처리
+        if session.in_nested_transaction():
+            return
+        session.info.pop('upload_storage_written', None)
+        self._restore_missing(session.info.pop('upload_storage_data', {}))
+        self._remove_unreferenced(session, session.info.pop('upload_storage_orphans', ()))
+
+    def _after_rollback(self, session):
+        if session.in_nested_transaction():
+            return
+        session.info.pop('upload_storage_orphans', None)
+        session.info.pop('upload_storage_data', None)
+        self._remove_unreferenced(session, session.info.pop('upload_storage_written', ()))
+
+    def _restore_missing(self, stored):
+        # 다른 워커가 커밋 직전에 같은 파일을 지웠다면 이 트랜잭션이 가진 내용으로 다시 쓴다
+        for key, data in stored.items():
+            path = self.path(key)
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            logging.warning(f"Restored upload {key} removed by a concurrent transaction")
+
+    def _remove_unreferenced(self, session, keys):
+        held = session.info.pop('upload_storage_held', ())
+        with self._lock:
+            self._pending.subtract(held)
+            self._pending += Counter()  # 0 이하 항목 정리
+            for key in keys:
+                if self._pending[key] > 0 or self._still_referenced(session, key):
+                    continue
+                try:
+                    os.remove(self.path(key))
+                    self._count('deleted', locked=True)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.error(f"Removing upload {key} failed: {e}")
+                remove_variants(self.root, key)
+
+    def _still_referenced(self, session, key):
+        # 커밋과 파일 삭제 사이에 다른 요청(다른 워커 포함)이 같은 파일을 다시 참조했는지 확인
+        with session.bind.connect() as connection:
+            if not is_object_key(key):
+                return self.legacy_referenced is None or self.legacy_referenced(connection, key)
+            row = connection.execute(
+                self.model.__table__.select().where(self.model.object_key == key)
+            ).first()
+        return row is not None
+
+    def _count(self, name, locked=False):
+        if locked:
+            self._stats[name] += 1
+            return
+        with self._lock:
+            self._stats[name] += 1
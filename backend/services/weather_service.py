@@ -2,83 +2,146 @@ import requests
 from datetime import datetime
 import pytz
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import math
+from concurrent.futures import as_completed
+
+from services.http_client import http
+from services.response_cache import ResponseCache, make_backend
+from services.single_flight import SingleFlightCache
 
 # API 키와 base URL 설정
 KHOA_API_KEY = os.getenv('KHOA_API_KEY')
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')  # API 키를 환경변수로 관리
+# 로컬 대역 서버로 바꿔 테스트할 수 있도록 설정 가능
+KHOA_API_BASE_URL = os.getenv('KHOA_API_BASE_URL', 'http://www.khoa.go.kr/api/oceangrid').rstrip('/')
+
+# KHOA 응답 캐시: DATA_TYPE -> (TTL, 만료 후 갱신하는 동안 이전 값을 주는 시간) 초
+# 최근 관측값은 자주 바뀌고, 조석 예보표는 날짜(키에 포함)별로 하루 동안 같다
+KHOA_CACHE_TTLS = {
+    'tideObsRecent': (int(os.getenv('KHOA_RECENT_TTL', '120')), int(os.getenv('KHOA_RECENT_STALE_TTL', '600'))),
+    'tideObsPreTab': (int(os.getenv('KHOA_PRETAB_TTL', '21600')), int(os.getenv('KHOA_PRETAB_STALE_TTL', '86400'))),
+}
+khoa_cache = SingleFlightCache(
+    max_entries=int(os.getenv('KHOA_CACHE_SIZE', '1024')),
+    refresh_workers=int(os.getenv('KHOA_CACHE_REFRESH_WORKERS', '2')),
+)
+
+# OpenWeather 현재 날씨 캐시: 좌표를 WEATHER_CELL_DEG 격자로 묶어 칸마다 한 번 조회
+# WEATHER_CACHE=memory | off | redis://host:6379/0 (기본은 RESPONSE_CACHE와 같은 저장소, 워커 간 공유 가능)
+OPENWEATHER_API_BASE_URL = os.getenv('OPENWEATHER_API_BASE_URL', 'https://api.openweathermap.org/data/2.5/weather')
+WEATHER_CELL_DEG = float(os.getenv('WEATHER_CELL_DEG', '0.05'))
+weather_cache = ResponseCache(
+    make_backend(os.getenv('WEATHER_CACHE', os.getenv('RESPONSE_CACHE', 'memory')),
+                 int(os.getenv('WEATHER_CACHE_SIZE', '4096'))),
+    ttl=int(os.getenv('WEATHER_CACHE_TTL', '300')),
+)
+
+class KhoaError(Exception):
+    """KHOA answered, but with an error or without data (not cached)."""
+
+
+def fetch_khoa_data(DATA_TYPE, obs_post_id, date):
+    """result.data of one KHOA oceangrid API call; raises on any failure."""
+    api_url = f"{KHOA_API_BASE_URL}/{DATA_TYPE}/search.do"
+    params = {
+        'ServiceKey': KHOA_API_KEY,
+        'ObsCode': obs_post_id,
+        'Date': date,
+        'ResultType': 'json'
+    }
+    response = http.get(api_url, upstream='khoa', params=params)
+    response.raise_for_status()
+    try:
+        api_data = response.json()
+    except ValueError:
+        raise KhoaError('Invalid JSON response')
+
+    if 'result' not in api_data or 'data' not in api_data['result']:
+        if 'error' in api_data.get('result', {}):
+            raise KhoaError(api_data['result']['error'])
+        raise KhoaError('Unexpected API response structure')
+    return api_data['result']['data']
+
+
+def get_khoa_data(DATA_TYPE, obs_post_id, date):
+    """Cached fetch_khoa_data: one upstream call per (DATA_TYPE, obs_post_id, date) per TTL."""
+    ttl, stale_ttl = KHOA_CACHE_TTLS[DATA_TYPE]
+    return khoa_cache.get(
+        (DATA_TYPE, obs_post_id, date),
+        lambda: fetch_khoa_data(DATA_TYPE, obs_post_id, date),
+        ttl,
+        stale_ttl,
+    )
+
 
 def get_sea_weather_by_seapostid(obs_data):
     current_date = datetime.now().strftime('%Y%m%d')
 
     # 병렬로 처리할 함수
     def fetch_api_data(DATA_TYPE, obs_post_id):
-        api_url = f"http://www.khoa.go.kr/api/oceangrid/{DATA_TYPE}/search.do"
-        params = {
-            'ServiceKey': KHOA_API_KEY,
-            'ObsCode': obs_post_id,
-            'Date': current_date,
-            'ResultType': 'json'
-        }
         try:
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()
-            try:
-                api_data = response.json()
-            except ValueError:
-                return (DATA_TYPE, {'error': 'Invalid JSON response'})
-
-            if 'result' not in api_data or 'data' not in api_data['result']:
-                if 'error' in api_data['result']:
-                    return (DATA_TYPE, {'error': api_data['result']['error']})
-                else:
-                    return (DATA_TYPE, {'error': 'Unexpected API response structure'})
-
-            filtered_api_data = api_data['result']['data']
-            return (DATA_TYPE, filtered_api_data)
+            return (DATA_TYPE, get_khoa_data(DATA_TYPE, obs_post_id, current_date))
+        except KhoaError as e:
+            return (DATA_TYPE, {'error': str(e)})
         except requests.exceptions.RequestException as e:
             return (DATA_TYPE, {'error': str(e)})
 
-    # ThreadPoolExecutor를 사용해 병렬 요청 실행
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [
-            executor.submit(fetch_api_data, "tideObsRecent", obs_data['obsrecent']),
-            executor.submit(fetch_api_data, "tideObsPreTab", obs_data['obspretab'])
-        ]
+    # 공용 스레드 풀에서 병렬 요청 실행 (호출마다 풀을 만들지 않음)
+    futures = [
+        http.executor.submit(fetch_api_data, "tideObsRecent", obs_data['obsrecent']),
+        http.executor.submit(fetch_api_data, "tideObsPreTab", obs_data['obspretab'])
+    ]
 
-        results = {
-            'obsrecent': {},
-            'obspretab': {}
-        }
-        
-        for future in as_completed(futures):
-            DATA_TYPE, result = future.result()
-            if DATA_TYPE == "tideObsRecent":
-                results['obsrecent'] = result
-            else:
-                results['obspretab'] = result
+    results = {
+        'obsrecent': {},
+        'obspretab': {}
+    }
+    
+    for future in as_completed(futures):
+        DATA_TYPE, result = future.result()
+        if DATA_TYPE == "tideObsRecent":
+            results['obsrecent'] = result
+        else:
+            results['obspretab'] = result
 
     return results
     
 
+def weather_cell(lat, lon):
+    """(row, col) of the WEATHER_CELL_DEG grid cell containing a point."""
+    return math.floor(lat / WEATHER_CELL_DEG), math.floor(lon / WEATHER_CELL_DEG)
+
+
 def get_weather_by_coordinates(lat, lon):
     """
     Get Current Weather info by using latitude & longitude
+
+    Coordinates are snapped to a WEATHER_CELL_DEG grid and the weather at
+    the cell centre is cached per cell for WEATHER_CACHE_TTL seconds, so
+    nearby lookups share one OpenWeather call.
     """
+    row, col = weather_cell(lat, lon)
+    key = f'{WEATHER_CELL_DEG}:{row}:{col}'
+    cached = weather_cache.get('weather', key)
+    if cached is not None:
+        return cached
+    weather = fetch_weather((row + 0.5) * WEATHER_CELL_DEG, (col + 0.5) * WEATHER_CELL_DEG)
+    weather_cache.set('weather', key, weather)
+    return weather
+
+
+def fetch_weather(lat, lon):
     try:
         # OpenWeather API 파라미터 설정
         params = {
-            "lat": lat,
-            "lon": lon,
+            "lat": round(lat, 6),
+            "lon": round(lon, 6),
             "appid": OPENWEATHER_API_KEY,
             "lang": "kr",
             "units": "metric"
         }
         
-        
-        OPENWEATHER_API_BASE_URL = 'https://api.openweathermap.org/data/2.5/weather'
-        
-        response = requests.get(OPENWEATHER_API_BASE_URL, params=params)
+        response = http.get(OPENWEATHER_API_BASE_URL, upstream='openweather', params=params)
         data = response.json()
         
         if response.status_code != 200:
@@ -91,6 +154,11 @@ def get_weather_by_coordinates(lat, lon):
 
     except Exception as e:
         raise Exception(f"Error fetching weather data: {str(e)}")
+
+
+def weather_cache_stats():
+    """Per-cell cache hits/misses plus OpenWeather call count and latency."""
+    return dict(weather_cache.stats(), cell_deg=WEATHER_CELL_DEG, upstream=http.stats('openweather'))
     
     
 def get_wind_direction(degrees):